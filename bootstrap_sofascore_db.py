@@ -20,10 +20,31 @@ Usage:
   python3 -m venv .venv && . .venv/bin/activate
   pip install --upgrade pip
   pip install psycopg2-binary requests
+  # Optional: stream large list payloads instead of decoding them whole
+  pip install ijson
+  # Optional: faster JSON decoding and JSONB serialization
+  pip install orjson
+  # Optional: WebP thumbnails for the local image cache (BOOTSTRAP_IMAGE_CACHE_DIR)
+  pip install pillow
+  # Optional: async engine for the per-event phases (BOOTSTRAP_ENGINE=async)
+  pip install "psycopg[binary]" aiohttp
 
   # Run the bootstrap
   python scripts/bootstrap_sofascore_db.py
 
+  # Phases form a dependency graph and are checkpointed per run key (default:
+  # today's UTC date), so a rerun resumes where a failed run stopped
+  python scripts/bootstrap_sofascore_db.py --list
+  python scripts/bootstrap_sofascore_db.py --phases heatmaps,transfers
+  python scripts/bootstrap_sofascore_db.py --phases images --with-deps --fresh
+  # Independent phases can overlap (they share teams/countries row locks)
+  python scripts/bootstrap_sofascore_db.py --workers 3
+
+  # Keep today's schedule fresh and serve the live counters (live events per
+  # category, live/total per sport) from memory on a local port
+  BOOTSTRAP_COUNTERS_PORT=8090 python scripts/bootstrap_sofascore_db.py --daemon --phases schedule,live_counts
+  curl http://127.0.0.1:8090/football/live/category-counts
+
 This script:
 - Creates database (if not exists)
 - Creates all tables
@@ -34,28 +55,88 @@ This script:
   * Lineups and lineup players
   * Player heatmaps for starters
   * Player transfer history for starters
+  * Full player profiles for players only known from lineups (off by
+    default: set BOOTSTRAP_FETCH_PLAYER_PROFILES=1 together with a verified
+    BOOTSTRAP_PLAYER_PROFILE_ENDPOINT); trending players arrive with a full
+    profile already
 
 Notes:
 - Some API endpoints have signature/availability quirks. This script
   uses the ones that were verified working during testing.
+- Records of the statistics/videos/trending endpoints are checked against
+  field types learned from API snapshots (data/payload_schemas.json; rebuild
+  with scripts/learn_payload_schemas.py). Rejected and partial records are
+  counted per endpoint in the run summary and report.
 - You can re-run safely; UPSERTs ensure idempotency.
 """
 from __future__ import annotations
 
 import os
+import io
 import sys
 import json
+import hashlib
 import time
 import logging
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import gc
+import argparse
+import asyncio
+import contextvars
+import zlib
+import signal
+import sqlite3
+import tempfile
+import resource
+import itertools
+import math
+import shutil
+import cProfile
+import pstats
+import subprocess
+import multiprocessing
+import atexit
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
 import requests
 import psycopg2
 from psycopg2 import extensions as pg_ext
 import psycopg2.extras
+import psycopg2.errors
 from psycopg2.extensions import connection as PGConnection
 
+try:  # optional: incremental parsing of large list payloads
+    import ijson
+except ImportError:  # pragma: no cover - falls back to whole-body parsing
+    ijson = None
+
+try:  # optional: WebP thumbnails for the local image cache
+    from PIL import Image
+except ImportError:  # pragma: no cover - cache stores originals only
+    Image = None
+
+try:  # optional: fast JSON encode/decode for HTTP bodies and JSONB params
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib json module
+    orjson = None
+
+try:  # optional: async engine (BOOTSTRAP_ENGINE=async) - psycopg 3 pipeline mode
+    import psycopg
+    from psycopg.types.json import Jsonb
+except ImportError:  # pragma: no cover - sync engine only
+    psycopg = None
+    Jsonb = None
+
+try:  # optional: async engine (BOOTSTRAP_ENGINE=async) - async HTTP
+    import aiohttp
+except ImportError:  # pragma: no cover - sync engine only
+    aiohttp = None
+
 
 # ---------------
 # Configuration
@@ -75,6 +156,7 @@ LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 # Bootstrap pacing controls
 MAX_EVENTS = int(os.environ.get("BOOTSTRAP_MAX_EVENTS", "10"))
 MAX_STARTERS = int(os.environ.get("BOOTSTRAP_MAX_STARTERS", "6"))
+MAX_TOURNAMENTS = int(os.environ.get("BOOTSTRAP_MAX_TOURNAMENTS", "10"))
 FETCH_TRANSFERS = os.environ.get("BOOTSTRAP_FETCH_TRANSFERS", "1").lower() in ("1", "true", "yes", "y")
 FETCH_HEATMAPS = os.environ.get("BOOTSTRAP_FETCH_HEATMAPS", "1").lower() in ("1", "true", "yes", "y")
 FETCH_STATISTICS = os.environ.get("BOOTSTRAP_FETCH_STATISTICS", "1").lower() in ("1", "true", "yes", "y")
@@ -83,10 +165,150 @@ FETCH_TOURNAMENT_FEATURES = os.environ.get("BOOTSTRAP_FETCH_TOURNAMENT_FEATURES"
 FETCH_TRENDING = os.environ.get("BOOTSTRAP_FETCH_TRENDING", "1").lower() in ("1", "true", "yes", "y")
 FETCH_SUGGESTIONS = os.environ.get("BOOTSTRAP_FETCH_SUGGESTIONS", "1").lower() in ("1", "true", "yes", "y")
 FETCH_LIVE_COUNTS = os.environ.get("BOOTSTRAP_FETCH_LIVE_COUNTS", "1").lower() in ("1", "true", "yes", "y")
+# Player profile enrichment: full profiles for players only known from lineups. Off by
+# default: no snapshot shows a working profile endpoint, so enable it only together
+# with a BOOTSTRAP_PLAYER_PROFILE_ENDPOINT verified against the upstream API
+FETCH_PLAYER_PROFILES = os.environ.get("BOOTSTRAP_FETCH_PLAYER_PROFILES", "0").lower() in ("1", "true", "yes", "y")
+PLAYER_PROFILE_ENDPOINT = os.environ.get("BOOTSTRAP_PLAYER_PROFILE_ENDPOINT", "/football/player/details")
+PLAYER_PROFILE_CONCURRENCY = max(1, int(os.environ.get("BOOTSTRAP_PLAYER_PROFILE_CONCURRENCY", "8")))
+PLAYER_PROFILE_BUDGET = int(os.environ.get("BOOTSTRAP_PLAYER_PROFILE_BUDGET", "200"))
 FETCH_IMAGES = os.environ.get("BOOTSTRAP_FETCH_IMAGES", "1").lower() in ("1", "true", "yes", "y")
-
-# Rate limiting for image downloads
+BUILD_SEARCH_INDEX = os.environ.get("BOOTSTRAP_BUILD_SEARCH_INDEX", "1").lower() in ("1", "true", "yes", "y")
+
+# Standings: per-round snapshots/form computed locally, and how long to wait for
+# the upstream table before falling back to a locally computed one
+STANDINGS_SNAPSHOTS = os.environ.get("BOOTSTRAP_STANDINGS_SNAPSHOTS", "1").lower() in ("1", "true", "yes", "y")
+STANDINGS_TIMEOUT = float(os.environ.get("BOOTSTRAP_STANDINGS_TIMEOUT", str(REQUEST_TIMEOUT)))
+
+# Head-to-head and rolling team form, maintained from finished events
+BUILD_TEAM_FORM = os.environ.get("BOOTSTRAP_BUILD_TEAM_FORM", "1").lower() in ("1", "true", "yes", "y")
+TEAM_FORM_WINDOW = max(1, int(os.environ.get("BOOTSTRAP_TEAM_FORM_WINDOW", "5")))
+H2H_RECENT_MEETINGS = max(1, int(os.environ.get("BOOTSTRAP_H2H_RECENT_MEETINGS", "5")))
+
+# Live counters (live events per category, live/total events per sport): "local" keeps them in
+# memory from the events this process ingests and persists them to Postgres; "upstream" fetches
+# the category-counts/count-by-sport endpoints instead
+LIVE_COUNTS_SOURCE = os.environ.get("BOOTSTRAP_LIVE_COUNTS_SOURCE", "local").lower()
+# Serve the local counters over HTTP on this port (0 disables); with --daemon or a port they are
+# persisted every COUNTERS_PERSIST_SECONDS
+COUNTERS_HOST = os.environ.get("BOOTSTRAP_COUNTERS_HOST", "127.0.0.1")
+COUNTERS_PORT = int(os.environ.get("BOOTSTRAP_COUNTERS_PORT", "0"))
+COUNTERS_PERSIST_SECONDS = max(1.0, float(os.environ.get("BOOTSTRAP_COUNTERS_PERSIST_SECONDS", "30")))
+# Ingestion SLA: a live event whose latest data was fetched more than this many seconds ago is
+# lagging (boosted by the scheduler, and its details refetched); lag gauges count live events
+# older than each of LAG_GAUGE_SECONDS; LAG_SAMPLES fetch-to-commit lags are kept for percentiles
+LIVE_LAG_SLA_SECONDS = max(1.0, float(os.environ.get("BOOTSTRAP_LIVE_LAG_SLA_SECONDS", "120")))
+LAG_GAUGE_SECONDS = [int(x) for x in os.environ.get("BOOTSTRAP_LAG_GAUGE_SECONDS", "60,300,900").split(",") if x.strip()]
+LAG_SAMPLES = max(1, int(os.environ.get("BOOTSTRAP_LAG_SAMPLES", "10000")))
+# --daemon: seconds between reruns of the selected phases
+DAEMON_INTERVAL = max(1.0, float(os.environ.get("BOOTSTRAP_DAEMON_INTERVAL", "60")))
+
+# Change feed rows older than this are pruned at the end of each run (0 keeps everything)
+CHANGE_FEED_RETENTION_DAYS = int(os.environ.get("BOOTSTRAP_CHANGE_FEED_RETENTION_DAYS", "7"))
+
+# Local search index: longest prefix stored per token, and entries kept per prefix
+SEARCH_PREFIX_MAX_LEN = int(os.environ.get("BOOTSTRAP_SEARCH_PREFIX_MAX_LEN", "12"))
+SEARCH_PREFIX_TOP = int(os.environ.get("BOOTSTRAP_SEARCH_PREFIX_TOP", "10"))
+
+# Low-memory mode for long backfills: no response memo, id sets spill to disk early
+LOW_MEMORY = os.environ.get("BOOTSTRAP_LOW_MEMORY", "0").lower() in ("1", "true", "yes", "y")
+# Soft RSS ceiling in MB (0 = none): above it cached responses are dropped, and if that is
+# not enough, per-event enrichment stops for this run
+RSS_LIMIT_MB = int(os.environ.get("BOOTSTRAP_RSS_LIMIT_MB", "0"))
+# Id sets keep this many keys in memory before moving them to an SQLite file in SPILL_DIR
+SPILL_THRESHOLD = int(os.environ.get("BOOTSTRAP_SPILL_THRESHOLD", "5000" if LOW_MEMORY else "500000"))
+SPILL_DIR = os.environ.get("BOOTSTRAP_SPILL_DIR", "") or None
+
+# Serve repeated (path, params) API calls from a per-run memo instead of refetching
+DEDUPE_REQUESTS = os.environ.get("BOOTSTRAP_DEDUPE_REQUESTS", "0" if LOW_MEMORY else "1").lower() in ("1", "true", "yes", "y")
+
+# Connection pool sizing and health checks
+POOL_MIN = int(os.environ.get("BOOTSTRAP_POOL_MIN", "1"))
+POOL_MAX = int(os.environ.get("BOOTSTRAP_POOL_MAX", "4"))
+# Idle connections older than this are pinged with SELECT 1 before reuse
+POOL_HEALTHCHECK_SECONDS = float(os.environ.get("BOOTSTRAP_POOL_HEALTHCHECK_SECONDS", "30"))
+POOL_RECONNECT_ATTEMPTS = int(os.environ.get("BOOTSTRAP_POOL_RECONNECT_ATTEMPTS", "5"))
+# PREPARE each UPSERT_* once per connection (disable behind transaction-mode pgbouncer)
+PREPARED_STATEMENTS = os.environ.get("BOOTSTRAP_PREPARED_STATEMENTS", "1").lower() in ("1", "true", "yes", "y")
+# Rows per EXECUTE for the array-based UPSERT_*_BATCH statements
+UPSERT_BATCH_SIZE = max(1, int(os.environ.get("BOOTSTRAP_UPSERT_BATCH_SIZE", "500")))
+
+# Split catalog/schedule writes and per-event enrichment across N worker processes
+SHARDS = max(1, int(os.environ.get("BOOTSTRAP_SHARDS", "1")))
+# Rows (or event ids) per chunk handed to a shard worker as the partitioned stream fills it
+SHARD_CHUNK_SIZE = max(1, int(os.environ.get("BOOTSTRAP_SHARD_CHUNK_SIZE", "100")))
+
+# Parse large list payloads (tournament catalog, schedule) incrementally when ijson is installed
+STREAM_JSON = os.environ.get("BOOTSTRAP_STREAM_JSON", "1").lower() in ("1", "true", "yes", "y")
+
+# JSON codec for HTTP bodies and JSONB parameters: auto (orjson if installed), orjson or json
+JSON_BACKEND = os.environ.get("BOOTSTRAP_JSON_BACKEND", "auto").lower()
+
+# Refresh planning: per-entity-class max age (hours) before a row counts as stale,
+# and the max number of items planned per class per run
+REFRESH_TTL_HOURS: Dict[str, float] = {
+    "players": float(os.environ.get("BOOTSTRAP_REFRESH_TTL_PLAYERS_HOURS", "168")),
+    "teams": float(os.environ.get("BOOTSTRAP_REFRESH_TTL_TEAMS_HOURS", "168")),
+    "transfers": float(os.environ.get("BOOTSTRAP_REFRESH_TTL_TRANSFERS_HOURS", "168")),
+    "standings": float(os.environ.get("BOOTSTRAP_REFRESH_TTL_STANDINGS_HOURS", "6")),
+    "venues": float(os.environ.get("BOOTSTRAP_REFRESH_TTL_VENUES_HOURS", "720")),
+    "referees": float(os.environ.get("BOOTSTRAP_REFRESH_TTL_REFEREES_HOURS", "168")),
+}
+REFRESH_BUDGET = int(os.environ.get("BOOTSTRAP_REFRESH_BUDGET", "200"))
+
+# Rate limiting for image downloads: minimum spacing between image requests across all workers
 IMAGE_DOWNLOAD_DELAY = float(os.environ.get("BOOTSTRAP_IMAGE_DELAY", "0.5"))
+IMAGE_CONCURRENCY = max(1, int(os.environ.get("BOOTSTRAP_IMAGE_CONCURRENCY", "8")))
+# Max entities per image kind per run, and age after which an image row is refetched
+IMAGE_BUDGET = int(os.environ.get("BOOTSTRAP_IMAGE_BUDGET", "100"))
+IMAGE_TTL_DAYS = float(os.environ.get("BOOTSTRAP_IMAGE_TTL_DAYS", "30"))
+# First retry delay after a failed/missing image fetch; doubles per consecutive miss, capped at the TTL
+IMAGE_MISS_RETRY_HOURS = float(os.environ.get("BOOTSTRAP_IMAGE_MISS_RETRY_HOURS", "12"))
+# Optional local content-addressed image cache (binaries + WebP thumbnails); empty disables downloads
+IMAGE_CACHE_DIR = os.environ.get("BOOTSTRAP_IMAGE_CACHE_DIR", "")
+IMAGE_THUMB_SIZES = [int(x) for x in os.environ.get("BOOTSTRAP_IMAGE_THUMB_SIZES", "64,128").split(",") if x.strip()]
+
+# Order in which scheduled events are enriched: "priority" (see EVENT_PRIORITY_SQL) or "upstream"
+EVENT_ORDER = os.environ.get("BOOTSTRAP_EVENT_ORDER", "priority").lower()
+# Weights of the event priority score terms, each normalised to 0..1 across the day's events
+EVENT_PRIORITY_WEIGHTS: Dict[str, float] = {
+    "live": float(os.environ.get("BOOTSTRAP_PRIORITY_WEIGHT_LIVE", "3")),
+    "tournament_priority": float(os.environ.get("BOOTSTRAP_PRIORITY_WEIGHT_TOURNAMENT", "1")),
+    "user_count": float(os.environ.get("BOOTSTRAP_PRIORITY_WEIGHT_USERS", "2")),
+    "proximity": float(os.environ.get("BOOTSTRAP_PRIORITY_WEIGHT_PROXIMITY", "2")),
+    "lag": float(os.environ.get("BOOTSTRAP_PRIORITY_WEIGHT_LAG", "2")),
+}
+# Kick-off proximity decays with this time constant (hours)
+EVENT_PROXIMITY_HOURS = float(os.environ.get("BOOTSTRAP_PRIORITY_PROXIMITY_HOURS", "6"))
+
+# Phases run concurrently when their dependencies allow (see PHASES / --workers).
+# Off by default: sibling phases upsert the same teams/countries rows, so
+# concurrent phases can wait on (or deadlock over) each other's row locks.
+PHASE_WORKERS = max(1, int(os.environ.get("BOOTSTRAP_PHASE_WORKERS", "1")))
+
+# Ingest engine for per-event phases: sync (psycopg2 + requests) or async
+# (psycopg 3 pipeline + aiohttp; falls back to sync when either is missing)
+ENGINE = os.environ.get("BOOTSTRAP_ENGINE", "sync").lower()
+# Async engine: concurrent API requests, and events written per pipeline sync/transaction
+ASYNC_HTTP_CONCURRENCY = max(1, int(os.environ.get("BOOTSTRAP_ASYNC_HTTP_CONCURRENCY", "16")))
+ASYNC_SYNC_EVENTS = max(1, int(os.environ.get("BOOTSTRAP_ASYNC_SYNC_EVENTS", "20")))
+
+# Payload validation against field types learned from API snapshots
+# (scripts/learn_payload_schemas.py); a per-event phase stops once this many of
+# its endpoint's payloads/records were unusable without a single usable one
+VALIDATE_PAYLOADS = os.environ.get("BOOTSTRAP_VALIDATE_PAYLOADS", "1").lower() in ("1", "true", "yes", "y")
+PAYLOAD_SCHEMAS = os.environ.get(
+    "BOOTSTRAP_PAYLOAD_SCHEMAS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "payload_schemas.json"),
+)
+PAYLOAD_REJECT_LIMIT = max(1, int(os.environ.get("BOOTSTRAP_PAYLOAD_REJECT_LIMIT", "20")))
+
+# Run report (phase timings, API and write counters) as JSON under this directory; empty disables it
+REPORT_DIR = os.environ.get("BOOTSTRAP_REPORT_DIR", "")
+# Profile these phases (comma-separated names, or "all") with cProfile or py-spy; output goes
+# next to the run report (data/bootstrap_runs when BOOTSTRAP_REPORT_DIR is unset)
+PROFILE_PHASES = {p.strip() for p in os.environ.get("BOOTSTRAP_PROFILE", "").split(",") if p.strip()}
+PROFILER = os.environ.get("BOOTSTRAP_PROFILER", "cprofile").lower()
 
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL.upper(), logging.INFO),
@@ -95,6 +317,35 @@ logging.basicConfig(
 logger = logging.getLogger("bootstrap")
 
 
+# ---------------
+# JSON codec
+# ---------------
+
+def _orjson_dumps(obj: Any) -> str:
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    except TypeError:
+        # orjson rejects a few things json accepts (e.g. ints beyond 64 bits)
+        return json.dumps(obj)
+
+
+def _select_json_codec(backend: str) -> Tuple[str, Callable[[Any], str], Callable[[Any], Any]]:
+    """Return (name, dumps, loads) for the requested backend."""
+    if backend in ("auto", "orjson") and orjson is not None:
+        return "orjson", _orjson_dumps, orjson.loads
+    if backend == "orjson":
+        logger.warning("BOOTSTRAP_JSON_BACKEND=orjson but orjson is not installed; using json")
+    return "json", json.dumps, json.loads
+
+
+JSON_CODEC, json_dumps, json_loads = _select_json_codec(JSON_BACKEND)
+
+
+def _jsonb(obj: Any) -> psycopg2.extras.Json:
+    """Adapt ``obj`` for a JSONB parameter using the configured codec."""
+    return psycopg2.extras.Json(obj, dumps=json_dumps)
+
+
 # ---------------
 # SQL Schema
 # ---------------
@@ -296,6 +547,41 @@ CREATE TABLE IF NOT EXISTS team_statistics (
   PRIMARY KEY (team_id, season_id, tournament_id)
 );
 
+-- Per-match team statistics (possession, shots, ...), one row per side and stat
+CREATE TABLE IF NOT EXISTS event_team_statistics (
+  event_id BIGINT REFERENCES events(id),
+  team_id INT REFERENCES teams(id),
+  side TEXT CHECK (side IN ('home','away')),
+  group_name TEXT,
+  stat_name TEXT,
+  value DOUBLE PRECISION,
+  extra JSONB,
+  PRIMARY KEY (event_id, side, group_name, stat_name)
+);
+
+-- Per-match player statistics from /event/player/statistics, one row per player
+-- per event (see ingest_player_statistics). player_statistics above is keyed by
+-- season and has no event column, so it cannot hold these rows.
+CREATE TABLE IF NOT EXISTS event_player_statistics (
+  event_id BIGINT REFERENCES events(id),
+  player_id INT REFERENCES players(id),
+  minutes_played INT,
+  goals INT,
+  assists INT,
+  yellow_cards INT,
+  red_cards INT,
+  shots INT,
+  shots_on_target INT,
+  passes INT,
+  passes_accurate INT,
+  tackles INT,
+  interceptions INT,
+  fouls INT,
+  rating DOUBLE PRECISION,
+  stats JSONB,
+  PRIMARY KEY (event_id, player_id)
+);
+
 CREATE TABLE IF NOT EXISTS standings (
   tournament_id INT,
   season_id INT,
@@ -376,6 +662,288 @@ CREATE TABLE IF NOT EXISTS images_tournament (
   fetched_at TIMESTAMP DEFAULT now()
 );
 
+-- Local content-addressed image cache (see BOOTSTRAP_IMAGE_CACHE_DIR)
+CREATE TABLE IF NOT EXISTS image_blobs (
+  content_hash TEXT PRIMARY KEY,
+  source_url TEXT,
+  content_type TEXT,
+  size_bytes INT,
+  path TEXT,
+  thumbnails JSONB,
+  fetched_at TIMESTAMP DEFAULT now()
+);
+
+ALTER TABLE images_player ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE images_team ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE images_tournament ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Last fetch attempt and consecutive misses (404, no url, request error); a row
+-- with url NULL records an entity that has never had an image
+ALTER TABLE images_player ADD COLUMN IF NOT EXISTS attempted_at TIMESTAMP;
+ALTER TABLE images_player ADD COLUMN IF NOT EXISTS misses INT NOT NULL DEFAULT 0;
+ALTER TABLE images_team ADD COLUMN IF NOT EXISTS attempted_at TIMESTAMP;
+ALTER TABLE images_team ADD COLUMN IF NOT EXISTS misses INT NOT NULL DEFAULT 0;
+ALTER TABLE images_tournament ADD COLUMN IF NOT EXISTS attempted_at TIMESTAMP;
+ALTER TABLE images_tournament ADD COLUMN IF NOT EXISTS misses INT NOT NULL DEFAULT 0;
+
+-- Table after each round, computed locally from events/event_scores (see refresh_standings_snapshots).
+-- tournament_id is the unique tournament id, as in standings.
+CREATE TABLE IF NOT EXISTS standings_snapshots (
+  tournament_id INT,
+  season_id INT,
+  round INT,
+  team_id INT,
+  rank INT,
+  played INT,
+  wins INT,
+  draws INT,
+  losses INT,
+  gf INT,
+  ga INT,
+  gd INT,
+  points INT,
+  home_played INT,
+  home_wins INT,
+  home_draws INT,
+  home_losses INT,
+  home_gf INT,
+  home_ga INT,
+  away_played INT,
+  away_wins INT,
+  away_draws INT,
+  away_losses INT,
+  away_gf INT,
+  away_ga INT,
+  form TEXT,
+  computed_at TIMESTAMP DEFAULT now(),
+  PRIMARY KEY (tournament_id, season_id, round, team_id)
+);
+
+-- One row per team per finished event, the ledger head_to_head/team_form are
+-- aggregated from (see refresh_team_aggregates). result is W/D/L for team_id.
+CREATE TABLE IF NOT EXISTS team_results (
+  event_id BIGINT REFERENCES events(id),
+  team_id INT REFERENCES teams(id),
+  opponent_id INT REFERENCES teams(id),
+  side TEXT CHECK (side IN ('home','away')),
+  start_ts BIGINT,
+  tournament_id INT,
+  season_id INT,
+  gf INT,
+  ga INT,
+  result CHAR(1) CHECK (result IN ('W','D','L')),
+  PRIMARY KEY (event_id, team_id)
+);
+CREATE INDEX IF NOT EXISTS idx_team_results_team_ts ON team_results(team_id, start_ts DESC);
+CREATE INDEX IF NOT EXISTS idx_team_results_pair ON team_results(team_id, opponent_id);
+
+-- All-time meetings per team pair, stored once with team_a < team_b
+-- (a_* columns are from team_a's side). recent: last meetings, newest first.
+CREATE TABLE IF NOT EXISTS head_to_head (
+  team_a INT,
+  team_b INT,
+  played INT,
+  a_wins INT,
+  draws INT,
+  b_wins INT,
+  a_goals INT,
+  b_goals INT,
+  last_event_id BIGINT,
+  last_start_ts BIGINT,
+  recent JSONB,
+  updated_at TIMESTAMP DEFAULT now(),
+  PRIMARY KEY (team_a, team_b),
+  CHECK (team_a < team_b)
+);
+
+-- Rolling form over each team's last BOOTSTRAP_TEAM_FORM_WINDOW finished
+-- events (all competitions); form strings run oldest to newest.
+CREATE TABLE IF NOT EXISTS team_form (
+  team_id INT PRIMARY KEY,
+  played INT,
+  wins INT,
+  draws INT,
+  losses INT,
+  gf INT,
+  ga INT,
+  points INT,
+  form TEXT,
+  home_form TEXT,
+  away_form TEXT,
+  last_event_ids BIGINT[],
+  last_start_ts BIGINT,
+  updated_at TIMESTAMP DEFAULT now()
+);
+
+-- Local search index over players, teams and tournaments (see build_search_index)
+CREATE TABLE IF NOT EXISTS search_entities (
+  entity_type TEXT CHECK (entity_type IN ('team','player','unique_tournament','tournament')),
+  entity_id INT,
+  name TEXT NOT NULL,
+  slug TEXT,
+  names TEXT,
+  popularity INT,
+  document TSVECTOR,
+  PRIMARY KEY (entity_type, entity_id)
+);
+
+CREATE TABLE IF NOT EXISTS search_prefixes (
+  prefix TEXT,
+  rank INT,
+  entity_type TEXT,
+  entity_id INT,
+  name TEXT,
+  slug TEXT,
+  popularity INT,
+  PRIMARY KEY (prefix, rank)
+);
+
+CREATE INDEX IF NOT EXISTS idx_search_entities_document ON search_entities USING GIN (document);
+
+-- Refresh tracking: when each entity was last fetched from upstream
+ALTER TABLE players ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+ALTER TABLE players ADD COLUMN IF NOT EXISTS transfers_fetched_at TIMESTAMP;
+ALTER TABLE teams ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+ALTER TABLE player_transfers ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+ALTER TABLE standings ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+ALTER TABLE venues ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+ALTER TABLE referees ADD COLUMN IF NOT EXISTS fetched_at TIMESTAMP;
+CREATE INDEX IF NOT EXISTS idx_players_fetched_at ON players(fetched_at);
+CREATE INDEX IF NOT EXISTS idx_teams_fetched_at ON teams(fetched_at);
+
+-- Change feed: append-only log of content changes for cache invalidation.
+-- Rows are written by triggers only when a tracked value actually changes, and every
+-- row is also announced on the 'ingest_changes' NOTIFY channel once the writing
+-- transaction commits. Consumers remember the last seq they processed and either
+-- LISTEN or poll "WHERE seq > $last ORDER BY seq".
+CREATE TABLE IF NOT EXISTS change_feed (
+  seq BIGSERIAL PRIMARY KEY,
+  entity TEXT NOT NULL,
+  entity_id BIGINT NOT NULL,
+  event_id BIGINT,
+  change TEXT NOT NULL,
+  old_value JSONB,
+  new_value JSONB,
+  changed_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_feed_event ON change_feed(event_id);
+CREATE INDEX IF NOT EXISTS idx_change_feed_changed_at ON change_feed(changed_at);
+
+CREATE OR REPLACE FUNCTION change_feed_emit(
+  p_entity TEXT, p_entity_id BIGINT, p_event_id BIGINT, p_change TEXT, p_old JSONB, p_new JSONB
+) RETURNS VOID AS $$
+DECLARE
+  v_seq BIGINT;
+BEGIN
+  INSERT INTO change_feed (entity, entity_id, event_id, change, old_value, new_value)
+  VALUES (p_entity, p_entity_id, p_event_id, p_change, p_old, p_new)
+  RETURNING seq INTO v_seq;
+  PERFORM pg_notify('ingest_changes', json_build_object(
+    'seq', v_seq, 'entity', p_entity, 'entity_id', p_entity_id, 'event_id', p_event_id, 'change', p_change
+  )::text);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION change_feed_events() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM change_feed_emit('event', NEW.id, NEW.id, 'created', NULL,
+      jsonb_build_object('status_type', NEW.status_type, 'status_code', NEW.status_code, 'start_ts', NEW.start_ts));
+  ELSE
+    IF (OLD.status_type, OLD.status_code, OLD.winner_code) IS DISTINCT FROM (NEW.status_type, NEW.status_code, NEW.winner_code) THEN
+      PERFORM change_feed_emit('event', NEW.id, NEW.id, 'status',
+        jsonb_build_object('status_type', OLD.status_type, 'status_code', OLD.status_code, 'winner_code', OLD.winner_code),
+        jsonb_build_object('status_type', NEW.status_type, 'status_code', NEW.status_code, 'winner_code', NEW.winner_code));
+    END IF;
+    IF OLD.start_ts IS DISTINCT FROM NEW.start_ts THEN
+      PERFORM change_feed_emit('event', NEW.id, NEW.id, 'rescheduled',
+        jsonb_build_object('start_ts', OLD.start_ts), jsonb_build_object('start_ts', NEW.start_ts));
+    END IF;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION change_feed_event_scores() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    IF NEW.home_current IS NULL AND NEW.away_current IS NULL THEN
+      RETURN NULL;
+    END IF;
+    PERFORM change_feed_emit('event_scores', NEW.event_id, NEW.event_id, 'score', NULL,
+      jsonb_build_object('home', NEW.home_current, 'away', NEW.away_current));
+  ELSIF (OLD.home_current, OLD.away_current, OLD.home_pen, OLD.away_pen)
+        IS DISTINCT FROM (NEW.home_current, NEW.away_current, NEW.home_pen, NEW.away_pen) THEN
+    PERFORM change_feed_emit('event_scores', NEW.event_id, NEW.event_id, 'score',
+      jsonb_build_object('home', OLD.home_current, 'away', OLD.away_current, 'home_pen', OLD.home_pen, 'away_pen', OLD.away_pen),
+      jsonb_build_object('home', NEW.home_current, 'away', NEW.away_current, 'home_pen', NEW.home_pen, 'away_pen', NEW.away_pen));
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION change_feed_lineups() RETURNS TRIGGER AS $$
+BEGIN
+  IF NEW.confirmed AND (TG_OP = 'INSERT' OR OLD.confirmed IS DISTINCT FROM TRUE) THEN
+    PERFORM change_feed_emit('lineup', NEW.team_id, NEW.event_id, 'lineup_confirmed', NULL,
+      jsonb_build_object('team_id', NEW.team_id, 'formation', NEW.formation));
+  ELSIF TG_OP = 'UPDATE' AND NEW.confirmed AND OLD.formation IS DISTINCT FROM NEW.formation THEN
+    PERFORM change_feed_emit('lineup', NEW.team_id, NEW.event_id, 'formation',
+      jsonb_build_object('formation', OLD.formation), jsonb_build_object('formation', NEW.formation));
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Triggers are created only when missing: the schema is applied on every run,
+-- and CREATE/DROP TRIGGER locks the table against the site's writes (DROP
+-- against its reads too). The functions above are replaced in place, so a
+-- change to a trigger body needs no trigger DDL; to change the trigger itself
+-- (events, columns), give it a new name.
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_change_feed_events' AND tgrelid = 'events'::regclass) THEN
+    CREATE TRIGGER trg_change_feed_events AFTER INSERT OR UPDATE ON events
+      FOR EACH ROW EXECUTE FUNCTION change_feed_events();
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_change_feed_event_scores' AND tgrelid = 'event_scores'::regclass) THEN
+    CREATE TRIGGER trg_change_feed_event_scores AFTER INSERT OR UPDATE ON event_scores
+      FOR EACH ROW EXECUTE FUNCTION change_feed_event_scores();
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'trg_change_feed_lineups' AND tgrelid = 'lineups'::regclass) THEN
+    CREATE TRIGGER trg_change_feed_lineups AFTER INSERT OR UPDATE ON lineups
+      FOR EACH ROW EXECUTE FUNCTION change_feed_lineups();
+  END IF;
+END
+$$;
+
+-- Ingestion freshness per event and source ('schedule' or 'details'): when the
+-- latest data was fetched upstream and committed here, with the event's status
+-- and kick-off as of that fetch (see EventLag)
+CREATE TABLE IF NOT EXISTS event_freshness (
+  event_id BIGINT,
+  source TEXT,
+  status_type TEXT,
+  start_ts BIGINT,
+  fetched_at TIMESTAMPTZ NOT NULL,
+  committed_at TIMESTAMPTZ NOT NULL,
+  PRIMARY KEY (event_id, source)
+);
+CREATE INDEX IF NOT EXISTS idx_event_freshness_live ON event_freshness (fetched_at) WHERE status_type = 'inprogress';
+
+-- Phase checkpoints per run key (see Checkpoints): item '*' marks a finished phase,
+-- other items are units of work done within it. The schedule phase's items are the
+-- ingested event ids, positioned in upstream order; they are the run's event targets.
+CREATE TABLE IF NOT EXISTS bootstrap_checkpoints (
+  run_key TEXT,
+  phase TEXT,
+  item TEXT,
+  position INT,
+  completed_at TIMESTAMP DEFAULT now(),
+  PRIMARY KEY (run_key, phase, item)
+);
+
 CREATE INDEX IF NOT EXISTS idx_events_start_ts ON events(start_ts);
 CREATE INDEX IF NOT EXISTS idx_event_teams_team ON event_teams(team_id);
 CREATE INDEX IF NOT EXISTS idx_lineup_players_player ON lineup_players(player_id);
@@ -386,16 +954,47 @@ CREATE INDEX IF NOT EXISTS idx_lineup_players_player ON lineup_players(player_id
 # DB Utilities
 # ---------------
 
-def _connect(dbname: str) -> PGConnection:
-    """Connect to Postgres. Uses DATABASE_URL if provided, else individual params.
+# (event_id, source, status_type, start_ts, fetched_at epoch seconds)
+FreshnessEntry = Tuple[int, str, Optional[str], Optional[int], float]
+
+
+class IngestConnection(PGConnection):
+    """psycopg2 connection that remembers its server-side prepared statements."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.prepared: Set[str] = set()
+        self.last_used = time.monotonic()
+        # (event_id, source, status_type, start_ts, fetched_at) written in the
+        # open transaction; stamped with the commit time by commit()
+        self.event_freshness: List[FreshnessEntry] = []
+
+    def commit(self) -> None:
+        pending = self.event_freshness
+        if not pending:
+            super().commit()
+            return
+        if self.get_transaction_status() == pg_ext.TRANSACTION_STATUS_INERROR:
+            pending.clear()
+            super().commit()  # rolls back
+            return
+        rows = _freshness_rows(pending)
+        upsert_many(self, UPSERT_EVENT_FRESHNESS_BATCH, rows)
+        super().commit()
+        pending.clear()
+        EVENT_LAG.record(rows, time.time())
+
+    def rollback(self) -> None:
+        self.event_freshness.clear()
+        super().rollback()
+
+
+def _connect_params(dbname: str) -> Dict[str, Any]:
+    """libpq keyword parameters for ``dbname`` when DATABASE_URL is not set.
 
     If no password is supplied, we avoid passing it so libpq can use
     .pgpass or peer/ident auth as configured.
     """
-    if DATABASE_URL:
-        # If DATABASE_URL is provided, assume it points to the intended DB
-        return psycopg2.connect(DATABASE_URL)
-
     dsn: Dict[str, Any] = {
         "host": PGHOST,
         "port": PGPORT,
@@ -404,7 +1003,134 @@ def _connect(dbname: str) -> PGConnection:
     }
     if PGPASSWORD:
         dsn["password"] = PGPASSWORD
-    return psycopg2.connect(**dsn)
+    return dsn
+
+
+def _connect(dbname: str) -> IngestConnection:
+    """Connect to Postgres. Uses DATABASE_URL if provided, else individual params."""
+    if DATABASE_URL:
+        # If DATABASE_URL is provided, assume it points to the intended DB
+        return psycopg2.connect(DATABASE_URL, connection_factory=IngestConnection)
+    return psycopg2.connect(connection_factory=IngestConnection, **_connect_params(dbname))
+
+
+def _close_quietly(conn: PGConnection) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """Thread-safe pool of connections to one database.
+
+    Checkout blocks once ``maxconn`` connections are in use. Connections idle
+    for longer than POOL_HEALTHCHECK_SECONDS are pinged before reuse, and dead
+    ones (e.g. after a server failover) are replaced with a fresh connection,
+    retrying the connect with backoff. Prepared statements live on the
+    connection, so a replacement simply prepares them again on first use.
+    """
+
+    def __init__(self, dbname: str, minconn: int = POOL_MIN, maxconn: int = POOL_MAX) -> None:
+        self.dbname = dbname
+        self._idle: List[IngestConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, maxconn))
+        self._closed = False
+        for _ in range(min(minconn, maxconn)):
+            self._idle.append(self._open())
+
+    def _open(self) -> IngestConnection:
+        delay = 0.5
+        for attempt in range(1, POOL_RECONNECT_ATTEMPTS + 1):
+            try:
+                conn = _connect(self.dbname)
+                conn.autocommit = False
+                return conn
+            except psycopg2.OperationalError as e:
+                if attempt >= POOL_RECONNECT_ATTEMPTS:
+                    raise
+                logger.warning(
+                    "DB connect attempt %d/%d failed: %s; retrying in %.1fs",
+                    attempt, POOL_RECONNECT_ATTEMPTS, e, delay,
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, 10.0)
+        raise psycopg2.OperationalError("unreachable")
+
+    @staticmethod
+    def _healthy(conn: IngestConnection) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < POOL_HEALTHCHECK_SECONDS:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def getconn(self) -> IngestConnection:
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._open()
+                if self._healthy(conn):
+                    return conn
+                logger.warning("Discarding unhealthy pooled DB connection; reconnecting")
+                _close_quietly(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn: IngestConnection, discard: bool = False) -> None:
+        try:
+            if not discard and not conn.closed:
+                try:
+                    if conn.status != pg_ext.STATUS_READY:
+                        conn.rollback()  # never hand out a connection mid-transaction
+                    conn.last_used = time.monotonic()
+                    with self._lock:
+                        if not self._closed:
+                            self._idle.append(conn)
+                            return
+                except psycopg2.Error:
+                    pass
+            _close_quietly(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[IngestConnection]:
+        """Check out a connection; commit on success, roll back on error."""
+        conn = self.getconn()
+        try:
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            self.putconn(conn, discard=True)
+            raise
+        except BaseException:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+            self.putconn(conn)
+            raise
+        else:
+            self.putconn(conn)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            _close_quietly(conn)
 
 
 def ensure_database_exists() -> None:
@@ -418,13 +1144,7 @@ def ensure_database_exists() -> None:
     # Try to connect to a maintenance DB and create DB_NAME if needed, using autocommit
     def _try_create_db(maintenance_db: str) -> bool:
         try:
-            conn = psycopg2.connect(
-                host=PGHOST,
-                port=PGPORT,
-                user=PGUSER,
-                dbname=maintenance_db,
-                **({"password": PGPASSWORD} if PGPASSWORD else {}),
-            )
+            conn = _connect(maintenance_db)
             try:
                 conn.set_isolation_level(pg_ext.ISOLATION_LEVEL_AUTOCOMMIT)
                 with conn.cursor() as cur:
@@ -452,30 +1172,735 @@ def run_schema(conn: PGConnection) -> None:
     logger.info("Schema applied")
 
 
-def upsert(conn: PGConnection, sql: str, params: Tuple[Any, ...]) -> None:
-    with conn.cursor() as cur:
+def register_statement(sql: str, name: Optional[str] = None) -> str:
+    """Give ``sql`` a server-side statement name; ad-hoc SQL gets one derived from its text."""
+    registered = PREPARED_STATEMENT_NAMES.get(sql)
+    if registered is None:
+        registered = name or "stmt_" + hashlib.md5(sql.encode("utf-8")).hexdigest()[:12]
+        PREPARED_STATEMENT_NAMES[sql] = registered
+    return registered
+
+
+def _prepared_name(conn: PGConnection, cur: Any, sql: str) -> Optional[str]:
+    """Return the prepared statement name for ``sql`` on this connection, preparing it on first use."""
+    prepared = getattr(conn, "prepared", None)
+    if prepared is None or not PREPARED_STATEMENTS:
+        return None
+    name = register_statement(sql)
+    if name not in prepared:
+        parts = sql.split("%s")
+        body = "".join(part + (f"${i}" if i < len(parts) else "") for i, part in enumerate(parts, start=1))
+        cur.execute(f"PREPARE {name} AS {body}")
+        prepared.add(name)
+    return name
+
+
+# Upserts per target table: rows written vs. rows skipped because an
+# ON CONFLICT ... WHERE guard found nothing changed (or DO NOTHING applied)
+WRITE_STATS: Dict[str, Dict[str, int]] = {}
+
+# WRITE_STATS and API_STATS are process totals, updated from phase threads,
+# worker pools and the async engine alike, so increments take _stats_lock.
+# Each increment is also added to the counters of the phase running in the
+# current context (set by PhaseTimer.phase), which keeps the per-phase numbers
+# of concurrently running phases apart. Worker pools inside a phase submit
+# through submit_in_context() so their calls count toward that phase.
+_stats_lock = threading.Lock()
+_phase_counters: "contextvars.ContextVar[Optional[Dict[str, int]]]" = contextvars.ContextVar("phase_counters", default=None)
+
+
+def _count_phase(counters: Dict[str, int]) -> None:
+    """Add ``counters`` to the current phase's tally; call with _stats_lock held."""
+    phase = _phase_counters.get()
+    if phase is not None:
+        for key, n in counters.items():
+            phase[key] = phase.get(key, 0) + n
+
+
+def _record_table_write(table: str, written: int, rows: int) -> None:
+    written, skipped = min(written, rows), max(rows - written, 0)
+    with _stats_lock:
+        stats = WRITE_STATS.setdefault(table, {"written": 0, "skipped": 0})
+        stats["written"] += written
+        stats["skipped"] += skipped
+        _count_phase({"written": written, "skipped": skipped})
+
+
+def submit_in_context(pool: ThreadPoolExecutor, fn: Callable[..., Any], *args: Any) -> Any:
+    """``pool.submit(fn, *args)`` running in a copy of the caller's context (phase counters included)."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _record_write(sql: str, rowcount: int, rows: int = 1) -> None:
+    _record_table_write(sql.split(None, 3)[2] if sql.startswith("INSERT INTO") else "other", rowcount, rows)
+
+
+def execute_statement(conn: PGConnection, cur: Any, sql: str, params: Tuple[Any, ...]) -> None:
+    """Run ``sql`` on ``cur`` through its prepared statement when enabled."""
+    name = _prepared_name(conn, cur, sql)
+    if name is None:
         cur.execute(sql, params)
+    else:
+        # Server reuses the parsed/planned statement; only values travel
+        cur.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+
+
+class StatementBatch:
+    """Stand-in connection that collects upserts instead of running them.
+
+    The write_* helpers only reach the database through upsert(), so they can
+    be pointed at a batch; the async engine then sends the collected
+    statements in pipeline mode. ``on_result(rowcount, row)`` replaces the
+    default WRITE_STATS accounting for statements that return a row.
+    """
+
+    def __init__(self, engine: Any = None) -> None:
+        self.statements: List[Tuple[str, Tuple[Any, ...], int, Optional[Callable[[int, Any], Any]]]] = []
+        self.event_freshness: List[FreshnessEntry] = []
+        # Retryable failures noted while the batch was built (see note_ingest_failure)
+        self.failures: List[str] = []
+        # The AsyncIngest that drives handlers writing here (see run_steps)
+        self.engine = engine
+        self._kept = (0, 0)
+
+    def commit(self) -> None:
+        """Keep what was added so far (the handler finished a unit of work)."""
+        self._kept = (len(self.statements), len(self.event_freshness))
+
+    def rollback(self) -> None:
+        """Drop what was added since the last commit, as a rolled-back transaction would."""
+        del self.statements[self._kept[0]:]
+        del self.event_freshness[self._kept[1]:]
+
+    def add(
+        self,
+        sql: str,
+        params: Tuple[Any, ...],
+        rows: int = 1,
+        on_result: Optional[Callable[[int, Any], Any]] = None,
+    ) -> None:
+        self.statements.append((sql, params, rows, on_result))
+
+    def __len__(self) -> int:
+        return len(self.statements)
+
+
+def upsert(conn: PGConnection, sql: str, params: Tuple[Any, ...], rows: int = 1) -> int:
+    """Execute an upsert; return the number of rows inserted or updated (0 for a no-op).
+
+    On a StatementBatch the statement is only queued and ``rows`` is returned.
+    """
+    if isinstance(conn, StatementBatch):
+        conn.add(sql, params, rows)
+        return rows
+    with conn.cursor() as cur:
+        execute_statement(conn, cur, sql, params)
+        rowcount = max(cur.rowcount, 0)
+    _record_write(sql, rowcount, rows)
+    return rowcount
+
+
+def upsert_many(conn: PGConnection, sql: str, rows: Sequence[Tuple[Any, ...]]) -> int:
+    """Run an ``UPSERT_*_BATCH`` statement for ``rows`` in one EXECUTE.
+
+    Batch statements take one array parameter per column and unnest them,
+    so a page of rows costs a single round trip and a single (prepared)
+    plan. Rows must be unique on the conflict key within a call.
+    """
+    written = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        page = rows[start:start + UPSERT_BATCH_SIZE]
+        written += upsert(conn, sql, tuple(list(col) for col in zip(*page)), rows=len(page))
+    return written
+
+
+def write_stats_summary(stats: Dict[str, Dict[str, int]]) -> str:
+    skipped = {t: v for t, v in stats.items() if v["skipped"]}
+    return ", ".join(
+        f"{t} {v['skipped']}/{v['written'] + v['skipped']}" for t, v in sorted(skipped.items())
+    ) or "none"
 
 
 def commit(conn: PGConnection) -> None:
     conn.commit()
 
 
+# ---------------
+# Memory accounting
+# ---------------
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def over_memory_limit(limit_mb: int = RSS_LIMIT_MB) -> bool:
+    """True when RSS stays above ``limit_mb`` even after dropping cached responses."""
+    if limit_mb <= 0 or rss_mb() <= limit_mb:
+        return False
+    dropped = clear_api_memo()
+    gc.collect()
+    current = rss_mb()
+    logger.warning("RSS %.0f MB over %d MB ceiling; dropped %d cached responses", current, limit_mb, dropped)
+    return current > limit_mb
+
+
+class IdSet:
+    """Insertion-ordered set of integer ids that spills to SQLite past ``threshold`` keys.
+
+    Used for run-wide id collections (ingested events, dedupe) so a long
+    backfill keeps a bounded amount of them in memory.
+    """
+
+    def __init__(self, threshold: int = SPILL_THRESHOLD, spill_dir: Optional[str] = SPILL_DIR) -> None:
+        self.threshold = threshold
+        self.spill_dir = spill_dir
+        self._mem: Dict[int, None] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self._path: Optional[str] = None
+        self._len = 0
+
+    def _spill(self) -> None:
+        fd, self._path = tempfile.mkstemp(prefix="bootstrap-ids-", suffix=".sqlite", dir=self.spill_dir)
+        os.close(fd)
+        self._db = sqlite3.connect(self._path)
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE ids (seq INTEGER PRIMARY KEY, id INTEGER UNIQUE)")
+        self._db.executemany("INSERT INTO ids (id) VALUES (?)", ((k,) for k in self._mem))
+        self._mem.clear()
+        logger.debug("Id set spilled %d keys to %s", self._len, self._path)
+
+    def add(self, key: int) -> bool:
+        """Add ``key``; return True if it was not present."""
+        if self._db is None:
+            if key in self._mem:
+                return False
+            self._mem[key] = None
+            self._len += 1
+            if self._len > self.threshold:
+                self._spill()
+            return True
+        added = self._db.execute("INSERT OR IGNORE INTO ids (id) VALUES (?)", (key,)).rowcount > 0
+        self._len += added
+        return added
+
+    def __contains__(self, key: object) -> bool:
+        if self._db is None:
+            return key in self._mem
+        return self._db.execute("SELECT 1 FROM ids WHERE id = ?", (key,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[int]:
+        if self._db is None:
+            yield from list(self._mem)
+            return
+        last = 0
+        while True:
+            rows = self._db.execute("SELECT seq, id FROM ids WHERE seq > ? ORDER BY seq LIMIT 10000", (last,)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            for _, key in rows:
+                yield key
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._path:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+        self._mem.clear()
+        self._len = 0
+
+
 # ---------------
 # API Utilities
 # ---------------
 
-def api_get(path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+# Per-run memo of API responses keyed by (path, sorted params). Concurrent
+# callers asking for a key that is already being fetched wait for that request
+# instead of issuing their own (single-flight). Client errors (4xx) are
+# memoized too, since retrying them within one run returns the same answer.
+# Each memoized response keeps the time it arrived, so freshness tracking
+# stamps a memo hit with when the data was actually fetched. The async engine
+# (AsyncIngest.api_get) shares the memo and single-flights its own requests.
+# The memo is per process: shard workers each keep their own, so a key needed
+# by events in two shards (a player's transfer history, say) is fetched once
+# per shard. Partitioning by unique tournament keeps that to players who play
+# in several competitions.
+ApiKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_api_lock = threading.Lock()
+_api_cache: Dict[ApiKey, Any] = {}
+_api_errors: Dict[ApiKey, Exception] = {}
+_api_fetched_at: Dict[ApiKey, float] = {}
+_api_inflight: Dict[ApiKey, threading.Event] = {}
+API_STATS: Dict[str, int] = {"fetched": 0, "cache_hits": 0, "coalesced": 0}
+
+
+def count_api(key: str, n: int = 1) -> None:
+    """Count an API_STATS event (``fetched``, ``cache_hits`` or ``coalesced``) for the run and the current phase."""
+    with _stats_lock:
+        API_STATS[key] += n
+        _count_phase({key: n})
+
+
+# Epoch seconds at which the response most recently handed to this context
+# arrived (api_get, api_iter_items, AsyncIngest.api_get); see api_response_time.
+_response_at: "contextvars.ContextVar[Optional[float]]" = contextvars.ContextVar("response_at", default=None)
+
+
+def api_response_time() -> float:
+    """When the last API response seen by this thread or task arrived (now if none has)."""
+    at = _response_at.get()
+    return time.time() if at is None else at
+
+
+def _api_key(path: str, params: Optional[Dict[str, Any]]) -> ApiKey:
+    return path, tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+
+
+def _api_fetch(path: str, params: Optional[Dict[str, Any]], timeout: Optional[float] = None) -> Any:
     url = f"{API_BASE}{path}"
-    r = requests.get(url, params=params, timeout=REQUEST_TIMEOUT)
+    r = requests.get(url, params=params, timeout=timeout or REQUEST_TIMEOUT)
+    _response_at.set(time.time())
     r.raise_for_status()
     try:
-        data = r.json()
+        data = json_loads(r.content)
     except Exception:
         return r.text
     return data
 
 
+def api_iter_items(path: str, prefix: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """Yield the elements of the array at ``prefix`` (e.g. ``"data.events"``) one by one.
+
+    With ijson available the response body is parsed as it streams in, so only
+    one element is materialised at a time. Otherwise the whole body is decoded
+    and walked. Either way the payload bypasses the run memo: these are the
+    large catalog/schedule responses that should not be retained.
+    """
+    if ijson is None or not STREAM_JSON:
+        count_api("fetched")
+        data = _api_fetch(path, params)
+        if not (isinstance(data, dict) and data.get("success")):
+            logger.warning("Unsuccessful response from %s; no items read", path)
+            return
+        node: Any = data
+        for part in prefix.split("."):
+            node = node.get(part) if isinstance(node, dict) else None
+        yield from node or []
+        return
+    url = f"{API_BASE}{path}"
+    count_api("fetched")
+    with requests.get(url, params=params, timeout=REQUEST_TIMEOUT, stream=True) as r:
+        # the body streams in after this; its rows count as fetched when it started
+        _response_at.set(time.time())
+        r.raise_for_status()
+        r.raw.decode_content = True
+        if not (yield from _stream_successful_items(r.raw, prefix)):
+            logger.warning("Unsuccessful response from %s; no items read", path)
+
+
+def _stream_successful_items(body: Any, prefix: str) -> Generator[Any, None, bool]:
+    """Yield the array items at ``prefix`` of a streamed body whose top-level ``success`` is true.
+
+    Items are yielded as they are parsed once ``success`` has been seen; any
+    that precede it are held back until it arrives. Returns whether the body
+    was successful (held items are dropped if it was not).
+    """
+    item_prefix = f"{prefix}.item"
+    success: Optional[bool] = None
+    held: List[Any] = []
+    builder = None
+    # use_float keeps numbers JSON-serialisable (the default yields Decimal)
+    for pfx, event, value in ijson.parse(body, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if pfx == item_prefix and event in ("end_map", "end_array"):
+                item, builder = builder.value, None
+            else:
+                continue
+        elif pfx == item_prefix and event in ("start_map", "start_array"):
+            builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            continue
+        elif pfx == item_prefix:
+            item = value
+        elif pfx == "success":
+            success = value is True
+            if not success:
+                return False
+            yield from held
+            held.clear()
+            continue
+        else:
+            continue
+        if success:
+            yield item
+        else:
+            held.append(item)
+    return bool(success)
+
+
+def clear_api_memo() -> int:
+    """Drop memoized responses (not in-flight markers); return how many were dropped."""
+    with _api_lock:
+        dropped = len(_api_cache) + len(_api_errors)
+        _api_cache.clear()
+        _api_errors.clear()
+        _api_fetched_at.clear()
+    return dropped
+
+
+def api_get(path: str, params: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+    if not DEDUPE_REQUESTS:
+        count_api("fetched")
+        return _api_fetch(path, params, timeout)
+    key = _api_key(path, params)
+    while True:
+        with _api_lock:
+            if key in _api_cache:
+                count_api("cache_hits")
+                _response_at.set(_api_fetched_at.get(key))
+                return _api_cache[key]
+            if key in _api_errors:
+                count_api("cache_hits")
+                raise _api_errors[key]
+            pending = _api_inflight.get(key)
+            if pending is None:
+                pending = _api_inflight[key] = threading.Event()
+                count_api("fetched")
+                break
+            count_api("coalesced")
+        # Another worker is fetching this key; wait and re-check the memo. If
+        # that fetch failed transiently, the loop lets this caller retry it.
+        pending.wait()
+    try:
+        data = _api_fetch(path, params, timeout)
+        with _api_lock:
+            _api_cache[key] = data
+            _api_fetched_at[key] = api_response_time()
+        return data
+    except requests.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        if status is not None and 400 <= status < 500:
+            with _api_lock:
+                _api_errors[key] = e
+        raise
+    finally:
+        with _api_lock:
+            _api_inflight.pop(key, None)
+        pending.set()
+
+
+# Per-item ingest failures. Ingest helpers log and swallow their own errors;
+# those that a retry could fix (network errors, 5xx, 408/429, DB errors) are
+# also noted here, so the per-event loops leave the event unchecked and the
+# next run with the same key retries it. A 4xx is an answer, not a failure.
+_ingest_failures: "contextvars.ContextVar[Optional[List[str]]]" = contextvars.ContextVar("ingest_failures", default=None)
+
+
+def _http_status(error: BaseException) -> Optional[int]:
+    """The HTTP status of a failed API request on either engine (None for other errors)."""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code
+    if aiohttp is not None and isinstance(error, aiohttp.ClientResponseError):
+        return error.status
+    return None
+
+
+def _transient_error(error: BaseException) -> bool:
+    status = _http_status(error)
+    return status is None or status >= 500 or status in (408, 429)
+
+
+def note_ingest_failure(what: str, error: BaseException) -> None:
+    """Record a retryable failure for the item being tracked (no-op outside tracking_ingest_failures)."""
+    failures = _ingest_failures.get()
+    if failures is not None and _transient_error(error):
+        failures.append(f"{what}: {error}")
+
+
+@contextmanager
+def tracking_ingest_failures() -> Iterator[List[str]]:
+    """Collect note_ingest_failure() calls made in this context (and tasks it starts)."""
+    failures: List[str] = []
+    token = _ingest_failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _ingest_failures.reset(token)
+
+
+# ---------------
+# Ingest steps
+# ---------------
+# The per-event ingest handlers are written once, as generators that yield
+# what they wait on and are sent the answer: Fetch (an API request; its
+# payload, or its exception thrown in), Read (a query; its rows) or Fanout
+# (sub-handlers, one per starter say; their results). Writes go to the
+# handler's conn as usual. run_steps drives a handler synchronously on a
+# psycopg2 connection; on a StatementBatch of the async engine it hands the
+# same handler to AsyncIngest.run_steps, which awaits requests on the event
+# loop and runs a Fanout concurrently. The public ingest_* names wrap their
+# handler in run_steps, so one function serves both engines.
+
+class Fetch(NamedTuple):
+    path: str
+    params: Dict[str, Any]
+
+
+class Read(NamedTuple):
+    sql: str
+    params: Tuple[Any, ...]
+
+
+class Fanout(NamedTuple):
+    steps: List["Steps"]
+    # Seconds between sub-handlers on the sync engine (the async engine is
+    # paced by ASYNC_HTTP_CONCURRENCY instead)
+    pause: float = 0.0
+
+
+Steps = Generator[Any, Any, Any]
+
+
+def run_steps(conn: PGConnection, steps: Steps) -> Any:
+    """Drive an ingest handler and return its result (an awaitable on an async StatementBatch)."""
+    engine = getattr(conn, "engine", None)
+    if engine is not None:
+        return engine.run_steps(conn, steps)
+    answer: Any = None
+    error: Optional[Exception] = None
+    while True:
+        try:
+            step = steps.send(answer) if error is None else steps.throw(error)
+        except StopIteration as done:
+            return done.value
+        answer, error = None, None
+        try:
+            if isinstance(step, Fetch):
+                answer = api_get(step.path, params=step.params)
+            elif isinstance(step, Read):
+                with conn.cursor() as cur:
+                    cur.execute(step.sql, step.params)
+                    answer = cur.fetchall()
+            else:
+                answer = []
+                for i, sub in enumerate(step.steps):
+                    if i and step.pause:
+                        time.sleep(step.pause)
+                    answer.append(run_steps(conn, sub))
+        except Exception as e:
+            error = e
+
+
+# ---------------
+# Payload validation
+# ---------------
+# A contract names the array holding an endpoint's records and the fields a
+# writer cannot do without. Field types come from PAYLOAD_SCHEMAS, learned from
+# saved snapshots: a record missing a key field is rejected, and one whose
+# always-present fields are missing or retyped is written but counted as
+# partial. A successful response without the records array is a bad payload.
+# Per-endpoint counters go into the run report, so a renamed upstream key shows
+# up as rejects instead of an empty table.
+
+
+class PayloadContract(NamedTuple):
+    records: str  # dotted path of the record array, e.g. "data.topPlayers"
+    keys: Tuple[str, ...]  # dotted fields every usable record has
+
+
+PAYLOAD_CONTRACTS: Dict[str, PayloadContract] = {
+    "/football/event/statistics": PayloadContract("data.statistics", ("groupName", "statisticsItems")),
+    "/football/tournament/videos": PayloadContract("data.videos", ("id",)),
+    "/football/trending/players": PayloadContract("data.topPlayers", ("player.id", "event.id")),
+}
+
+# Per-event phases fed by a contracted endpoint; they stop early once it is
+# clearly returning unusable payloads
+EVENT_PHASE_ENDPOINTS: Dict[str, str] = {"team_statistics": "/football/event/statistics"}
+
+_JSON_TYPES: Dict[str, Tuple[type, ...]] = {
+    "null": (type(None),),
+    "bool": (bool,),
+    "number": (int, float),
+    "string": (str,),
+    "array": (list,),
+    "object": (dict,),
+}
+_MISSING = object()
+
+# (outcome, field, path parts, allowed exact types or None for any)
+PayloadCheck = Tuple[str, str, Tuple[str, ...], Optional[frozenset]]
+PayloadValidator = Callable[[Any], Optional[Tuple[str, str]]]
+
+_payload_lock = threading.Lock()
+_payload_validators: Dict[str, PayloadValidator] = {}
+_payload_warned: Set[Tuple[str, str]] = set()
+PAYLOAD_STATS: Dict[str, Dict[str, int]] = {}
+
+
+def load_payload_schemas(path: str = PAYLOAD_SCHEMAS) -> Dict[str, Any]:
+    """Learned schemas by endpoint; empty (key fields only) when the file is missing."""
+    try:
+        with open(path, "rb") as f:
+            return _obj(json_loads(f.read())).get("endpoints") or {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load payload schemas from %s: %s", path, e)
+        return {}
+
+
+def compile_payload_validator(contract: PayloadContract, schema: Optional[Dict[str, Any]] = None) -> PayloadValidator:
+    """Build a record check returning None, or (outcome, field) with outcome "rejected" or "partial".
+
+    Paths and type sets are resolved once here, so checking a record is a few
+    dict lookups and exact type tests (``type(True)`` is not a number).
+    """
+    fields = _obj((schema or {}).get("fields"))
+
+    def allowed(path: str) -> Optional[frozenset]:
+        names = fields.get(path)
+        return frozenset(t for name in names for t in _JSON_TYPES.get(name, ())) if names else None
+
+    checks: List[PayloadCheck] = [("rejected", k, tuple(k.split(".")), allowed(k)) for k in contract.keys]
+    checks += [
+        ("partial", p, tuple(p.split(".")), allowed(p))
+        for p in (schema or {}).get("always") or []
+        if p not in contract.keys
+    ]
+    frozen = tuple(checks)
+
+    def validate(record: Any) -> Optional[Tuple[str, str]]:
+        if type(record) is not dict:
+            return "rejected", "$"
+        for outcome, field, parts, types in frozen:
+            value: Any = record
+            for part in parts:
+                value = value.get(part, _MISSING) if type(value) is dict else _MISSING
+            if value is _MISSING or (types is not None and type(value) not in types):
+                return outcome, field
+            if value is None and outcome == "rejected":
+                return outcome, field
+        return None
+
+    return validate
+
+
+def _payload_validator(endpoint: str) -> PayloadValidator:
+    validate = _payload_validators.get(endpoint)
+    if validate is None:
+        with _payload_lock:
+            if not _payload_validators:
+                schemas = load_payload_schemas()
+                for ep, contract in PAYLOAD_CONTRACTS.items():
+                    _payload_validators[ep] = compile_payload_validator(contract, schemas.get(ep))
+            validate = _payload_validators[endpoint]
+    return validate
+
+
+def _count_payload(endpoint: str, **counts: int) -> None:
+    with _payload_lock:
+        stats = PAYLOAD_STATS.setdefault(
+            endpoint,
+            {"payloads": 0, "unsuccessful": 0, "bad_payloads": 0, "records": 0, "partial": 0, "rejected": 0},
+        )
+        for key, n in counts.items():
+            stats[key] += n
+
+
+def _warn_payload_once(endpoint: str, kind: str, msg: str, *args: Any) -> None:
+    with _payload_lock:
+        if (endpoint, kind) in _payload_warned:
+            return
+        _payload_warned.add((endpoint, kind))
+    # Partial records are still written; only lost data is worth a warning
+    logger.log(logging.INFO if kind == "partial" else logging.WARNING, msg, *args)
+
+
+def payload_records(endpoint: str, data: Any) -> List[Dict[str, Any]]:
+    """The records of a response from a contracted endpoint, minus rejected ones.
+
+    An unsuccessful response (``success`` false) yields no records without
+    counting against the endpoint; the first bad payload, reject and partial
+    record of each endpoint are logged with the offending field.
+    """
+    contract = PAYLOAD_CONTRACTS[endpoint]
+    if not (isinstance(data, dict) and data.get("success")):
+        _count_payload(endpoint, payloads=1, unsuccessful=1)
+        return []
+    node: Any = data
+    for part in contract.records.split("."):
+        node = node.get(part) if isinstance(node, dict) else None
+    if not isinstance(node, list):
+        _count_payload(endpoint, payloads=1, bad_payloads=1)
+        _warn_payload_once(
+            endpoint, "payload", "%s: response has no %s array (data keys: %s)",
+            endpoint, contract.records, ", ".join(sorted(_obj(data.get("data")))) or "none",
+        )
+        return []
+    if not VALIDATE_PAYLOADS:
+        _count_payload(endpoint, payloads=1, records=len(node))
+        return node
+    validate = _payload_validator(endpoint)
+    accepted: List[Dict[str, Any]] = []
+    partial = rejected = 0
+    for record in node:
+        problem = validate(record)
+        if problem is None:
+            accepted.append(record)
+            continue
+        outcome, field = problem
+        if outcome == "partial":
+            partial += 1
+            accepted.append(record)
+        else:
+            rejected += 1
+        _warn_payload_once(endpoint, outcome, "%s: %s record (field %s missing or retyped)", endpoint, outcome, field)
+    _count_payload(endpoint, payloads=1, records=len(node), partial=partial, rejected=rejected)
+    return accepted
+
+
+def payload_shape_broken(endpoint: Optional[str]) -> bool:
+    """True once ``endpoint`` gave PAYLOAD_REJECT_LIMIT unusable payloads/records and no usable record."""
+    stats = PAYLOAD_STATS.get(endpoint or "")
+    return (
+        stats is not None
+        and stats["records"] == stats["rejected"]
+        and stats["bad_payloads"] + stats["rejected"] >= PAYLOAD_REJECT_LIMIT
+    )
+
+
+def payload_stats_summary(stats: Dict[str, Dict[str, int]]) -> str:
+    return ", ".join(
+        f"{ep} {s['records'] - s['rejected']}/{s['records']} records ok"
+        f" ({s['partial']} partial, {s['bad_payloads']} bad of {s['payloads']} payloads)"
+        for ep, s in sorted(stats.items())
+    ) or "none"
+
+
 # ---------------
 # Upsert SQLs
 # ---------------
@@ -513,47 +1938,55 @@ UPSERT_SEASON = (
 )
 
 UPSERT_TEAM = (
-    "INSERT INTO teams (id, name, slug, short_name, country_alpha2, national, disabled, type, foundation_ts, colors, translations) "
-    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, slug=EXCLUDED.slug, short_name=EXCLUDED.short_name, country_alpha2=EXCLUDED.country_alpha2, national=EXCLUDED.national, disabled=EXCLUDED.disabled, type=EXCLUDED.type, foundation_ts=EXCLUDED.foundation_ts, colors=EXCLUDED.colors, translations=EXCLUDED.translations"
+    "INSERT INTO teams (id, name, slug, short_name, country_alpha2, national, disabled, type, foundation_ts, colors, translations, fetched_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now()) "
+    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, slug=EXCLUDED.slug, short_name=EXCLUDED.short_name, country_alpha2=EXCLUDED.country_alpha2, national=EXCLUDED.national, disabled=EXCLUDED.disabled, type=EXCLUDED.type, foundation_ts=EXCLUDED.foundation_ts, colors=EXCLUDED.colors, translations=EXCLUDED.translations, fetched_at=EXCLUDED.fetched_at"
 )
 
 UPSERT_PLAYER = (
-    "INSERT INTO players (id, name, slug, short_name, position, jersey_number, height, date_of_birth_ts, country_alpha2, market_value_eur, extra) "
-    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, slug=EXCLUDED.slug, short_name=EXCLUDED.short_name, position=EXCLUDED.position, jersey_number=EXCLUDED.jersey_number, height=EXCLUDED.height, date_of_birth_ts=EXCLUDED.date_of_birth_ts, country_alpha2=EXCLUDED.country_alpha2, market_value_eur=EXCLUDED.market_value_eur, extra=EXCLUDED.extra"
+    "INSERT INTO players (id, name, slug, short_name, position, jersey_number, height, date_of_birth_ts, country_alpha2, market_value_eur, extra, fetched_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now()) "
+    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, slug=COALESCE(EXCLUDED.slug, players.slug), short_name=COALESCE(EXCLUDED.short_name, players.short_name), "
+    "position=COALESCE(EXCLUDED.position, players.position), jersey_number=COALESCE(EXCLUDED.jersey_number, players.jersey_number), height=COALESCE(EXCLUDED.height, players.height), "
+    "date_of_birth_ts=COALESCE(EXCLUDED.date_of_birth_ts, players.date_of_birth_ts), country_alpha2=COALESCE(EXCLUDED.country_alpha2, players.country_alpha2), "
+    "market_value_eur=COALESCE(EXCLUDED.market_value_eur, players.market_value_eur), extra=COALESCE(players.extra, '{}'::jsonb) || EXCLUDED.extra, fetched_at=EXCLUDED.fetched_at"
 )
 
 UPSERT_VENUE = (
-    "INSERT INTO venues (id, name, slug, city, capacity, country_alpha2, lat, lon, translations) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, slug=EXCLUDED.slug, city=EXCLUDED.city, capacity=EXCLUDED.capacity, country_alpha2=EXCLUDED.country_alpha2, lat=EXCLUDED.lat, lon=EXCLUDED.lon, translations=EXCLUDED.translations"
+    "INSERT INTO venues (id, name, slug, city, capacity, country_alpha2, lat, lon, translations, fetched_at) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, now()) "
+    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, slug=EXCLUDED.slug, city=EXCLUDED.city, capacity=EXCLUDED.capacity, country_alpha2=EXCLUDED.country_alpha2, lat=EXCLUDED.lat, lon=EXCLUDED.lon, translations=EXCLUDED.translations, fetched_at=EXCLUDED.fetched_at"
 )
 
 UPSERT_REFEREE = (
-    "INSERT INTO referees (id, name, country_alpha2, stats) VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, country_alpha2=EXCLUDED.country_alpha2, stats=EXCLUDED.stats"
+    "INSERT INTO referees (id, name, country_alpha2, stats, fetched_at) VALUES (%s, %s, %s, %s, now()) "
+    "ON CONFLICT (id) DO UPDATE SET name=EXCLUDED.name, country_alpha2=EXCLUDED.country_alpha2, stats=EXCLUDED.stats, fetched_at=EXCLUDED.fetched_at"
 )
 
+# Live polling rewrites the same events over and over; the WHERE guards make an
+# unchanged row a no-op (no new tuple, no WAL, no change_feed trigger). Schedule
+# rows carry no venue/referee and a different extra than details, so those are
+# kept/merged rather than overwritten.
 UPSERT_EVENT = (
     "INSERT INTO events (id, slug, tournament_id, season_id, round, round_name, status_code, status_desc, status_type, winner_code, start_ts, final_result_only, venue_id, referee_id, has_player_stats, has_player_heatmap, extra) "
     "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (id) DO UPDATE SET slug=EXCLUDED.slug, tournament_id=EXCLUDED.tournament_id, season_id=EXCLUDED.season_id, round=EXCLUDED.round, round_name=EXCLUDED.round_name, status_code=EXCLUDED.status_code, status_desc=EXCLUDED.status_desc, status_type=EXCLUDED.status_type, winner_code=EXCLUDED.winner_code, start_ts=EXCLUDED.start_ts, final_result_only=EXCLUDED.final_result_only, venue_id=EXCLUDED.venue_id, referee_id=EXCLUDED.referee_id, has_player_stats=EXCLUDED.has_player_stats, has_player_heatmap=EXCLUDED.has_player_heatmap, extra=EXCLUDED.extra"
+    "ON CONFLICT (id) DO UPDATE SET slug=EXCLUDED.slug, tournament_id=EXCLUDED.tournament_id, season_id=EXCLUDED.season_id, round=EXCLUDED.round, round_name=EXCLUDED.round_name, status_code=EXCLUDED.status_code, status_desc=EXCLUDED.status_desc, status_type=EXCLUDED.status_type, winner_code=EXCLUDED.winner_code, start_ts=EXCLUDED.start_ts, final_result_only=EXCLUDED.final_result_only, "
+    "venue_id=COALESCE(EXCLUDED.venue_id, events.venue_id), referee_id=COALESCE(EXCLUDED.referee_id, events.referee_id), has_player_stats=EXCLUDED.has_player_stats, has_player_heatmap=EXCLUDED.has_player_heatmap, extra=COALESCE(events.extra, '{}'::jsonb) || COALESCE(EXCLUDED.extra, '{}'::jsonb) "
+    "WHERE (events.slug, events.tournament_id, events.season_id, events.round, events.round_name, events.status_code, events.status_desc, events.status_type, events.winner_code, events.start_ts, events.final_result_only, events.venue_id, events.referee_id, events.has_player_stats, events.has_player_heatmap, events.extra) "
+    "IS DISTINCT FROM (EXCLUDED.slug, EXCLUDED.tournament_id, EXCLUDED.season_id, EXCLUDED.round, EXCLUDED.round_name, EXCLUDED.status_code, EXCLUDED.status_desc, EXCLUDED.status_type, EXCLUDED.winner_code, EXCLUDED.start_ts, EXCLUDED.final_result_only, "
+    "COALESCE(EXCLUDED.venue_id, events.venue_id), COALESCE(EXCLUDED.referee_id, events.referee_id), EXCLUDED.has_player_stats, EXCLUDED.has_player_heatmap, COALESCE(events.extra, '{}'::jsonb) || COALESCE(EXCLUDED.extra, '{}'::jsonb))"
 )
 
 UPSERT_EVENT_TEAM = (
     "INSERT INTO event_teams (event_id, team_id, side) VALUES (%s, %s, %s) "
-    "ON CONFLICT (event_id, side) DO UPDATE SET team_id = EXCLUDED.team_id"
+    "ON CONFLICT (event_id, side) DO UPDATE SET team_id = EXCLUDED.team_id WHERE event_teams.team_id IS DISTINCT FROM EXCLUDED.team_id"
 )
 
 UPSERT_EVENT_SCORES = (
     "INSERT INTO event_scores (event_id, home_current, away_current, home_display, away_display, home_p1, away_p1, home_p2, away_p2, home_normaltime, away_normaltime, home_pen, away_pen) "
     "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (event_id) DO UPDATE SET home_current=EXCLUDED.home_current, away_current=EXCLUDED.away_current, home_display=EXCLUDED.home_display, away_display=EXCLUDED.away_display, home_p1=EXCLUDED.home_p1, away_p1=EXCLUDED.away_p1, home_p2=EXCLUDED.home_p2, away_p2=EXCLUDED.away_p2, home_normaltime=EXCLUDED.home_normaltime, away_normaltime=EXCLUDED.away_normaltime, home_pen=EXCLUDED.home_pen, away_pen=EXCLUDED.away_pen"
-)
-
-UPSERT_LINEUP = (
-    "INSERT INTO lineups (event_id, team_id, formation, confirmed) VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (event_id, team_id) DO UPDATE SET formation=EXCLUDED.formation, confirmed=EXCLUDED.confirmed"
+    "ON CONFLICT (event_id) DO UPDATE SET home_current=EXCLUDED.home_current, away_current=EXCLUDED.away_current, home_display=EXCLUDED.home_display, away_display=EXCLUDED.away_display, home_p1=EXCLUDED.home_p1, away_p1=EXCLUDED.away_p1, home_p2=EXCLUDED.home_p2, away_p2=EXCLUDED.away_p2, home_normaltime=EXCLUDED.home_normaltime, away_normaltime=EXCLUDED.away_normaltime, home_pen=EXCLUDED.home_pen, away_pen=EXCLUDED.away_pen "
+    "WHERE (event_scores.home_current, event_scores.away_current, event_scores.home_display, event_scores.away_display, event_scores.home_p1, event_scores.away_p1, event_scores.home_p2, event_scores.away_p2, event_scores.home_normaltime, event_scores.away_normaltime, event_scores.home_pen, event_scores.away_pen) "
+    "IS DISTINCT FROM (EXCLUDED.home_current, EXCLUDED.away_current, EXCLUDED.home_display, EXCLUDED.away_display, EXCLUDED.home_p1, EXCLUDED.away_p1, EXCLUDED.home_p2, EXCLUDED.away_p2, EXCLUDED.home_normaltime, EXCLUDED.away_normaltime, EXCLUDED.home_pen, EXCLUDED.away_pen)"
 )
 
 UPSERT_LINEUP_PLAYER = (
@@ -567,28 +2000,115 @@ UPSERT_PLAYER_HEATMAP_POINT = (
     "ON CONFLICT (event_id, player_id, seq) DO NOTHING"
 )
 
-UPSERT_PLAYER_TRANSFER = (
-    "INSERT INTO player_transfers (id, player_id, from_team_id, to_team_id, transfer_fee_eur, transfer_fee_desc, transfer_ts) "
-    "VALUES (%s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (id) DO UPDATE SET player_id=EXCLUDED.player_id, from_team_id=EXCLUDED.from_team_id, to_team_id=EXCLUDED.to_team_id, transfer_fee_eur=EXCLUDED.transfer_fee_eur, transfer_fee_desc=EXCLUDED.transfer_fee_desc, transfer_ts=EXCLUDED.transfer_ts"
+# Array-parameter variants for the high-volume tables, used via upsert_many():
+# one EXECUTE writes a whole page of rows
+UPSERT_LINEUP_PLAYER_BATCH = (
+    "INSERT INTO lineup_players (event_id, team_id, player_id, position, shirt_number, role, country_alpha2) "
+    "SELECT * FROM unnest(%s::bigint[], %s::int[], %s::int[], %s::text[], %s::int[], %s::text[], %s::char(2)[]) "
+    "ON CONFLICT (event_id, team_id, player_id, role) DO UPDATE SET position=EXCLUDED.position, shirt_number=EXCLUDED.shirt_number, country_alpha2=EXCLUDED.country_alpha2 "
+    "WHERE (lineup_players.position, lineup_players.shirt_number, lineup_players.country_alpha2) "
+    "IS DISTINCT FROM (EXCLUDED.position, EXCLUDED.shirt_number, EXCLUDED.country_alpha2)"
 )
 
-UPSERT_PLAYER_STATISTICS = (
-    "INSERT INTO player_statistics (player_id, season_id, tournament_id, stats) "
-    "VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (player_id, season_id, tournament_id) DO UPDATE SET stats=EXCLUDED.stats"
+UPSERT_PLAYER_HEATMAP_POINT_BATCH = (
+    "INSERT INTO player_heatmaps (event_id, player_id, seq, x, y) "
+    "SELECT * FROM unnest(%s::bigint[], %s::int[], %s::int[], %s::int[], %s::int[]) "
+    "ON CONFLICT (event_id, player_id, seq) DO NOTHING"
 )
 
-UPSERT_TEAM_STATISTICS = (
-    "INSERT INTO team_statistics (team_id, season_id, tournament_id, stats) "
-    "VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (team_id, season_id, tournament_id) DO UPDATE SET stats=EXCLUDED.stats"
+UPSERT_EVENT_TEAM_STATISTIC_BATCH = (
+    "INSERT INTO event_team_statistics (event_id, team_id, side, group_name, stat_name, value, extra) "
+    "SELECT e, t, s, g, n, v, x::jsonb FROM unnest(%s::bigint[], %s::int[], %s::text[], %s::text[], %s::text[], %s::float8[], %s::text[]) AS u(e, t, s, g, n, v, x) "
+    "ON CONFLICT (event_id, side, group_name, stat_name) DO UPDATE SET team_id=EXCLUDED.team_id, value=EXCLUDED.value, extra=EXCLUDED.extra "
+    "WHERE (event_team_statistics.team_id, event_team_statistics.value, event_team_statistics.extra) "
+    "IS DISTINCT FROM (EXCLUDED.team_id, EXCLUDED.value, EXCLUDED.extra)"
+)
+
+# Whole-event lineup write in one statement. Placeholders, in order (see
+# _event_lineups_params): $1 event_id (teams), $2 the lineups [{side,
+# formation}], $3 the entries [{side, role, player_id, name, position,
+# shirt_number}] (unique per side/player/role), $4 event_id and $5 confirmed
+# (w_lineups), $6 event_id (w_lineup_players).
+# Lineups only carry name/position/shirt: players rows are created from them
+# but an existing row only gets its NULL columns filled, never overwritten,
+# and fetched_at is left alone (this is not a profile refresh).
+UPSERT_EVENT_LINEUPS = """
+WITH teams AS (
+  SELECT side, team_id FROM event_teams WHERE event_id = %s
+),
+lineup_src AS (
+  SELECT t.team_id, l.formation
+  FROM json_to_recordset(%s::json) AS l(side text, formation text)
+  JOIN teams t USING (side)
+),
+entry_src AS (
+  SELECT t.team_id, e.role, e.player_id, e.name, e.position, e.shirt_number
+  FROM json_to_recordset(%s::json) AS e(side text, role text, player_id int, name text, position text, shirt_number int)
+  JOIN teams t USING (side)
+  WHERE e.player_id IS NOT NULL
+),
+player_src AS (
+  SELECT DISTINCT ON (player_id) player_id, name, position, shirt_number
+  FROM entry_src WHERE name IS NOT NULL
+  ORDER BY player_id
+),
+w_lineups AS (
+  INSERT INTO lineups (event_id, team_id, formation, confirmed)
+  SELECT %s, team_id, formation, %s FROM lineup_src
+  ON CONFLICT (event_id, team_id) DO UPDATE SET formation=EXCLUDED.formation, confirmed=EXCLUDED.confirmed
+  WHERE (lineups.formation, lineups.confirmed) IS DISTINCT FROM (EXCLUDED.formation, EXCLUDED.confirmed)
+  RETURNING 1
+),
+w_players AS (
+  INSERT INTO players (id, name, position, jersey_number, extra)
+  SELECT player_id, name, position, shirt_number::text, '{"source": "lineup"}'::jsonb FROM player_src
+  ON CONFLICT (id) DO UPDATE SET
+    position=COALESCE(players.position, EXCLUDED.position),
+    jersey_number=COALESCE(players.jersey_number, EXCLUDED.jersey_number),
+    extra=COALESCE(players.extra, EXCLUDED.extra)
+  WHERE players.position IS NULL AND EXCLUDED.position IS NOT NULL
+     OR players.jersey_number IS NULL AND EXCLUDED.jersey_number IS NOT NULL
+     OR players.extra IS NULL
+  RETURNING 1
+),
+w_lineup_players AS (
+  INSERT INTO lineup_players (event_id, team_id, player_id, position, shirt_number, role, country_alpha2)
+  SELECT %s, team_id, player_id, position, shirt_number, role, NULL FROM entry_src e
+  WHERE e.name IS NOT NULL OR EXISTS (SELECT 1 FROM players p WHERE p.id = e.player_id)
+  ON CONFLICT (event_id, team_id, player_id, role) DO UPDATE SET position=EXCLUDED.position, shirt_number=EXCLUDED.shirt_number
+  WHERE (lineup_players.position, lineup_players.shirt_number) IS DISTINCT FROM (EXCLUDED.position, EXCLUDED.shirt_number)
+  RETURNING 1
+)
+SELECT
+  (SELECT coalesce(array_agg(side), '{}') FROM teams),
+  (SELECT count(*) FROM lineup_src), (SELECT count(*) FROM w_lineups),
+  (SELECT count(*) FROM player_src), (SELECT count(*) FROM w_players),
+  (SELECT count(*) FROM entry_src), (SELECT count(*) FROM w_lineup_players)
+"""
+
+UPSERT_PLAYER_TRANSFER = (
+    "INSERT INTO player_transfers (id, player_id, from_team_id, to_team_id, transfer_fee_eur, transfer_fee_desc, transfer_ts, fetched_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, now()) "
+    "ON CONFLICT (id) DO UPDATE SET player_id=EXCLUDED.player_id, from_team_id=EXCLUDED.from_team_id, to_team_id=EXCLUDED.to_team_id, transfer_fee_eur=EXCLUDED.transfer_fee_eur, transfer_fee_desc=EXCLUDED.transfer_fee_desc, transfer_ts=EXCLUDED.transfer_ts, fetched_at=EXCLUDED.fetched_at"
+)
+
+MARK_PLAYER_TRANSFERS_FETCHED = "UPDATE players SET transfers_fetched_at = now() WHERE id = %s"
+
+UPSERT_EVENT_PLAYER_STATISTICS = (
+    "INSERT INTO event_player_statistics (event_id, player_id, minutes_played, goals, assists, yellow_cards, red_cards, shots, "
+    "shots_on_target, passes, passes_accurate, tackles, interceptions, fouls, rating, stats) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
+    "ON CONFLICT (event_id, player_id) DO UPDATE SET minutes_played=EXCLUDED.minutes_played, goals=EXCLUDED.goals, assists=EXCLUDED.assists, "
+    "yellow_cards=EXCLUDED.yellow_cards, red_cards=EXCLUDED.red_cards, shots=EXCLUDED.shots, shots_on_target=EXCLUDED.shots_on_target, "
+    "passes=EXCLUDED.passes, passes_accurate=EXCLUDED.passes_accurate, tackles=EXCLUDED.tackles, interceptions=EXCLUDED.interceptions, "
+    "fouls=EXCLUDED.fouls, rating=EXCLUDED.rating, stats=EXCLUDED.stats "
+    "WHERE event_player_statistics.stats IS DISTINCT FROM EXCLUDED.stats"
 )
 
 UPSERT_STANDINGS = (
-    "INSERT INTO standings (tournament_id, season_id, group_name, team_id, rank, played, wins, draws, losses, gf, ga, gd, points, extra) "
-    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s) "
-    "ON CONFLICT (tournament_id, season_id, group_name, team_id) DO UPDATE SET rank=EXCLUDED.rank, played=EXCLUDED.played, wins=EXCLUDED.wins, draws=EXCLUDED.draws, losses=EXCLUDED.losses, gf=EXCLUDED.gf, ga=EXCLUDED.ga, gd=EXCLUDED.gd, points=EXCLUDED.points, extra=EXCLUDED.extra"
+    "INSERT INTO standings (tournament_id, season_id, group_name, team_id, rank, played, wins, draws, losses, gf, ga, gd, points, extra, fetched_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, now()) "
+    "ON CONFLICT (tournament_id, season_id, group_name, team_id) DO UPDATE SET rank=EXCLUDED.rank, played=EXCLUDED.played, wins=EXCLUDED.wins, draws=EXCLUDED.draws, losses=EXCLUDED.losses, gf=EXCLUDED.gf, ga=EXCLUDED.ga, gd=EXCLUDED.gd, points=EXCLUDED.points, extra=EXCLUDED.extra, fetched_at=EXCLUDED.fetched_at"
 )
 
 UPSERT_TOURNAMENT_FEATURED_EVENT = (
@@ -612,7 +2132,8 @@ UPSERT_TRENDING_PLAYER = (
 UPSERT_SUGGESTION = (
     "INSERT INTO suggestions (entity_type, entity_id, score, payload) "
     "VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (entity_type, entity_id) DO UPDATE SET score=EXCLUDED.score, payload=EXCLUDED.payload"
+    "ON CONFLICT (entity_type, entity_id) DO UPDATE SET score=EXCLUDED.score, payload=EXCLUDED.payload "
+    "WHERE (suggestions.score, suggestions.payload) IS DISTINCT FROM (EXCLUDED.score, EXCLUDED.payload)"
 )
 
 UPSERT_LIVE_CATEGORY_COUNT = (
@@ -627,24 +2148,282 @@ UPSERT_EVENT_COUNT_BY_SPORT = (
     "ON CONFLICT (sport_slug) DO UPDATE SET live=EXCLUDED.live, total=EXCLUDED.total"
 )
 
+# committed_at is the statement time right before COMMIT (the flush is the
+# transaction's last statement); an older fetch never overwrites a newer one
+UPSERT_EVENT_FRESHNESS_BATCH = (
+    "INSERT INTO event_freshness (event_id, source, status_type, start_ts, fetched_at, committed_at) "
+    "SELECT e, s, st, t, to_timestamp(f), clock_timestamp() "
+    "FROM unnest(%s::bigint[], %s::text[], %s::text[], %s::bigint[], %s::float8[]) AS u(e, s, st, t, f) "
+    "ON CONFLICT (event_id, source) DO UPDATE SET status_type=EXCLUDED.status_type, start_ts=EXCLUDED.start_ts, "
+    "fetched_at=EXCLUDED.fetched_at, committed_at=EXCLUDED.committed_at "
+    "WHERE event_freshness.fetched_at <= EXCLUDED.fetched_at"
+)
+
+# Local live counters (LiveCounters.persist): the whole aggregate in one
+# statement per table; keys missing from it are zeroed rather than deleted
+UPSERT_LIVE_CATEGORY_COUNT_BATCH = (
+    "INSERT INTO live_category_counts (category_id, live_count) "
+    "SELECT * FROM unnest(%s::int[], %s::int[]) "
+    "ON CONFLICT (category_id) DO UPDATE SET live_count=EXCLUDED.live_count "
+    "WHERE live_category_counts.live_count IS DISTINCT FROM EXCLUDED.live_count"
+)
+
+ZERO_LIVE_CATEGORY_COUNTS = (
+    "UPDATE live_category_counts SET live_count=0 WHERE live_count <> 0 AND category_id <> ALL(%s::int[])"
+)
+
+UPSERT_EVENT_COUNT_BY_SPORT_BATCH = (
+    "INSERT INTO event_count_by_sport (sport_slug, live, total) "
+    "SELECT * FROM unnest(%s::text[], %s::int[], %s::int[]) "
+    "ON CONFLICT (sport_slug) DO UPDATE SET live=EXCLUDED.live, total=EXCLUDED.total "
+    "WHERE (event_count_by_sport.live, event_count_by_sport.total) IS DISTINCT FROM (EXCLUDED.live, EXCLUDED.total)"
+)
+
+ZERO_EVENT_COUNT_BY_SPORT = (
+    "UPDATE event_count_by_sport SET live=0, total=0 "
+    "WHERE (live <> 0 OR total <> 0) AND sport_slug <> ALL(%s::text[])"
+)
+
 UPSERT_PLAYER_IMAGE = (
-    "INSERT INTO images_player (player_id, url, kind, fetched_at) "
-    "VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (player_id) DO UPDATE SET url=EXCLUDED.url, kind=EXCLUDED.kind, fetched_at=EXCLUDED.fetched_at"
+    "INSERT INTO images_player (player_id, url, kind, content_hash, fetched_at, attempted_at, misses) "
+    "VALUES (%s, %s, %s, %s, now(), now(), 0) "
+    "ON CONFLICT (player_id) DO UPDATE SET url=EXCLUDED.url, kind=EXCLUDED.kind, content_hash=EXCLUDED.content_hash, "
+    "fetched_at=EXCLUDED.fetched_at, attempted_at=EXCLUDED.attempted_at, misses=0"
 )
 
 UPSERT_TEAM_IMAGE = (
-    "INSERT INTO images_team (team_id, size, url, fetched_at) "
-    "VALUES (%s, %s, %s, %s) "
-    "ON CONFLICT (team_id, size) DO UPDATE SET url=EXCLUDED.url, fetched_at=EXCLUDED.fetched_at"
+    "INSERT INTO images_team (team_id, size, url, content_hash, fetched_at, attempted_at, misses) "
+    "VALUES (%s, %s, %s, %s, now(), now(), 0) "
+    "ON CONFLICT (team_id, size) DO UPDATE SET url=EXCLUDED.url, content_hash=EXCLUDED.content_hash, "
+    "fetched_at=EXCLUDED.fetched_at, attempted_at=EXCLUDED.attempted_at, misses=0"
 )
 
 UPSERT_TOURNAMENT_IMAGE = (
-    "INSERT INTO images_tournament (tournament_id, url, fetched_at) "
-    "VALUES (%s, %s, %s) "
-    "ON CONFLICT (tournament_id) DO UPDATE SET url=EXCLUDED.url, fetched_at=EXCLUDED.fetched_at"
+    "INSERT INTO images_tournament (tournament_id, url, content_hash, fetched_at, attempted_at, misses) "
+    "VALUES (%s, %s, %s, now(), now(), 0) "
+    "ON CONFLICT (tournament_id) DO UPDATE SET url=EXCLUDED.url, content_hash=EXCLUDED.content_hash, "
+    "fetched_at=EXCLUDED.fetched_at, attempted_at=EXCLUDED.attempted_at, misses=0"
+)
+
+# Failed attempts keep any earlier url/fetched_at and only advance the backoff
+UPSERT_PLAYER_IMAGE_MISS = (
+    "INSERT INTO images_player (player_id, url, fetched_at, attempted_at, misses) VALUES (%s, NULL, NULL, now(), 1) "
+    "ON CONFLICT (player_id) DO UPDATE SET attempted_at=EXCLUDED.attempted_at, misses=images_player.misses + 1"
+)
+
+UPSERT_TEAM_IMAGE_MISS = (
+    "INSERT INTO images_team (team_id, size, url, fetched_at, attempted_at, misses) VALUES (%s, 'full', NULL, NULL, now(), 1) "
+    "ON CONFLICT (team_id, size) DO UPDATE SET attempted_at=EXCLUDED.attempted_at, misses=images_team.misses + 1"
+)
+
+UPSERT_TOURNAMENT_IMAGE_MISS = (
+    "INSERT INTO images_tournament (tournament_id, url, fetched_at, attempted_at, misses) VALUES (%s, NULL, NULL, now(), 1) "
+    "ON CONFLICT (tournament_id) DO UPDATE SET attempted_at=EXCLUDED.attempted_at, misses=images_tournament.misses + 1"
+)
+
+UPSERT_IMAGE_BLOB = (
+    "INSERT INTO image_blobs (content_hash, source_url, content_type, size_bytes, path, thumbnails, fetched_at) "
+    "VALUES (%s, %s, %s, %s, %s, %s, now()) "
+    "ON CONFLICT (content_hash) DO UPDATE SET source_url=EXCLUDED.source_url, thumbnails=EXCLUDED.thumbnails, fetched_at=EXCLUDED.fetched_at"
 )
 
+# Statement registry: every UPSERT_* above is prepared once per connection
+# under its own name; any other SQL handed to upsert() is registered on
+# first use under a name derived from its text (see register_statement)
+PREPARED_STATEMENT_NAMES: Dict[str, str] = {
+    sql: name.lower() for name, sql in list(globals().items()) if name.startswith("UPSERT_") and isinstance(sql, str)
+}
+
+
+# ---------------
+# Typed records
+# ---------------
+# Payloads are parsed once into tuple-backed records (no per-instance
+# __dict__, attribute access by index) and every writer takes the record,
+# so the same event from the schedule and from details goes through one
+# parser and one writer. Nested catalog objects (tournament, season,
+# category, country) stay dicts: they are written by the *_from_obj helpers.
+
+
+def _obj(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {}
+
+
+class Score(NamedTuple):
+    current: Optional[int]
+    display: Optional[int]
+    period1: Optional[int]
+    period2: Optional[int]
+    normaltime: Optional[int]
+    penalties: Optional[int]
+
+    @classmethod
+    def from_api(cls, obj: Any) -> "Score":
+        o = _obj(obj)
+        return cls(o.get("current"), o.get("display"), o.get("period1"), o.get("period2"), o.get("normaltime"), o.get("penalties"))
+
+
+class Team(NamedTuple):
+    id: Optional[int]
+    name: Optional[str]
+    slug: Optional[str]
+    short_name: Optional[str]
+    country: Dict[str, Any]
+    national: Optional[bool]
+    disabled: Optional[bool]
+    type: Optional[int]
+    colors: Dict[str, Any]
+    translations: Dict[str, Any]
+
+    @classmethod
+    def from_api(cls, obj: Any) -> "Team":
+        o = _obj(obj)
+        return cls(
+            o.get("id"),
+            o.get("name"),
+            o.get("slug"),
+            o.get("shortName"),
+            _obj(o.get("country")),
+            o.get("national"),
+            o.get("disabled"),
+            o.get("type"),
+            o.get("teamColors") or {},
+            o.get("fieldTranslations") or {},
+        )
+
+
+class Event(NamedTuple):
+    id: int
+    slug: Optional[str]
+    tournament_id: Optional[int]
+    season_id: Optional[int]
+    round: Optional[int]
+    round_name: Optional[str]
+    status_code: Optional[int]
+    status_desc: Optional[str]
+    status_type: Optional[str]
+    winner_code: Optional[int]
+    start_ts: Optional[int]
+    final_result_only: Optional[bool]
+    has_player_stats: Optional[bool]
+    has_player_heatmap: Optional[bool]
+    home: Team
+    away: Team
+    home_score: Score
+    away_score: Score
+    tournament_priority: Optional[int]
+    detail_id: Optional[int]
+    category_id: Optional[int] = None
+    sport_slug: Optional[str] = None
+
+    @classmethod
+    def from_api(cls, obj: Any) -> "Event":
+        o = _obj(obj)
+        tournament = _obj(o.get("tournament"))
+        category = _obj(tournament.get("category"))
+        status = _obj(o.get("status"))
+        round_info = _obj(o.get("roundInfo"))
+        return cls(
+            o.get("id"),
+            o.get("slug"),
+            tournament.get("id"),
+            _obj(o.get("season")).get("id"),
+            round_info.get("round"),
+            round_info.get("name"),
+            status.get("code"),
+            status.get("description"),
+            status.get("type"),
+            o.get("winnerCode"),
+            o.get("startTimestamp"),
+            o.get("finalResultOnly"),
+            o.get("hasEventPlayerStatistics"),
+            o.get("hasEventPlayerHeatMap"),
+            Team.from_api(o.get("homeTeam")),
+            Team.from_api(o.get("awayTeam")),
+            Score.from_api(o.get("homeScore")),
+            Score.from_api(o.get("awayScore")),
+            tournament.get("priority"),
+            o.get("detailId"),
+            category.get("id"),
+            _obj(category.get("sport")).get("slug"),
+        )
+
+
+class Player(NamedTuple):
+    id: Optional[int]
+    name: Optional[str]
+    slug: Optional[str]
+    short_name: Optional[str]
+    position: Optional[str]
+    jersey_number: Optional[str]
+    height: Optional[int]
+    date_of_birth_ts: Optional[int]
+    country: Dict[str, Any]
+    market_value_eur: Optional[int]
+
+    @classmethod
+    def from_api(cls, obj: Any) -> "Player":
+        o = _obj(obj)
+        return cls(
+            o.get("id"),
+            o.get("name"),
+            o.get("slug"),
+            o.get("shortName"),
+            o.get("position"),
+            o.get("jerseyNumber"),
+            o.get("height"),
+            o.get("dateOfBirthTimestamp"),
+            _obj(o.get("country")),
+            _obj(o.get("proposedMarketValueRaw") or o.get("marketValue")).get("value"),
+        )
+
+
+class LineupEntry(NamedTuple):
+    player_id: Optional[int]
+    name: Optional[str]
+    position: Optional[str]
+    shirt_number: Optional[int]
+    role: str  # 'starter' | 'sub'
+
+    @classmethod
+    def from_api(cls, obj: Any, role: str) -> "LineupEntry":
+        o = _obj(obj)
+        return cls(o.get("player_id"), o.get("name"), o.get("position"), o.get("shirt_number"), role)
+
+
+class Lineup(NamedTuple):
+    side: str  # 'home' | 'away'
+    formation: Optional[str]
+    entries: List[LineupEntry]
+
+
+def parse_lineups(payload: Any) -> Tuple[bool, List[Lineup]]:
+    """(confirmed, [home lineup, away lineup]) from a lineups ``data`` block."""
+    o = _obj(payload)
+    lineups: List[Lineup] = []
+    for side_key, side in (("home_team", "home"), ("away_team", "away")):
+        block = _obj(o.get(side_key))
+        entries = [LineupEntry.from_api(p, "starter") for p in block.get("starting_eleven") or []]
+        entries += [LineupEntry.from_api(p, "sub") for p in block.get("substitutes") or []]
+        lineups.append(Lineup(side, block.get("formation"), entries))
+    return bool(o.get("confirmed")), lineups
+
+
+class HeatmapPoint(NamedTuple):
+    x: Optional[int]
+    y: Optional[int]
+
+
+def _coord(value: Any) -> Optional[int]:
+    """Heatmap coordinate rounded to the INT the player_heatmaps columns store."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        return None
+    return int(round(value))
+
+
+def parse_heatmap(points: Any) -> List[HeatmapPoint]:
+    return [HeatmapPoint(_coord(p.get("x")), _coord(p.get("y"))) for p in points or [] if isinstance(p, dict)]
+
 
 # ---------------
 # Populate helpers
@@ -694,7 +2473,7 @@ def ingest_categories(conn: PGConnection) -> None:
                     sport_id,
                     c.get("flag"),
                     c.get("alpha2"),
-                    psycopg2.extras.Json(c.get("fieldTranslations") or {}),
+                    _jsonb(c.get("fieldTranslations") or {}),
                 ),
             )
         commit(conn)
@@ -703,25 +2482,118 @@ def ingest_categories(conn: PGConnection) -> None:
         logger.exception("Failed ingesting categories: %s", e)
 
 
-def upsert_team_from_obj(conn: PGConnection, t: Dict[str, Any]) -> None:
-    country_alpha2 = None
-    if t.get("country"):
-        country_alpha2 = upsert_country_from_obj(conn, t["country"]) or None
+def write_team(conn: PGConnection, team: Team) -> None:
+    country_alpha2 = upsert_country_from_obj(conn, team.country) if team.country else None
     upsert(
         conn,
         UPSERT_TEAM,
         (
-            t.get("id"),
-            t.get("name"),
-            t.get("slug"),
-            t.get("shortName"),
+            team.id,
+            team.name,
+            team.slug,
+            team.short_name,
             country_alpha2,
-            t.get("national"),
-            t.get("disabled"),
-            t.get("type"),
+            team.national,
+            team.disabled,
+            team.type,
             None,  # foundation_ts not consistently present
-            psycopg2.extras.Json(t.get("teamColors") or {}),
-            psycopg2.extras.Json(t.get("fieldTranslations") or {}),
+            _jsonb(team.colors),
+            _jsonb(team.translations),
+        ),
+    )
+
+
+def upsert_team_from_obj(conn: PGConnection, t: Dict[str, Any]) -> None:
+    write_team(conn, Team.from_api(t))
+
+
+def write_player(conn: PGConnection, player: Player, extra: Dict[str, Any]) -> None:
+    """Upsert a full player profile (lineup players go through write_event_lineups).
+
+    Fields missing from ``player`` keep their stored value; ``extra`` is merged.
+    """
+    upsert_country_from_obj(conn, player.country)
+    upsert(
+        conn,
+        UPSERT_PLAYER,
+        (
+            player.id,
+            player.name,
+            player.slug,
+            player.short_name,
+            player.position,
+            player.jersey_number,
+            player.height,
+            player.date_of_birth_ts,
+            player.country.get("alpha2"),
+            player.market_value_eur,
+            _jsonb(extra),
+        ),
+    )
+
+
+def write_event(
+    conn: PGConnection,
+    ev: Event,
+    extra: Dict[str, Any],
+    venue_id: Optional[int] = None,
+    referee_id: Optional[int] = None,
+    source: str = "schedule",
+    fetched_at: Optional[float] = None,
+) -> None:
+    """Upsert the event row (venue/referee/extra are kept or merged by UPSERT_EVENT).
+
+    ``source`` names the payload and ``fetched_at`` (epoch seconds) is when
+    its response arrived, for freshness tracking; it defaults to now.
+    """
+    upsert(
+        conn,
+        UPSERT_EVENT,
+        (
+            ev.id,
+            ev.slug,
+            ev.tournament_id,
+            ev.season_id,
+            ev.round,
+            ev.round_name,
+            ev.status_code,
+            ev.status_desc,
+            ev.status_type,
+            ev.winner_code,
+            ev.start_ts,
+            ev.final_result_only,
+            venue_id,
+            referee_id,
+            ev.has_player_stats,
+            ev.has_player_heatmap,
+            _jsonb(extra),
+        ),
+    )
+    LIVE_COUNTERS.track_event(ev)
+    pending = getattr(conn, "event_freshness", None)
+    if pending is not None and ev.id is not None:
+        pending.append((int(ev.id), source, ev.status_type, ev.start_ts, fetched_at or time.time()))
+
+
+def write_event_scores(conn: PGConnection, ev: Event) -> None:
+    hs, as_ = ev.home_score, ev.away_score
+    upsert(
+        conn,
+        UPSERT_EVENT_SCORES,
+        (
+            ev.id,
+            hs.current,
+            as_.current,
+            hs.display,
+            as_.display,
+            hs.period1,
+            as_.period1,
+            hs.period2,
+            as_.period2,
+            hs.normaltime,
+            as_.normaltime,
+            hs.penalties,
+            as_.penalties,
         ),
     )
 
@@ -737,9 +2609,9 @@ def upsert_unique_tournament_from_obj(conn: PGConnection, ut: Dict[str, Any]) ->
             ut.get("slug"),
             cat.get("id"),
             ut.get("userCount"),
-            psycopg2.extras.Json({"hasPerformanceGraphFeature": ut.get("hasPerformanceGraphFeature"), "hasEventPlayerStatistics": ut.get("hasEventPlayerStatistics"), "displayInverseHomeAwayTeams": ut.get("displayInverseHomeAwayTeams")}),
-            psycopg2.extras.Json({"primary": None, "secondary": None}),
-            psycopg2.extras.Json(ut.get("fieldTranslations") or {}),
+            _jsonb({"hasPerformanceGraphFeature": ut.get("hasPerformanceGraphFeature"), "hasEventPlayerStatistics": ut.get("hasEventPlayerStatistics"), "displayInverseHomeAwayTeams": ut.get("displayInverseHomeAwayTeams")}),
+            _jsonb({"primary": None, "secondary": None}),
+            _jsonb(ut.get("fieldTranslations") or {}),
         ),
     )
 
@@ -757,7 +2629,7 @@ def upsert_tournament_from_obj(conn: PGConnection, t: Dict[str, Any]) -> None:
             ut.get("id"),
             cat.get("id"),
             t.get("priority"),
-            psycopg2.extras.Json(t.get("fieldTranslations") or {}),
+            _jsonb(t.get("fieldTranslations") or {}),
         ),
     )
 
@@ -776,381 +2648,402 @@ def upsert_season_from_obj(conn: PGConnection, season: Dict[str, Any], tournamen
     )
 
 
+def _ingest_catalog_row(conn: PGConnection, row: Dict[str, Any]) -> None:
+    entity = row.get("entity") or {}
+    cat = entity.get("category") or {}
+    # ensure category exists
+    if cat.get("id"):
+        upsert(
+            conn,
+            UPSERT_CATEGORY,
+            (
+                cat.get("id"),
+                cat.get("name"),
+                cat.get("slug"),
+                (cat.get("sport") or {}).get("id") or 1,
+                None,
+                None,
+                _jsonb(cat.get("fieldTranslations") or {}),
+            ),
+        )
+    # store unique tournament row
+    upsert(
+        conn,
+        UPSERT_UNIQUE_TOURNAMENT,
+        (
+            entity.get("id"),
+            entity.get("name"),
+            entity.get("slug"),
+            cat.get("id"),
+            entity.get("userCount"),
+            _jsonb({}),
+            _jsonb({"primary": entity.get("primaryColorHex"), "secondary": entity.get("secondaryColorHex")}),
+            _jsonb(entity.get("fieldTranslations") or {}),
+        ),
+    )
+
+
 def ingest_tournaments_catalog(conn: PGConnection) -> None:
     try:
-        data = api_get("/football/tournaments")
-        results = data.get("success") and data.get("data", {}).get("results")
-        if not results:
+        count = 0
+        for row in api_iter_items("/football/tournaments", "data.results"):
+            _ingest_catalog_row(conn, row)
+            count += 1
+        if not count:
             logger.warning("No tournaments returned")
             return
-        for row in results:
-            entity = row.get("entity") or {}
-            cat = entity.get("category") or {}
-            # ensure category exists
-            if cat.get("id"):
-                upsert(
-                    conn,
-                    UPSERT_CATEGORY,
-                    (
-                        cat.get("id"),
-                        cat.get("name"),
-                        cat.get("slug"),
-                        (cat.get("sport") or {}).get("id") or 1,
-                        None,
-                        None,
-                        psycopg2.extras.Json(cat.get("fieldTranslations") or {}),
-                    ),
-                )
-            # store unique tournament row
-            upsert(
-                conn,
-                UPSERT_UNIQUE_TOURNAMENT,
-                (
-                    entity.get("id"),
-                    entity.get("name"),
-                    entity.get("slug"),
-                    cat.get("id"),
-                    entity.get("userCount"),
-                    psycopg2.extras.Json({}),
-                    psycopg2.extras.Json({"primary": entity.get("primaryColorHex"), "secondary": entity.get("secondaryColorHex")}),
-                    psycopg2.extras.Json(entity.get("fieldTranslations") or {}),
-                ),
-            )
         commit(conn)
-        logger.info("Ingested %d unique tournaments", len(results))
+        logger.info("Ingested %d unique tournaments", count)
     except Exception as e:
         logger.exception("Failed ingesting tournaments catalog: %s", e)
 
 
-def _extract_score_val(s: Dict[str, Any], key: str) -> Optional[int]:
-    if not isinstance(s, dict):
-        return None
-    return s.get(key)
-
-
-def ingest_scheduled_events_for_today(conn: PGConnection) -> List[int]:
+def _ingest_scheduled_event(conn: PGConnection, e: Dict[str, Any], fetched_at: Optional[float] = None) -> int:
+    ev = Event.from_api(e)
+    # unique tournament and tournament rows
+    tournament = _obj(e.get("tournament"))
+    ut = _obj(tournament.get("uniqueTournament"))
+    if ut:
+        upsert_unique_tournament_from_obj(conn, ut)
+    if tournament:
+        upsert_tournament_from_obj(conn, tournament)
+    # season
+    season = _obj(e.get("season"))
+    if season:
+        upsert_season_from_obj(conn, season, ev.tournament_id)
+    # teams
+    for team in (ev.home, ev.away):
+        if team.id:
+            write_team(conn, team)
+    # event core
+    write_event(conn, ev, {"priority": ev.tournament_priority, "detailId": ev.detail_id}, fetched_at=fetched_at)
+    # link teams to event
+    if ev.home.id:
+        upsert(conn, UPSERT_EVENT_TEAM, (ev.id, ev.home.id, "home"))
+    if ev.away.id:
+        upsert(conn, UPSERT_EVENT_TEAM, (ev.id, ev.away.id, "away"))
+    # scores
+    write_event_scores(conn, ev)
+    return int(ev.id)
+
+
+def ingest_scheduled_events_for_today(conn: PGConnection) -> IdSet:
+    """Ingest today's schedule; return the ingested event ids in upstream order."""
     today = datetime.now(timezone.utc).date().isoformat()
     params = {"date": today}
+    # Rows are written as the schedule streams in; the full payload is never
+    # held in memory at once, and the id set spills to disk on long backfills.
+    ingested_event_ids = IdSet()
     try:
-        data = api_get("/football/events/scheduled", params=params)
-        events = data.get("success") and (data.get("data", {}) or {}).get("events", [])
-        if not events:
+        for e in api_iter_items("/football/events/scheduled", "data.events", params=params):
+            ingested_event_ids.add(_ingest_scheduled_event(conn, e, api_response_time()))
+        if not ingested_event_ids:
             logger.warning("No scheduled events for %s", today)
-            return []
-        ingested_event_ids: List[int] = []
-        for e in events:
-            # unique tournament and tournament rows
-            ut = e.get("tournament", {}).get("uniqueTournament") or {}
-            if ut:
-                upsert_unique_tournament_from_obj(conn, ut)
-            tournament = e.get("tournament") or {}
-            if tournament:
-                upsert_tournament_from_obj(conn, tournament)
-            # season
-            season = e.get("season") or {}
-            if season:
-                upsert_season_from_obj(conn, season, tournament.get("id"))
-            # teams
-            home = e.get("homeTeam") or {}
-            away = e.get("awayTeam") or {}
-            if home:
-                upsert_team_from_obj(conn, home)
-            if away:
-                upsert_team_from_obj(conn, away)
-            # event core
-            status = e.get("status") or {}
-            round_info = e.get("roundInfo") or {}
-            event_id = e.get("id")
-            upsert(
-                conn,
-                UPSERT_EVENT,
-                (
-                    event_id,
-                    e.get("slug"),
-                    tournament.get("id"),
-                    season.get("id"),
-                    round_info.get("round"),
-                    round_info.get("name"),
-                    status.get("code"),
-                    status.get("description"),
-                    status.get("type"),
-                    e.get("winnerCode"),
-                    e.get("startTimestamp"),
-                    e.get("finalResultOnly"),
-                    None,
-                    None,
-                    e.get("hasEventPlayerStatistics"),
-                    e.get("hasEventPlayerHeatMap"),
-                    psycopg2.extras.Json({"priority": tournament.get("priority"), "detailId": e.get("detailId")}),
-                ),
-            )
-            # link teams to event
-            if home.get("id"):
-                upsert(conn, UPSERT_EVENT_TEAM, (event_id, home.get("id"), "home"))
-            if away.get("id"):
-                upsert(conn, UPSERT_EVENT_TEAM, (event_id, away.get("id"), "away"))
-            # scores
-            hs = e.get("homeScore") or {}
-            as_ = e.get("awayScore") or {}
-            upsert(
-                conn,
-                UPSERT_EVENT_SCORES,
-                (
-                    event_id,
-                    _extract_score_val(hs, "current"),
-                    _extract_score_val(as_, "current"),
-                    _extract_score_val(hs, "display"),
-                    _extract_score_val(as_, "display"),
-                    _extract_score_val(hs, "period1"),
-                    _extract_score_val(as_, "period1"),
-                    _extract_score_val(hs, "period2"),
-                    _extract_score_val(as_, "period2"),
-                    _extract_score_val(hs, "normaltime"),
-                    _extract_score_val(as_, "normaltime"),
-                    _extract_score_val(hs, "penalties"),
-                    _extract_score_val(as_, "penalties"),
-                ),
-            )
-            ingested_event_ids.append(int(event_id))
+            return ingested_event_ids
         commit(conn)
         logger.info("Ingested %d scheduled events for %s", len(ingested_event_ids), today)
         return ingested_event_ids
     except Exception as e:
         logger.exception("Failed ingesting scheduled events: %s", e)
-        return []
-
-
-def enrich_event_details(conn: PGConnection, event_id: int) -> None:
-    try:
-        data = api_get("/football/event/details", params={"event_id": event_id})
-        event = data.get("success") and (data.get("data") or {}).get("event")
-        if not event:
-            return
-        # Venue
-        venue = event.get("venue") or {}
-        venue_id = venue.get("id")
-        if venue_id:
-            country_alpha2 = None
-            if venue.get("country"):
-                country_alpha2 = upsert_country_from_obj(conn, venue["country"]) or None
-            coords = venue.get("venueCoordinates") or {}
-            upsert(
-                conn,
-                UPSERT_VENUE,
-                (
-                    venue_id,
-                    venue.get("name"),
-                    venue.get("slug"),
-                    (venue.get("city") or {}).get("name"),
-                    (venue.get("stadium") or {}).get("capacity"),
-                    country_alpha2,
-                    coords.get("latitude"),
-                    coords.get("longitude"),
-                    psycopg2.extras.Json(venue.get("fieldTranslations") or {}),
-                ),
-            )
-        # Referee
-        referee = event.get("referee") or {}
-        referee_id = referee.get("id")
-        if referee_id:
-            alpha2 = None
-            if referee.get("country"):
-                alpha2 = upsert_country_from_obj(conn, referee["country"]) or None
-            upsert(
-                conn,
-                UPSERT_REFEREE,
-                (
-                    referee_id,
-                    referee.get("name"),
-                    alpha2,
-                    psycopg2.extras.Json({
-                        "yellowCards": referee.get("yellowCards"),
-                        "redCards": referee.get("redCards"),
-                        "yellowRedCards": referee.get("yellowRedCards"),
-                        "games": referee.get("games"),
-                    }),
-                ),
-            )
-        # Update event with venue/referee ids & extra
+        ingested_event_ids.close()
+        return IdSet()
+
+
+def write_event_details(conn: PGConnection, event: Dict[str, Any], fetched_at: Optional[float] = None) -> None:
+    """Write venue, referee and the event row from an event details payload."""
+    # Venue
+    venue = event.get("venue") or {}
+    venue_id = venue.get("id")
+    if venue_id:
+        country_alpha2 = None
+        if venue.get("country"):
+            country_alpha2 = upsert_country_from_obj(conn, venue["country"]) or None
+        coords = venue.get("venueCoordinates") or {}
         upsert(
             conn,
-            UPSERT_EVENT,
+            UPSERT_VENUE,
             (
-                event_id,
-                event.get("slug"),
-                (event.get("tournament") or {}).get("id"),
-                (event.get("season") or {}).get("id"),
-                (event.get("roundInfo") or {}).get("round"),
-                (event.get("roundInfo") or {}).get("name"),
-                (event.get("status") or {}).get("code"),
-                (event.get("status") or {}).get("description"),
-                (event.get("status") or {}).get("type"),
-                event.get("winnerCode"),
-                event.get("startTimestamp"),
-                event.get("finalResultOnly"),
                 venue_id,
+                venue.get("name"),
+                venue.get("slug"),
+                (venue.get("city") or {}).get("name"),
+                (venue.get("stadium") or {}).get("capacity"),
+                country_alpha2,
+                coords.get("latitude"),
+                coords.get("longitude"),
+                _jsonb(venue.get("fieldTranslations") or {}),
+            ),
+        )
+    # Referee
+    referee = event.get("referee") or {}
+    referee_id = referee.get("id")
+    if referee_id:
+        alpha2 = None
+        if referee.get("country"):
+            alpha2 = upsert_country_from_obj(conn, referee["country"]) or None
+        upsert(
+            conn,
+            UPSERT_REFEREE,
+            (
                 referee_id,
-                event.get("hasEventPlayerStatistics"),
-                event.get("hasEventPlayerHeatMap"),
-                psycopg2.extras.Json({"defaultPeriodCount": event.get("defaultPeriodCount"), "defaultPeriodLength": event.get("defaultPeriodLength")}),
+                referee.get("name"),
+                alpha2,
+                _jsonb({
+                    "yellowCards": referee.get("yellowCards"),
+                    "redCards": referee.get("redCards"),
+                    "yellowRedCards": referee.get("yellowRedCards"),
+                    "games": referee.get("games"),
+                }),
             ),
         )
+    # Update event with venue/referee ids & extra
+    write_event(
+        conn,
+        Event.from_api(event),
+        {"defaultPeriodCount": event.get("defaultPeriodCount"), "defaultPeriodLength": event.get("defaultPeriodLength")},
+        venue_id,
+        referee_id,
+        source="details",
+        fetched_at=fetched_at,
+    )
+
+
+def _event_details_steps(conn: PGConnection, event_id: int) -> Steps:
+    try:
+        data = yield Fetch("/football/event/details", {"event_id": event_id})
+        event = data.get("success") and (data.get("data") or {}).get("event")
+        if not event:
+            return
+        write_event_details(conn, event, api_response_time())
         commit(conn)
     except Exception as e:
+        conn.rollback()
+        note_ingest_failure(f"event {event_id} details", e)
         logger.warning("Event %s details enrich failed: %s", event_id, e)
 
 
-def ingest_lineups(conn: PGConnection, event_id: int) -> Tuple[List[int], List[int]]:
-    """Return (home_player_ids, away_player_ids) for starters."""
+def enrich_event_details(conn: PGConnection, event_id: int) -> Any:
+    return run_steps(conn, _event_details_steps(conn, event_id))
+
+
+def _event_lineups_params(event_id: int, confirmed: bool, lineups: List[Lineup]) -> Tuple[Any, ...]:
+    """Parameters for UPSERT_EVENT_LINEUPS."""
+    entries: Dict[Tuple[str, int, str], Dict[str, Any]] = {}
+    for lineup in lineups:
+        for entry in lineup.entries:
+            if entry.player_id:
+                entries[(lineup.side, entry.player_id, entry.role)] = {
+                    "side": lineup.side,
+                    "role": entry.role,
+                    "player_id": entry.player_id,
+                    "name": entry.name,
+                    "position": entry.position,
+                    "shirt_number": entry.shirt_number,
+                }
+    return (
+        event_id,  # $1 teams
+        json_dumps([{"side": l.side, "formation": l.formation} for l in lineups]),  # $2 lineup_src
+        json_dumps(list(entries.values())),  # $3 entry_src
+        event_id,  # $4 w_lineups
+        confirmed,  # $5 w_lineups
+        event_id,  # $6 w_lineup_players
+    )
+
+
+def _record_event_lineups(row: Tuple[Any, ...]) -> Set[str]:
+    """Account an UPSERT_EVENT_LINEUPS result row in WRITE_STATS; return its sides."""
+    sides, lineup_rows, lineup_written, player_rows, player_written, entry_rows, entry_written = row
+    _record_table_write("lineups", lineup_written, lineup_rows)
+    _record_table_write("players", player_written, player_rows)
+    _record_table_write("lineup_players", entry_written, entry_rows)
+    return set(sides)
+
+
+def write_event_lineups(conn: PGConnection, event_id: int, confirmed: bool, lineups: List[Lineup]) -> Set[str]:
+    """Write lineups, their players and lineup_players for one event in a single
+    round trip (UPSERT_EVENT_LINEUPS). Returns the sides that have a team row;
+    lineups for other sides are dropped. On a StatementBatch the result row is
+    only seen when the batch is sent, so every parsed side is returned."""
+    params = _event_lineups_params(event_id, confirmed, lineups)
+    if isinstance(conn, StatementBatch):
+        conn.add(UPSERT_EVENT_LINEUPS, params, on_result=lambda _, row: _record_event_lineups(row))
+        return {lineup.side for lineup in lineups}
+    with conn.cursor() as cur:
+        execute_statement(conn, cur, UPSERT_EVENT_LINEUPS, params)
+        return _record_event_lineups(cur.fetchone())
+
+
+def _lineups_steps(conn: PGConnection, event_id: int) -> Steps:
     try:
-        data = api_get("/football/event/lineups", params={"event_id": event_id})
-        payload = data.get("success") and data.get("data") or {}
-        confirmed = bool(payload.get("confirmed"))
-        starters_home: List[int] = []
-        starters_away: List[int] = []
-        for side_key, collect in (("home_team", starters_home), ("away_team", starters_away)):
-            team_block = payload.get(side_key) or {}
-            formation = team_block.get("formation")
-            # We need team_id from events table (event_teams)
-            with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-                cur.execute("SELECT team_id FROM event_teams WHERE event_id=%s AND side=%s", (event_id, "home" if side_key=="home_team" else "away"))
-                row = cur.fetchone()
-                if not row:
-                    continue
-                team_id = row[0]
-            upsert(conn, UPSERT_LINEUP, (event_id, team_id, formation, confirmed))
-            # starters
-            for p in (team_block.get("starting_eleven") or []):
-                pid = p.get("player_id")
-                if pid:
-                    collect.append(int(pid))
-                # upsert player minimal row
-                upsert(
-                    conn,
-                    UPSERT_PLAYER,
-                    (
-                        pid,
-                        p.get("name"),
-                        None,
-                        None,
-                        p.get("position"),
-                        p.get("shirt_number"),
-                        None,
-                        None,
-                        None,
-                        None,
-                        psycopg2.extras.Json({"source": "lineup"}),
-                    ),
-                )
-                upsert(
-                    conn,
-                    UPSERT_LINEUP_PLAYER,
-                    (
-                        event_id,
-                        team_id,
-                        pid,
-                        p.get("position"),
-                        p.get("shirt_number"),
-                        "starter",
-                        None,
-                    ),
-                )
-            # subs
-            for p in (team_block.get("substitutes") or []):
-                pid = p.get("player_id")
-                upsert(
-                    conn,
-                    UPSERT_PLAYER,
-                    (
-                        pid,
-                        p.get("name"),
-                        None,
-                        None,
-                        p.get("position"),
-                        p.get("shirt_number"),
-                        None,
-                        None,
-                        None,
-                        None,
-                        psycopg2.extras.Json({"source": "lineup"}),
-                    ),
-                )
-                upsert(
-                    conn,
-                    UPSERT_LINEUP_PLAYER,
-                    (
-                        event_id,
-                        team_id,
-                        pid,
-                        p.get("position"),
-                        p.get("shirt_number"),
-                        "sub",
-                        None,
-                    ),
-                )
+        data = yield Fetch("/football/event/lineups", {"event_id": event_id})
+        confirmed, lineups = parse_lineups(data.get("success") and data.get("data"))
+        sides = write_event_lineups(conn, event_id, confirmed, lineups)
         commit(conn)
-        return starters_home, starters_away
+        starters: Dict[str, List[int]] = {"home": [], "away": []}
+        for lineup in lineups:
+            if lineup.side in sides:
+                starters[lineup.side] = [
+                    int(e.player_id) for e in lineup.entries if e.role == "starter" and e.player_id
+                ]
+        return starters["home"], starters["away"]
     except Exception as e:
+        conn.rollback()
+        note_ingest_failure(f"event {event_id} lineups", e)
         logger.warning("Event %s lineups ingest failed: %s", event_id, e)
         return [], []
 
 
-def ingest_player_heatmap(conn: PGConnection, event_id: int, player_id: int) -> None:
+def ingest_lineups(conn: PGConnection, event_id: int) -> Any:
+    """Return (home_player_ids, away_player_ids) for starters."""
+    return run_steps(conn, _lineups_steps(conn, event_id))
+
+
+def write_player_heatmap(conn: PGConnection, event_id: int, player_id: int, points: List[HeatmapPoint]) -> None:
+    upsert_many(
+        conn,
+        UPSERT_PLAYER_HEATMAP_POINT_BATCH,
+        [(event_id, player_id, idx, pt.x, pt.y) for idx, pt in enumerate(points)],
+    )
+
+
+def _player_heatmap_steps(conn: PGConnection, event_id: int, player_id: int) -> Steps:
     try:
-        data = api_get("/football/player/heatmap", params={"event_id": event_id, "player_id": player_id})
-        points = data.get("success") and (data.get("data") or {}).get("heatmap") or []
-        for idx, pt in enumerate(points):
-            upsert(
-                conn,
-                UPSERT_PLAYER_HEATMAP_POINT,
-                (event_id, player_id, idx, pt.get("x"), pt.get("y")),
-            )
+        data = yield Fetch("/football/player/heatmap", {"event_id": event_id, "player_id": player_id})
+        write_player_heatmap(conn, event_id, player_id, parse_heatmap(data.get("success") and (data.get("data") or {}).get("heatmap")))
         commit(conn)
     except Exception as e:
+        conn.rollback()
+        note_ingest_failure(f"heatmap of player {player_id}", e)
         logger.debug("Heatmap fetch failed for event %s player %s: %s", event_id, player_id, e)
 
 
-def ingest_player_transfers(conn: PGConnection, player_id: int) -> None:
+def ingest_player_heatmap(conn: PGConnection, event_id: int, player_id: int) -> Any:
+    return run_steps(conn, _player_heatmap_steps(conn, event_id, player_id))
+
+
+def write_player_transfers(conn: PGConnection, player_id: int, history: List[Dict[str, Any]]) -> None:
+    """Write a transfer history payload and stamp the player's transfers_fetched_at."""
+    for tr in history:
+        tr_id = tr.get("id")
+        p = tr.get("player") or {}
+        from_team = tr.get("transferFrom") or {}
+        to_team = tr.get("transferTo") or {}
+        # ensure teams in DB
+        if from_team:
+            upsert_team_from_obj(conn, from_team)
+        if to_team:
+            upsert_team_from_obj(conn, to_team)
+        upsert(
+            conn,
+            UPSERT_PLAYER_TRANSFER,
+            (
+                tr_id,
+                p.get("id") or player_id,
+                from_team.get("id"),
+                to_team.get("id"),
+                (tr.get("transferFeeRaw") or {}).get("value"),
+                tr.get("transferFeeDescription"),
+                tr.get("transferDateTimestamp"),
+            ),
+        )
+    upsert(conn, MARK_PLAYER_TRANSFERS_FETCHED, (player_id,))
+
+
+def _player_transfers_steps(conn: PGConnection, player_id: int) -> Steps:
     try:
-        data = api_get("/football/player/transfer-history", params={"player_id": player_id})
+        data = yield Fetch("/football/player/transfer-history", {"player_id": player_id})
         history = data.get("success") and (data.get("data") or {}).get("transferHistory") or []
-        for tr in history:
-            tr_id = tr.get("id")
-            p = tr.get("player") or {}
-            from_team = tr.get("transferFrom") or {}
-            to_team = tr.get("transferTo") or {}
-            # ensure teams in DB
-            if from_team:
-                upsert_team_from_obj(conn, from_team)
-            if to_team:
-                upsert_team_from_obj(conn, to_team)
-            upsert(
-                conn,
-                UPSERT_PLAYER_TRANSFER,
-                (
-                    tr_id,
-                    p.get("id") or player_id,
-                    from_team.get("id"),
-                    to_team.get("id"),
-                    (tr.get("transferFeeRaw") or {}).get("value"),
-                    tr.get("transferFeeDescription"),
-                    tr.get("transferDateTimestamp"),
-                ),
-            )
+        write_player_transfers(conn, player_id, history)
         commit(conn)
     except Exception as e:
+        conn.rollback()
+        note_ingest_failure(f"transfers of player {player_id}", e)
         logger.debug("Transfers fetch failed for player %s: %s", player_id, e)
 
 
-def ingest_player_statistics(conn: PGConnection, event_id: int, player_id: int) -> None:
-    """Ingest player statistics for a specific event."""
+def ingest_player_transfers(conn: PGConnection, player_id: int) -> Any:
+    return run_steps(conn, _player_transfers_steps(conn, player_id))
+
+
+# Profile keys kept in players.extra beyond the typed columns
+PLAYER_PROFILE_EXTRA_KEYS = ("firstName", "lastName", "preferredFoot", "contractUntilTimestamp", "gender", "retired")
+
+
+def _fetch_player_profile(player_id: int) -> Optional[Dict[str, Any]]:
+    data = api_get(PLAYER_PROFILE_ENDPOINT, params={"player_id": player_id})
+    payload = data.get("success") and data.get("data") or {}
+    player = payload.get("player") or payload
+    return player if player.get("id") == player_id and player.get("name") else None
+
+
+def ingest_player_profiles(conn: PGConnection, budget: int = PLAYER_PROFILE_BUDGET) -> int:
+    """Fetch full profiles for never-fetched (then stale) players; return profiles written.
+
+    The work list comes from plan_refresh("players"): one row per player no
+    matter how many events they appear in, never-fetched first, most popular
+    first, capped at ``budget``. Profiles are fetched concurrently and written
+    here as they arrive; each write sets fetched_at, so a player is fetched
+    once per REFRESH_TTL_HOURS["players"].
+    """
+    try:
+        ids = [item.key[0] for item in plan_refresh(conn, "players", budget=budget)]
+        if not ids:
+            logger.info("No thin or stale player profiles")
+            return 0
+        written = failed = 0
+        unknown: List[int] = []
+        with ThreadPoolExecutor(max_workers=PLAYER_PROFILE_CONCURRENCY) as pool:
+            futures = {submit_in_context(pool, _fetch_player_profile, player_id): player_id for player_id in ids}
+            for fut in as_completed(futures):
+                player_id = futures[fut]
+                try:
+                    obj = fut.result()
+                except requests.HTTPError as e:
+                    # A 404 for one player is an answer (stamped below once the
+                    # endpoint is known to work); anything else retries next run
+                    if e.response is not None and e.response.status_code == 404:
+                        unknown.append(player_id)
+                    else:
+                        failed += 1
+                    logger.debug("Player profile fetch failed for %s: %s", player_id, e)
+                    continue
+                except Exception as e:
+                    failed += 1
+                    logger.debug("Player profile fetch failed for %s: %s", player_id, e)
+                    continue
+                if obj is None:
+                    unknown.append(player_id)
+                    continue
+                extra = {k: obj[k] for k in PLAYER_PROFILE_EXTRA_KEYS if obj.get(k) is not None}
+                extra["source"] = "profile"
+                write_player(conn, Player.from_api(obj), extra)
+                written += 1
+        if written and unknown:
+            # The endpoint works, so players it does not know are not retried every run
+            with conn.cursor() as cur:
+                cur.execute("UPDATE players SET fetched_at = now() WHERE id = ANY(%s)", (unknown,))
+        elif not written:
+            logger.warning(
+                "No player profiles from %s (%d unknown, %d failed); check BOOTSTRAP_PLAYER_PROFILE_ENDPOINT",
+                PLAYER_PROFILE_ENDPOINT, len(unknown), failed,
+            )
+        commit(conn)
+        logger.info("Ingested %d/%d player profiles (%d unknown upstream, %d failed)", written, len(ids), len(unknown), failed)
+        return written
+    except Exception as e:
+        conn.rollback()
+        logger.warning("Player profile enrichment failed: %s", e)
+        return 0
+
+
+def _player_statistics_steps(conn: PGConnection, event_id: int, player_id: int) -> Steps:
     try:
-        data = api_get("/football/event/player/statistics", params={"event_id": event_id, "player_id": player_id})
+        data = yield Fetch("/football/event/player/statistics", {"event_id": event_id, "player_id": player_id})
         stats = data.get("success") and (data.get("data") or {}).get("statistics") or {}
         if stats:
             upsert(
                 conn,
-                UPSERT_PLAYER_STATISTICS,
+                UPSERT_EVENT_PLAYER_STATISTICS,
                 (
                     event_id,
                     player_id,
@@ -1167,112 +3060,128 @@ def ingest_player_statistics(conn: PGConnection, event_id: int, player_id: int)
                     stats.get("interceptions"),
                     stats.get("fouls"),
                     stats.get("rating"),
-                    psycopg2.extras.Json(stats),
+                    _jsonb(stats),
                 ),
             )
         commit(conn)
     except Exception as e:
+        conn.rollback()
+        note_ingest_failure(f"statistics of player {player_id}", e)
         logger.debug("Player statistics fetch failed for event %s player %s: %s", event_id, player_id, e)
 
 
-def ingest_team_statistics(conn: PGConnection, event_id: int) -> None:
-    """Ingest team statistics for a specific event."""
+def ingest_player_statistics(conn: PGConnection, event_id: int, player_id: int) -> Any:
+    """Ingest player statistics for a specific event."""
+    return run_steps(conn, _player_statistics_steps(conn, event_id, player_id))
+
+
+def _stat_value(value: Any) -> Optional[float]:
     try:
-        data = api_get("/football/event/statistics", params={"event_id": event_id})
-        stats_data = data.get("success") and (data.get("data") or {}).get("statistics") or []
-        
-        # Get team IDs for this event
-        with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
-            cur.execute("SELECT team_id, side FROM event_teams WHERE event_id=%s", (event_id,))
-            teams = {row[1]: row[0] for row in cur.fetchall()}
-        
-        for stat_group in stats_data:
-            group_name = stat_group.get("groupName")
-            stats_items = stat_group.get("statisticsItems") or []
-            
-            for item in stats_items:
-                home_value = item.get("homeValue")
-                away_value = item.get("awayValue")
-                stat_name = item.get("name")
-                
-                # Insert for home team
-                if "home" in teams and home_value is not None:
-                    upsert(
-                        conn,
-                        UPSERT_TEAM_STATISTICS,
-                        (
-                            event_id,
-                            teams["home"],
-                            "home",
-                            group_name,
-                            stat_name,
-                            home_value,
-                            psycopg2.extras.Json(item),
-                        ),
-                    )
-                
-                # Insert for away team
-                if "away" in teams and away_value is not None:
-                    upsert(
-                        conn,
-                        UPSERT_TEAM_STATISTICS,
-                        (
-                            event_id,
-                            teams["away"],
-                            "away",
-                            group_name,
-                            stat_name,
-                            away_value,
-                            psycopg2.extras.Json(item),
-                        ),
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+EVENT_TEAMS_SQL = "SELECT side, team_id FROM event_teams WHERE event_id=%s"
+
+
+def write_team_statistics(
+    conn: PGConnection, event_id: int, teams: Dict[str, int], stats_data: List[Dict[str, Any]]
+) -> None:
+    """Write an event statistics payload; ``teams`` maps side -> team_id."""
+    rows: Dict[Tuple[str, str, str], Tuple[Any, ...]] = {}
+    for stat_group in stats_data:
+        group_name = stat_group.get("groupName") or ""
+        for item in stat_group.get("statisticsItems") or []:
+            stat_name = item.get("name")
+            if not stat_name:
+                continue
+            extra = json_dumps(item)
+            for side in ("home", "away"):
+                value = item.get(f"{side}Value")
+                if side in teams and value is not None:
+                    rows[(side, group_name, stat_name)] = (
+                        event_id, teams[side], side, group_name, stat_name, _stat_value(value), extra,
                     )
-        
+    upsert_many(conn, UPSERT_EVENT_TEAM_STATISTIC_BATCH, list(rows.values()))
+
+
+def _team_statistics_steps(conn: PGConnection, event_id: int) -> Steps:
+    try:
+        data = yield Fetch("/football/event/statistics", {"event_id": event_id})
+        stats_data = payload_records("/football/event/statistics", data)
+
+        # Get team IDs for this event
+        teams = dict((yield Read(EVENT_TEAMS_SQL, (event_id,))))
+
+        write_team_statistics(conn, event_id, teams, stats_data)
         commit(conn)
     except Exception as e:
-        logger.debug("Team statistics fetch failed for event %s: %s", event_id, e)
+        conn.rollback()
+        note_ingest_failure(f"event {event_id} team statistics", e)
+        if _http_status(e) is not None:
+            logger.debug("Team statistics fetch failed for event %s: %s", event_id, e)
+        else:
+            logger.warning("Team statistics ingest failed for event %s: %s", event_id, e)
+
+
+def ingest_team_statistics(conn: PGConnection, event_id: int) -> Any:
+    """Ingest team statistics for a specific event."""
+    return run_steps(conn, _team_statistics_steps(conn, event_id))
 
 
-def ingest_standings(conn: PGConnection, tournament_id: int, season_id: int) -> None:
-    """Ingest standings for a tournament season."""
+def ingest_standings(conn: PGConnection, tournament_id: int, season_id: int) -> int:
+    """Ingest standings for a tournament season. Returns the number of rows written."""
     try:
-        data = api_get("/football/tournament/standings", params={"tournament_id": tournament_id, "season_id": season_id})
+        data = api_get(
+            "/football/tournament/standings",
+            params={"tournament_id": tournament_id, "season_id": season_id},
+            timeout=STANDINGS_TIMEOUT,
+        )
         standings_data = data.get("success") and (data.get("data") or {}).get("standings") or []
-        
+        written = 0
+
         for standing_group in standings_data:
-            group_name = standing_group.get("name")
+            group_name = standing_group.get("name") or ""
             rows = standing_group.get("rows") or []
-            
+
             for row in rows:
                 team = row.get("team") or {}
                 team_id = team.get("id")
-                
+
                 if team_id:
                     # Ensure team exists in database
                     upsert_team_from_obj(conn, team)
-                    
+
+                    gf, ga = row.get("scoresFor"), row.get("scoresAgainst")
                     upsert(
                         conn,
                         UPSERT_STANDINGS,
                         (
                             tournament_id,
                             season_id,
-                            team_id,
                             group_name,
+                            team_id,
                             row.get("position"),
                             row.get("matches"),
                             row.get("wins"),
                             row.get("draws"),
                             row.get("losses"),
-                            row.get("scoresFor"),
-                            row.get("scoresAgainst"),
+                            gf,
+                            ga,
+                            gf - ga if gf is not None and ga is not None else None,
                             row.get("points"),
-                            psycopg2.extras.Json(row),
+                            _jsonb(row),
                         ),
                     )
-        
+                    written += 1
+
         commit(conn)
+        return written
     except Exception as e:
+        conn.rollback()
         logger.debug("Standings fetch failed for tournament %s season %s: %s", tournament_id, season_id, e)
+        return 0
 
 
 def ingest_tournament_featured_events(conn: PGConnection, tournament_id: int) -> None:
@@ -1284,97 +3193,52 @@ def ingest_tournament_featured_events(conn: PGConnection, tournament_id: int) ->
         for event in events:
             event_id = event.get("id")
             if event_id:
-                upsert(
-                    conn,
-                    UPSERT_TOURNAMENT_FEATURED_EVENTS,
-                    (
-                        tournament_id,
-                        event_id,
-                        event.get("priority"),
-                        event.get("featured"),
-                        psycopg2.extras.Json(event),
-                    ),
-                )
+                upsert(conn, UPSERT_TOURNAMENT_FEATURED_EVENT, (tournament_id, event_id))
         
         commit(conn)
     except Exception as e:
         logger.debug("Tournament featured events fetch failed for tournament %s: %s", tournament_id, e)
 
 
-def ingest_tournament_videos(conn: PGConnection, tournament_id: int) -> None:
-    """Ingest videos for a tournament."""
+def ingest_tournament_videos(conn: PGConnection, tournament_id: int, season_id: int) -> None:
+    """Ingest videos for a tournament season."""
     try:
-        data = api_get("/football/tournament/videos", params={"tournament_id": tournament_id})
-        videos = data.get("success") and (data.get("data") or {}).get("videos") or []
-        
-        for video in videos:
-            video_id = video.get("id")
-            if video_id:
-                upsert(
-                    conn,
-                    UPSERT_TOURNAMENT_VIDEOS,
-                    (
-                        tournament_id,
-                        video_id,
-                        video.get("title"),
-                        video.get("url"),
-                        video.get("thumbnail"),
-                        video.get("duration"),
-                        video.get("publishedAt"),
-                        psycopg2.extras.Json(video),
-                    ),
-                )
-        
+        data = api_get("/football/tournament/videos", params={"tournament_id": tournament_id, "season_id": season_id})
+        for video in payload_records("/football/tournament/videos", data):
+            upsert(conn, UPSERT_TOURNAMENT_VIDEO, (tournament_id, season_id, str(video["id"]), _jsonb(video)))
         commit(conn)
+    except requests.HTTPError as e:
+        logger.debug("Tournament videos fetch failed for tournament %s season %s: %s", tournament_id, season_id, e)
     except Exception as e:
-        logger.debug("Tournament videos fetch failed for tournament %s: %s", tournament_id, e)
+        conn.rollback()
+        logger.warning("Tournament videos ingest failed for tournament %s season %s: %s", tournament_id, season_id, e)
 
 
 def ingest_trending_players(conn: PGConnection) -> None:
-    """Ingest trending players data."""
+    """Ingest trending players: the top-rated player performances of recent events."""
     try:
         data = api_get("/football/trending/players")
-        players = data.get("success") and (data.get("data") or {}).get("players") or []
-        
-        for player_data in players:
-            player = player_data.get("player") or {}
-            player_id = player.get("id")
-            
-            if player_id:
-                # Ensure player exists in database
-                upsert(
-                    conn,
-                    UPSERT_PLAYER,
-                    (
-                        player_id,
-                        player.get("name"),
-                        player.get("slug"),
-                        player.get("shortName"),
-                        player.get("position"),
-                        player.get("jerseyNumber"),
-                        player.get("height"),
-                        player.get("dateOfBirthTimestamp"),
-                        (player.get("country") or {}).get("alpha2"),
-                        (player.get("marketValue") or {}).get("value"),
-                        psycopg2.extras.Json({"source": "trending"}),
-                    ),
-                )
-                
-                upsert(
-                    conn,
-                    UPSERT_TRENDING_PLAYERS,
-                    (
-                        player_id,
-                        player_data.get("trendingRank"),
-                        player_data.get("trendingScore"),
-                        player_data.get("category"),
-                        psycopg2.extras.Json(player_data),
-                    ),
-                )
-        
+        for entry in payload_records("/football/trending/players", data):
+            player = entry["player"]
+            # The trending payload carries the full player object: keep the
+            # same profile fields ingest_player_profiles would
+            extra = {k: player[k] for k in PLAYER_PROFILE_EXTRA_KEYS if player.get(k) is not None}
+            extra["source"] = "trending"
+            write_player(conn, Player.from_api(player), extra)
+            upsert(
+                conn,
+                UPSERT_TRENDING_PLAYER,
+                (player["id"], entry["event"]["id"], _stat_value(entry.get("rating")), _jsonb(entry)),
+            )
         commit(conn)
-    except Exception as e:
+    except requests.HTTPError as e:
         logger.debug("Trending players fetch failed: %s", e)
+    except Exception as e:
+        conn.rollback()
+        logger.warning("Trending players ingest failed: %s", e)
+
+
+SUGGESTION_ENTITY_TYPES = ("team", "player", "unique_tournament", "tournament")
 
 
 def ingest_suggestions(conn: PGConnection, query: str = "football") -> None:
@@ -1385,19 +3249,12 @@ def ingest_suggestions(conn: PGConnection, query: str = "football") -> None:
         
         for suggestion in suggestions:
             suggestion_id = suggestion.get("id")
-            if suggestion_id:
+            # suggestions.entity_type only admits the entity kinds search knows about
+            if suggestion_id and suggestion.get("type") in SUGGESTION_ENTITY_TYPES:
                 upsert(
                     conn,
-                    UPSERT_SUGGESTIONS,
-                    (
-                        suggestion_id,
-                        query,
-                        suggestion.get("type"),
-                        suggestion.get("name"),
-                        suggestion.get("slug"),
-                        suggestion.get("priority"),
-                        psycopg2.extras.Json(suggestion),
-                    ),
+                    UPSERT_SUGGESTION,
+                    (suggestion["type"], str(suggestion_id), suggestion.get("priority"), _jsonb(suggestion)),
                 )
         
         commit(conn)
@@ -1414,17 +3271,7 @@ def ingest_live_category_counts(conn: PGConnection) -> None:
         for category in categories:
             category_id = category.get("id")
             if category_id:
-                upsert(
-                    conn,
-                    UPSERT_LIVE_CATEGORY_COUNTS,
-                    (
-                        category_id,
-                        category.get("name"),
-                        category.get("liveCount"),
-                        category.get("totalCount"),
-                        psycopg2.extras.Json(category),
-                    ),
-                )
+                upsert(conn, UPSERT_LIVE_CATEGORY_COUNT, (category_id, category.get("liveCount")))
         
         commit(conn)
     except Exception as e:
@@ -1438,18 +3285,12 @@ def ingest_event_count_by_sport(conn: PGConnection) -> None:
         sports = data.get("success") and (data.get("data") or {}).get("sports") or []
         
         for sport in sports:
-            sport_id = sport.get("id")
-            if sport_id:
+            sport_slug = sport.get("slug")
+            if sport_slug:
                 upsert(
                     conn,
                     UPSERT_EVENT_COUNT_BY_SPORT,
-                    (
-                        sport_id,
-                        sport.get("name"),
-                        sport.get("eventCount"),
-                        sport.get("liveEventCount"),
-                        psycopg2.extras.Json(sport),
-                    ),
+                    (sport_slug, sport.get("liveEventCount"), sport.get("eventCount")),
                 )
         
         commit(conn)
@@ -1457,206 +3298,2604 @@ def ingest_event_count_by_sport(conn: PGConnection) -> None:
         logger.debug("Event count by sport fetch failed: %s", e)
 
 
+# ---------------
+# Images
+# ---------------
+# Image metadata is fetched only for entities with no image row yet or with a
+# row older than IMAGE_TTL_DAYS, oldest first, up to IMAGE_BUDGET per kind.
+# Every attempt is recorded: a miss (404, no url, request error) stamps
+# attempted_at and bumps misses, and the entity is retried after
+# IMAGE_MISS_RETRY_HOURS doubling per consecutive miss (capped at the TTL), so
+# the budget moves on to other entities instead of re-picking the same ids.
+# Requests run on IMAGE_CONCURRENCY threads sharing one RateLimiter; rows are
+# written from the calling thread. With IMAGE_CACHE_DIR set, the binaries are
+# stored under their sha256 (so shared logos are stored once) together with
+# pre-generated WebP thumbnails, and the hash is recorded on the image row.
+
+class RateLimiter:
+    """Spaces calls at least ``interval`` seconds apart across all threads."""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        if self.interval <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+
+# kind -> (entity table, image table, image key column, API path, extra WHERE on the image join)
+IMAGE_KINDS: Dict[str, Tuple[str, str, str, str, str]] = {
+    "player": ("players", "images_player", "player_id", "/player/{id}/image", ""),
+    "team": ("teams", "images_team", "team_id", "/team/{id}/image", " AND i.size = 'full'"),
+    "tournament": ("tournaments", "images_tournament", "tournament_id", "/tournament/{id}/image", ""),
+}
+
+IMAGE_MISS_SQL: Dict[str, str] = {
+    "player": UPSERT_PLAYER_IMAGE_MISS,
+    "team": UPSERT_TEAM_IMAGE_MISS,
+    "tournament": UPSERT_TOURNAMENT_IMAGE_MISS,
+}
+
+_IMAGE_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/svg+xml": "svg", "image/gif": "gif"}
+
+
+def select_image_work(conn: PGConnection, kind: str, budget: int = IMAGE_BUDGET) -> List[int]:
+    """Entity ids of ``kind`` never attempted, stale, or due a retry after a miss; oldest attempt first."""
+    entity_table, image_table, key_col, _, join_extra = IMAGE_KINDS[kind]
+    with conn.cursor() as cur:
+        cur.execute(
+            f"""
+            SELECT e.id
+            FROM {entity_table} e
+            LEFT JOIN {image_table} i ON i.{key_col} = e.id{join_extra}
+            WHERE e.slug IS NOT NULL
+              AND (
+                i.{key_col} IS NULL
+                OR COALESCE(i.attempted_at, i.fetched_at) < now() - CASE
+                  WHEN i.misses = 0 THEN %(ttl)s * interval '1 day'
+                  ELSE LEAST(%(retry)s * 2 ^ (i.misses - 1) * interval '1 hour', %(ttl)s * interval '1 day')
+                END
+              )
+            ORDER BY COALESCE(i.attempted_at, i.fetched_at) NULLS FIRST, e.id
+            LIMIT %(budget)s
+            """,
+            {"ttl": IMAGE_TTL_DAYS, "retry": IMAGE_MISS_RETRY_HOURS, "budget": budget},
+        )
+        return [row[0] for row in cur.fetchall()]
+
+
+def _cache_image(url: str, limiter: RateLimiter) -> Optional[Dict[str, Any]]:
+    """Download ``url`` into the content-addressed cache; return its blob row."""
+    limiter.wait()
+    r = requests.get(url, timeout=REQUEST_TIMEOUT)
+    r.raise_for_status()
+    body = r.content
+    digest = hashlib.sha256(body).hexdigest()
+    content_type = (r.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+    ext = _IMAGE_EXTENSIONS.get(content_type) or os.path.splitext(url.split("?")[0])[1].lstrip(".") or "bin"
+    path = os.path.join(IMAGE_CACHE_DIR, digest[:2], digest[2:4], f"{digest}.{ext}")
+    if not os.path.exists(path):
+        _write_atomic(path, body)
+    thumbs: Dict[str, str] = {}
+    if Image is not None and ext != "svg":
+        for size in IMAGE_THUMB_SIZES:
+            thumb_path = os.path.join(IMAGE_CACHE_DIR, "thumbs", str(size), digest[:2], f"{digest}.webp")
+            if not os.path.exists(thumb_path):
+                try:
+                    img = Image.open(io.BytesIO(body))
+                    img = img.convert("RGBA")
+                    img.thumbnail((size, size))
+                    out = io.BytesIO()
+                    img.save(out, format="WEBP", quality=80)
+                    _write_atomic(thumb_path, out.getvalue())
+                except Exception as e:
+                    logger.debug("Thumbnail %s@%d failed: %s", digest, size, e)
+                    continue
+            thumbs[str(size)] = os.path.relpath(thumb_path, IMAGE_CACHE_DIR)
+    return {
+        "content_hash": digest,
+        "source_url": url,
+        "content_type": content_type or None,
+        "size_bytes": len(body),
+        "path": os.path.relpath(path, IMAGE_CACHE_DIR),
+        "thumbnails": thumbs,
+    }
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _fetch_image(kind: str, entity_id: int, limiter: RateLimiter) -> Optional[Dict[str, Any]]:
+    """Worker: fetch image metadata (and optionally the binary) for one entity."""
+    limiter.wait()
+    data = api_get(IMAGE_KINDS[kind][3].format(id=entity_id))
+    if not (isinstance(data, dict) and data.get("success") and data.get("data")):
+        return None
+    image_data = data["data"]
+    result: Dict[str, Any] = {"url": image_data.get("url"), "type": image_data.get("type"), "blob": None}
+    if IMAGE_CACHE_DIR and result["url"]:
+        try:
+            result["blob"] = _cache_image(result["url"], limiter)
+        except Exception as e:
+            logger.debug("Image download failed for %s %s: %s", kind, entity_id, e)
+    return result
+
+
+def _write_image(conn: PGConnection, kind: str, entity_id: int, image: Dict[str, Any]) -> None:
+    blob = image.get("blob")
+    content_hash = blob["content_hash"] if blob else None
+    if blob:
+        upsert(
+            conn,
+            UPSERT_IMAGE_BLOB,
+            (
+                blob["content_hash"],
+                blob["source_url"],
+                blob["content_type"],
+                blob["size_bytes"],
+                blob["path"],
+                _jsonb(blob["thumbnails"]),
+            ),
+        )
+    if kind == "player":
+        upsert(conn, UPSERT_PLAYER_IMAGE, (entity_id, image["url"], image["type"], content_hash))
+    elif kind == "team":
+        upsert(conn, UPSERT_TEAM_IMAGE, (entity_id, "full", image["url"], content_hash))
+    else:
+        upsert(conn, UPSERT_TOURNAMENT_IMAGE, (entity_id, image["url"], content_hash))
+
+
+def ingest_images(conn: PGConnection, kind: str, limiter: Optional[RateLimiter] = None) -> int:
+    """Fetch missing/stale images of ``kind`` concurrently; return rows written."""
+    try:
+        ids = select_image_work(conn, kind)
+        if not ids:
+            logger.info("No missing or stale %s images", kind)
+            return 0
+        limiter = limiter or RateLimiter(IMAGE_DOWNLOAD_DELAY)
+        written = missed = 0
+        with ThreadPoolExecutor(max_workers=IMAGE_CONCURRENCY) as pool:
+            futures = {submit_in_context(pool, _fetch_image, kind, entity_id, limiter): entity_id for entity_id in ids}
+            for fut in as_completed(futures):
+                entity_id = futures[fut]
+                try:
+                    image = fut.result()
+                except Exception as e:
+                    logger.debug("%s image fetch failed for %s: %s", kind.capitalize(), entity_id, e)
+                    image = None
+                # One transaction per image, so a failed write costs only that image
+                try:
+                    if image and image.get("url"):
+                        _write_image(conn, kind, entity_id, image)
+                        written += 1
+                    else:
+                        upsert(conn, IMAGE_MISS_SQL[kind], (entity_id,))
+                        missed += 1
+                    commit(conn)
+                except Exception as e:
+                    conn.rollback()
+                    logger.warning("%s image write failed for %s: %s", kind.capitalize(), entity_id, e)
+        logger.info("Ingested %d/%d %s images, %d missed (retried with backoff)", written, len(ids), kind, missed)
+        return written
+    except Exception as e:
+        conn.rollback()
+        logger.warning("%s images ingestion failed: %s", kind.capitalize(), e)
+        return 0
+
+
 def ingest_player_images(conn: PGConnection) -> None:
-    """Ingest player images with rate limiting."""
+    """Ingest missing or stale player images."""
+    ingest_images(conn, "player")
+
+
+def ingest_team_images(conn: PGConnection) -> None:
+    """Ingest missing or stale team images."""
+    ingest_images(conn, "team")
+
+
+def ingest_tournament_images(conn: PGConnection) -> None:
+    """Ingest missing or stale tournament images."""
+    ingest_images(conn, "tournament")
+
+
+# ---------------
+# Standings engine
+# ---------------
+# Tables are derived from finished events in one set-based statement per
+# batch of (unique tournament, season) pairs: every team gets a row for every
+# round played so far with cumulative totals, home/away splits, last-5 form
+# (oldest to newest, W/D/L) and rank (points, goal difference, goals for).
+# "Table after matchday N" is then a plain read of standings_snapshots.
+
+STANDINGS_SNAPSHOT_SQL = """
+WITH results AS (
+  SELECT t.unique_tournament_id AS tournament_id, e.season_id, e.round, e.start_ts, e.id AS event_id,
+         et.team_id, et.side,
+         CASE WHEN et.side = 'home' THEN s.home_current ELSE s.away_current END AS gf,
+         CASE WHEN et.side = 'home' THEN s.away_current ELSE s.home_current END AS ga
+  FROM events e
+  JOIN tournaments t ON t.id = e.tournament_id
+  JOIN event_teams et ON et.event_id = e.id
+  JOIN event_scores s ON s.event_id = e.id
+  WHERE e.status_type = 'finished'
+    AND e.round IS NOT NULL
+    AND s.home_current IS NOT NULL AND s.away_current IS NOT NULL
+    AND (t.unique_tournament_id, e.season_id) IN (SELECT * FROM unnest(%(tournament_ids)s::int[], %(season_ids)s::int[]))
+),
+grid AS (
+  SELECT r.tournament_id, r.season_id, r.round, tm.team_id
+  FROM (SELECT DISTINCT tournament_id, season_id, round FROM results) r
+  JOIN (SELECT DISTINCT tournament_id, season_id, team_id FROM results) tm
+    ON tm.tournament_id = r.tournament_id AND tm.season_id = r.season_id
+),
+totals AS (
+  SELECT g.tournament_id, g.season_id, g.round, g.team_id,
+         count(x.event_id) AS played,
+         count(*) FILTER (WHERE x.gf > x.ga) AS wins,
+         count(*) FILTER (WHERE x.gf = x.ga) AS draws,
+         count(*) FILTER (WHERE x.gf < x.ga) AS losses,
+         COALESCE(sum(x.gf), 0) AS gf,
+         COALESCE(sum(x.ga), 0) AS ga,
+         count(*) FILTER (WHERE x.side = 'home') AS home_played,
+         count(*) FILTER (WHERE x.side = 'home' AND x.gf > x.ga) AS home_wins,
+         count(*) FILTER (WHERE x.side = 'home' AND x.gf = x.ga) AS home_draws,
+         count(*) FILTER (WHERE x.side = 'home' AND x.gf < x.ga) AS home_losses,
+         COALESCE(sum(x.gf) FILTER (WHERE x.side = 'home'), 0) AS home_gf,
+         COALESCE(sum(x.ga) FILTER (WHERE x.side = 'home'), 0) AS home_ga,
+         count(*) FILTER (WHERE x.side = 'away') AS away_played,
+         count(*) FILTER (WHERE x.side = 'away' AND x.gf > x.ga) AS away_wins,
+         count(*) FILTER (WHERE x.side = 'away' AND x.gf = x.ga) AS away_draws,
+         count(*) FILTER (WHERE x.side = 'away' AND x.gf < x.ga) AS away_losses,
+         COALESCE(sum(x.gf) FILTER (WHERE x.side = 'away'), 0) AS away_gf,
+         COALESCE(sum(x.ga) FILTER (WHERE x.side = 'away'), 0) AS away_ga,
+         (
+           SELECT string_agg(f.result, '' ORDER BY f.round, f.start_ts)
+           FROM (
+             SELECT y.round, y.start_ts,
+                    CASE WHEN y.gf > y.ga THEN 'W' WHEN y.gf = y.ga THEN 'D' ELSE 'L' END AS result
+             FROM results y
+             WHERE y.tournament_id = g.tournament_id AND y.season_id = g.season_id
+               AND y.team_id = g.team_id AND y.round <= g.round
+             ORDER BY y.round DESC, y.start_ts DESC
+             LIMIT 5
+           ) f
+         ) AS form
+  FROM grid g
+  LEFT JOIN results x
+    ON x.tournament_id = g.tournament_id AND x.season_id = g.season_id
+   AND x.team_id = g.team_id AND x.round <= g.round
+  GROUP BY g.tournament_id, g.season_id, g.round, g.team_id
+)
+INSERT INTO standings_snapshots (
+  tournament_id, season_id, round, team_id, rank, played, wins, draws, losses, gf, ga, gd, points,
+  home_played, home_wins, home_draws, home_losses, home_gf, home_ga,
+  away_played, away_wins, away_draws, away_losses, away_gf, away_ga, form, computed_at
+)
+SELECT tournament_id, season_id, round, team_id,
+       row_number() OVER (
+         PARTITION BY tournament_id, season_id, round
+         ORDER BY wins * 3 + draws DESC, gf - ga DESC, gf DESC, team_id
+       ),
+       played, wins, draws, losses, gf, ga, gf - ga, wins * 3 + draws,
+       home_played, home_wins, home_draws, home_losses, home_gf, home_ga,
+       away_played, away_wins, away_draws, away_losses, away_gf, away_ga, form, now()
+FROM totals
+ON CONFLICT (tournament_id, season_id, round, team_id) DO UPDATE SET
+  rank=EXCLUDED.rank, played=EXCLUDED.played, wins=EXCLUDED.wins, draws=EXCLUDED.draws, losses=EXCLUDED.losses,
+  gf=EXCLUDED.gf, ga=EXCLUDED.ga, gd=EXCLUDED.gd, points=EXCLUDED.points,
+  home_played=EXCLUDED.home_played, home_wins=EXCLUDED.home_wins, home_draws=EXCLUDED.home_draws,
+  home_losses=EXCLUDED.home_losses, home_gf=EXCLUDED.home_gf, home_ga=EXCLUDED.home_ga,
+  away_played=EXCLUDED.away_played, away_wins=EXCLUDED.away_wins, away_draws=EXCLUDED.away_draws,
+  away_losses=EXCLUDED.away_losses, away_gf=EXCLUDED.away_gf, away_ga=EXCLUDED.away_ga,
+  form=EXCLUDED.form, computed_at=EXCLUDED.computed_at
+"""
+
+# Latest snapshot of a pair as a standings table; only used when upstream has none
+LOCAL_STANDINGS_SQL = """
+INSERT INTO standings (tournament_id, season_id, group_name, team_id, rank, played, wins, draws, losses, gf, ga, gd, points, extra, fetched_at)
+SELECT ss.tournament_id, ss.season_id, '', ss.team_id, ss.rank, ss.played, ss.wins, ss.draws, ss.losses,
+       ss.gf, ss.ga, ss.gd, ss.points,
+       jsonb_build_object('source', 'local', 'round', ss.round, 'form', ss.form), ss.computed_at
+FROM standings_snapshots ss
+WHERE ss.tournament_id = %(tournament_id)s AND ss.season_id = %(season_id)s
+  AND ss.round = (
+    SELECT MAX(round) FROM standings_snapshots WHERE tournament_id = %(tournament_id)s AND season_id = %(season_id)s
+  )
+  AND NOT EXISTS (
+    SELECT 1 FROM standings st
+    WHERE st.tournament_id = %(tournament_id)s AND st.season_id = %(season_id)s
+      AND st.extra->>'source' IS DISTINCT FROM 'local'
+  )
+ON CONFLICT (tournament_id, season_id, group_name, team_id) DO UPDATE SET
+  rank=EXCLUDED.rank, played=EXCLUDED.played, wins=EXCLUDED.wins, draws=EXCLUDED.draws, losses=EXCLUDED.losses,
+  gf=EXCLUDED.gf, ga=EXCLUDED.ga, gd=EXCLUDED.gd, points=EXCLUDED.points, extra=EXCLUDED.extra, fetched_at=EXCLUDED.fetched_at
+"""
+
+
+def standings_pairs_for_events(conn: PGConnection, event_ids: Iterable[int]) -> List[Tuple[int, int]]:
+    """(unique tournament, season) pairs the given events belong to."""
+    pairs: Dict[Tuple[int, int], None] = {}
+    ids = iter(event_ids)
+    with conn.cursor() as cur:
+        while True:
+            chunk = list(itertools.islice(ids, 5000))
+            if not chunk:
+                break
+            cur.execute(
+                """
+                SELECT DISTINCT t.unique_tournament_id, e.season_id
+                FROM events e
+                JOIN tournaments t ON t.id = e.tournament_id
+                WHERE e.id = ANY(%s) AND t.unique_tournament_id IS NOT NULL AND e.season_id IS NOT NULL
+                """,
+                (chunk,),
+            )
+            for row in cur.fetchall():
+                pairs[(row[0], row[1])] = None
+    return list(pairs)
+
+
+def refresh_standings_snapshots(conn: PGConnection, pairs: List[Tuple[int, int]]) -> int:
+    """Recompute per-round snapshots and form for ``pairs``; return rows written."""
+    if not pairs:
+        return 0
     try:
-        # Get all players from database to fetch their images
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, slug FROM players WHERE slug IS NOT NULL LIMIT 100")
-        players = cursor.fetchall()
-        
-        for player_id, player_slug in players:
-            try:
-                # Add rate limiting delay
-                time.sleep(IMAGE_DOWNLOAD_DELAY)
-                
-                data = api_get(f"/player/{player_id}/image")
-                if data.get("success") and data.get("data"):
-                    image_data = data["data"]
-                    upsert(
-                        conn,
-                        UPSERT_IMAGES_PLAYER,
-                        (
-                            player_id,
-                            image_data.get("url"),
-                            image_data.get("type"),
-                            image_data.get("width"),
-                            image_data.get("height"),
-                            image_data.get("size"),
-                            psycopg2.extras.Json(image_data),
-                        ),
-                    )
-            except Exception as e:
-                logger.debug("Player image fetch failed for player %s: %s", player_id, e)
-                continue
-        
+        with conn.cursor() as cur:
+            cur.execute(
+                STANDINGS_SNAPSHOT_SQL,
+                {"tournament_ids": [p[0] for p in pairs], "season_ids": [p[1] for p in pairs]},
+            )
+            written = cur.rowcount
         commit(conn)
+        logger.info("Computed %d standings snapshot rows for %d tournament seasons", written, len(pairs))
+        return written
     except Exception as e:
-        logger.debug("Player images ingestion failed: %s", e)
+        conn.rollback()
+        logger.exception("Failed computing standings snapshots: %s", e)
+        return 0
 
 
-def ingest_team_images(conn: PGConnection) -> None:
-    """Ingest team images with rate limiting."""
+def recompute_standings_locally(conn: PGConnection, tournament_id: int, season_id: int) -> int:
+    """Fill ``standings`` from local results when upstream returned nothing.
+
+    Rows are marked ``extra.source = 'local'`` and never replace upstream rows.
+    """
     try:
-        # Get all teams from database to fetch their images
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, slug FROM teams WHERE slug IS NOT NULL LIMIT 100")
-        teams = cursor.fetchall()
-        
-        for team_id, team_slug in teams:
-            try:
-                # Add rate limiting delay
-                time.sleep(IMAGE_DOWNLOAD_DELAY)
-                
-                data = api_get(f"/team/{team_id}/image")
-                if data.get("success") and data.get("data"):
-                    image_data = data["data"]
-                    upsert(
-                        conn,
-                        UPSERT_IMAGES_TEAM,
-                        (
-                            team_id,
-                            image_data.get("url"),
-                            image_data.get("type"),
-                            image_data.get("width"),
-                            image_data.get("height"),
-                            image_data.get("size"),
-                            psycopg2.extras.Json(image_data),
-                        ),
-                    )
-            except Exception as e:
-                logger.debug("Team image fetch failed for team %s: %s", team_id, e)
-                continue
-        
+        refresh_standings_snapshots(conn, [(tournament_id, season_id)])
+        with conn.cursor() as cur:
+            cur.execute(LOCAL_STANDINGS_SQL, {"tournament_id": tournament_id, "season_id": season_id})
+            written = cur.rowcount
         commit(conn)
+        if written:
+            logger.info("Standings for tournament %s season %s computed locally (%d rows)", tournament_id, season_id, written)
+        return written
     except Exception as e:
-        logger.debug("Team images ingestion failed: %s", e)
+        conn.rollback()
+        logger.warning("Local standings failed for tournament %s season %s: %s", tournament_id, season_id, e)
+        return 0
 
 
-def ingest_tournament_images(conn: PGConnection) -> None:
-    """Ingest tournament images with rate limiting."""
+# ---------------
+# Head-to-head and team form
+# ---------------
+# Finished events are first copied into team_results (two rows per event),
+# skipping events whose rows are already up to date, so each run only
+# touches events that finished, or had a score corrected, since the last
+# one. head_to_head and team_form are then re-aggregated for the team pairs
+# and teams those rows belong to; match previews read one row from each.
+
+TEAM_RESULTS_SQL = """
+WITH finished AS (
+  SELECT e.id AS event_id, e.start_ts, t.unique_tournament_id, e.season_id, e.winner_code,
+         h.team_id AS home_id, a.team_id AS away_id, s.home_current AS home_goals, s.away_current AS away_goals
+  FROM events e
+  JOIN event_teams h ON h.event_id = e.id AND h.side = 'home'
+  JOIN event_teams a ON a.event_id = e.id AND a.side = 'away'
+  JOIN event_scores s ON s.event_id = e.id
+  LEFT JOIN tournaments t ON t.id = e.tournament_id
+  WHERE e.status_type = 'finished'
+    AND s.home_current IS NOT NULL AND s.away_current IS NOT NULL
+    AND NOT EXISTS (
+      SELECT 1 FROM team_results tr
+      WHERE tr.event_id = e.id AND tr.team_id = h.team_id
+        AND (tr.opponent_id, tr.gf, tr.ga, tr.start_ts) IS NOT DISTINCT FROM (a.team_id, s.home_current, s.away_current, e.start_ts)
+    )
+),
+sides AS (
+  SELECT event_id, home_id AS team_id, away_id AS opponent_id, 'home' AS side, start_ts, unique_tournament_id, season_id,
+         home_goals AS gf, away_goals AS ga,
+         CASE winner_code WHEN 1 THEN 'W' WHEN 2 THEN 'L' WHEN 3 THEN 'D' END AS decided
+  FROM finished
+  UNION ALL
+  SELECT event_id, away_id, home_id, 'away', start_ts, unique_tournament_id, season_id,
+         away_goals, home_goals,
+         CASE winner_code WHEN 2 THEN 'W' WHEN 1 THEN 'L' WHEN 3 THEN 'D' END
+  FROM finished
+),
+written AS (
+  INSERT INTO team_results (event_id, team_id, opponent_id, side, start_ts, tournament_id, season_id, gf, ga, result)
+  SELECT event_id, team_id, opponent_id, side, start_ts, unique_tournament_id, season_id, gf, ga,
+         -- winner_code settles shoot-outs; the score decides otherwise
+         COALESCE(decided, CASE WHEN gf > ga THEN 'W' WHEN gf = ga THEN 'D' ELSE 'L' END)
+  FROM sides
+  ON CONFLICT (event_id, team_id) DO UPDATE SET
+    opponent_id=EXCLUDED.opponent_id, side=EXCLUDED.side, start_ts=EXCLUDED.start_ts, tournament_id=EXCLUDED.tournament_id,
+    season_id=EXCLUDED.season_id, gf=EXCLUDED.gf, ga=EXCLUDED.ga, result=EXCLUDED.result
+  RETURNING team_id, opponent_id
+)
+SELECT team_id, opponent_id, count(*) FROM written GROUP BY team_id, opponent_id
+"""
+
+HEAD_TO_HEAD_SQL = """
+WITH meetings AS (
+  SELECT tr.*, row_number() OVER (PARTITION BY tr.team_id, tr.opponent_id ORDER BY tr.start_ts DESC, tr.event_id DESC) AS rn
+  FROM team_results tr
+  WHERE (tr.team_id, tr.opponent_id) IN (SELECT * FROM unnest(%(team_a)s::int[], %(team_b)s::int[]))
+)
+INSERT INTO head_to_head (team_a, team_b, played, a_wins, draws, b_wins, a_goals, b_goals, last_event_id, last_start_ts, recent, updated_at)
+SELECT team_id, opponent_id, count(*),
+       count(*) FILTER (WHERE result = 'W'), count(*) FILTER (WHERE result = 'D'), count(*) FILTER (WHERE result = 'L'),
+       sum(gf), sum(ga),
+       max(event_id) FILTER (WHERE rn = 1), max(start_ts),
+       jsonb_agg(
+         jsonb_build_object('event_id', event_id, 'start_ts', start_ts, 'side', side, 'gf', gf, 'ga', ga, 'result', result)
+         ORDER BY rn
+       ) FILTER (WHERE rn <= %(recent)s),
+       now()
+FROM meetings
+GROUP BY team_id, opponent_id
+ON CONFLICT (team_a, team_b) DO UPDATE SET
+  played=EXCLUDED.played, a_wins=EXCLUDED.a_wins, draws=EXCLUDED.draws, b_wins=EXCLUDED.b_wins,
+  a_goals=EXCLUDED.a_goals, b_goals=EXCLUDED.b_goals, last_event_id=EXCLUDED.last_event_id,
+  last_start_ts=EXCLUDED.last_start_ts, recent=EXCLUDED.recent, updated_at=EXCLUDED.updated_at
+"""
+
+TEAM_FORM_SQL = """
+WITH ranked AS (
+  SELECT tr.*,
+         row_number() OVER (PARTITION BY tr.team_id ORDER BY tr.start_ts DESC, tr.event_id DESC) AS rn,
+         row_number() OVER (PARTITION BY tr.team_id, tr.side ORDER BY tr.start_ts DESC, tr.event_id DESC) AS side_rn
+  FROM team_results tr
+  WHERE tr.team_id = ANY(%(team_ids)s)
+)
+INSERT INTO team_form (team_id, played, wins, draws, losses, gf, ga, points, form, home_form, away_form, last_event_ids, last_start_ts, updated_at)
+SELECT team_id,
+       count(*) FILTER (WHERE rn <= %(window)s),
+       count(*) FILTER (WHERE rn <= %(window)s AND result = 'W'),
+       count(*) FILTER (WHERE rn <= %(window)s AND result = 'D'),
+       count(*) FILTER (WHERE rn <= %(window)s AND result = 'L'),
+       COALESCE(sum(gf) FILTER (WHERE rn <= %(window)s), 0),
+       COALESCE(sum(ga) FILTER (WHERE rn <= %(window)s), 0),
+       3 * count(*) FILTER (WHERE rn <= %(window)s AND result = 'W') + count(*) FILTER (WHERE rn <= %(window)s AND result = 'D'),
+       string_agg(result, '' ORDER BY rn DESC) FILTER (WHERE rn <= %(window)s),
+       string_agg(result, '' ORDER BY side_rn DESC) FILTER (WHERE side = 'home' AND side_rn <= %(window)s),
+       string_agg(result, '' ORDER BY side_rn DESC) FILTER (WHERE side = 'away' AND side_rn <= %(window)s),
+       array_agg(event_id ORDER BY rn) FILTER (WHERE rn <= %(window)s),
+       max(start_ts),
+       now()
+FROM ranked
+GROUP BY team_id
+ON CONFLICT (team_id) DO UPDATE SET
+  played=EXCLUDED.played, wins=EXCLUDED.wins, draws=EXCLUDED.draws, losses=EXCLUDED.losses,
+  gf=EXCLUDED.gf, ga=EXCLUDED.ga, points=EXCLUDED.points, form=EXCLUDED.form,
+  home_form=EXCLUDED.home_form, away_form=EXCLUDED.away_form, last_event_ids=EXCLUDED.last_event_ids,
+  last_start_ts=EXCLUDED.last_start_ts, updated_at=EXCLUDED.updated_at
+"""
+
+
+def refresh_team_aggregates(conn: PGConnection) -> Tuple[int, int, int]:
+    """Apply newly finished (or corrected) events to head_to_head and team_form.
+
+    Returns (team_results rows written, pairs refreshed, teams refreshed).
+    """
     try:
-        # Get all tournaments from database to fetch their images
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, slug FROM tournaments WHERE slug IS NOT NULL LIMIT 50")
-        tournaments = cursor.fetchall()
-        
-        for tournament_id, tournament_slug in tournaments:
+        with conn.cursor() as cur:
+            cur.execute(TEAM_RESULTS_SQL)
+            touched = cur.fetchall()
+            results = sum(n for _, _, n in touched)
+            pairs = sorted({(min(a, b), max(a, b)) for a, b, _ in touched})
+            teams = sorted({team for pair in pairs for team in pair})
+            if pairs:
+                cur.execute(
+                    HEAD_TO_HEAD_SQL,
+                    {"team_a": [a for a, _ in pairs], "team_b": [b for _, b in pairs], "recent": H2H_RECENT_MEETINGS},
+                )
+                cur.execute(TEAM_FORM_SQL, {"team_ids": teams, "window": TEAM_FORM_WINDOW})
+        commit(conn)
+        if pairs:
+            logger.info(
+                "Head-to-head/form: %d new or corrected results, %d pairs and %d teams refreshed",
+                results, len(pairs), len(teams),
+            )
+        else:
+            logger.info("Head-to-head/form: no newly finished events")
+        return results, len(pairs), len(teams)
+    except Exception as e:
+        conn.rollback()
+        logger.exception("Failed refreshing head-to-head and team form: %s", e)
+        return 0, 0, 0
+
+
+# ---------------
+# Live counters
+# ---------------
+# The live-now counters polled by the homepage (live events per category,
+# live/total events per sport) are derived from the events this process
+# writes instead of fetched upstream. write_event() feeds every event into
+# LIVE_COUNTERS; the aggregate is served from memory over a local HTTP
+# endpoint and persisted into live_category_counts / event_count_by_sport.
+
+LIVE_STATUS_TYPE = "inprogress"
+
+# Seed for a fresh process: everything live, plus events from yesterday on
+LIVE_COUNTS_SEED_SQL = """
+SELECT e.id, t.category_id, s.slug, e.status_type, e.start_ts
+FROM events e
+LEFT JOIN tournaments t ON t.id = e.tournament_id
+LEFT JOIN categories c ON c.id = t.category_id
+LEFT JOIN sports s ON s.id = c.sport_id
+WHERE e.status_type = %s OR e.start_ts >= %s
+"""
+
+# event_id -> (category_id, sport_slug, live, UTC start day)
+CounterEntry = Tuple[Optional[int], Optional[str], bool, Optional[str]]
+
+
+def _utc_day(ts: Optional[int]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).date().isoformat() if ts else None
+
+
+class LiveCounters:
+    """Live/total event counts by category and sport, maintained per event write.
+
+    Each event contributes to one category and one sport bucket; tracking it
+    again (status change, new details) moves its contribution, so a write
+    costs a few dict updates. Encoded HTTP bodies are cached per version.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._events: Dict[int, CounterEntry] = {}
+        self._live_by_category: Dict[int, int] = {}
+        self._live_by_sport: Dict[str, int] = {}
+        self._total_by_sport_day: Dict[Tuple[str, str], int] = {}
+        self._bodies: Dict[str, Tuple[int, str, bytes]] = {}
+        self.version = 0
+
+    def _apply(self, entry: CounterEntry, sign: int) -> None:
+        category_id, sport, live, day = entry
+        if live and category_id is not None:
+            self._live_by_category[category_id] = self._live_by_category.get(category_id, 0) + sign
+        if sport is not None:
+            if live:
+                self._live_by_sport[sport] = self._live_by_sport.get(sport, 0) + sign
+            if day is not None:
+                self._total_by_sport_day[(sport, day)] = self._total_by_sport_day.get((sport, day), 0) + sign
+
+    def track(
+        self,
+        event_id: int,
+        category_id: Optional[int],
+        sport: Optional[str],
+        status_type: Optional[str],
+        start_ts: Optional[int],
+    ) -> None:
+        day = _utc_day(start_ts)
+        with self._lock:
+            old = self._events.get(event_id)
+            if old is not None:
+                # Payloads without tournament/start info (details) keep what is known
+                category_id = old[0] if category_id is None else category_id
+                sport = sport or old[1]
+                day = day or old[3]
+                status_type = status_type or (LIVE_STATUS_TYPE if old[2] else None)
+            entry = (category_id, sport, status_type == LIVE_STATUS_TYPE, day)
+            if entry == old:
+                return
+            if old is not None:
+                self._apply(old, -1)
+            self._apply(entry, 1)
+            self._events[event_id] = entry
+            self.version += 1
+
+    def track_event(self, ev: Event) -> None:
+        if ev.id is not None:
+            self.track(int(ev.id), ev.category_id, ev.sport_slug, ev.status_type, ev.start_ts)
+
+    def load(self, conn: PGConnection) -> int:
+        """Rebuild from the events table (startup, or after sharded writes); return events tracked."""
+        since = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        with conn.cursor() as cur:
+            cur.execute(LIVE_COUNTS_SEED_SQL, (LIVE_STATUS_TYPE, int(since.timestamp())))
+            rows = cur.fetchall()
+        conn.rollback()
+        with self._lock:
+            self._events.clear()
+            self._live_by_category.clear()
+            self._live_by_sport.clear()
+            self._total_by_sport_day.clear()
+        for row in rows:
+            self.track(*row)
+        with self._lock:
+            self.version += 1
+        return len(rows)
+
+    def prune(self) -> int:
+        """Forget finished/not-live events that started before yesterday; return how many."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=1)).date().isoformat()
+        with self._lock:
+            old = [eid for eid, (_, _, live, day) in self._events.items() if not live and day and day < cutoff]
+            for eid in old:
+                self._apply(self._events.pop(eid), -1)
+            for key in [k for k, n in self._total_by_sport_day.items() if k[1] < cutoff and n == 0]:
+                del self._total_by_sport_day[key]
+        return len(old)
+
+    def snapshot(self) -> Dict[str, Any]:
+        today = datetime.now(timezone.utc).date().isoformat()
+        with self._lock:
+            sports = set(self._live_by_sport) | {sport for sport, day in self._total_by_sport_day if day == today}
+            return {
+                "version": self.version,
+                "day": today,
+                "categories": dict(self._live_by_category),
+                "sports": {
+                    sport: {
+                        "live": self._live_by_sport.get(sport, 0),
+                        "total": self._total_by_sport_day.get((sport, today), 0),
+                    }
+                    for sport in sports
+                },
+            }
+
+    def body(self, kind: str) -> bytes:
+        """Encoded response for ``kind`` ("categories" or "sports"), re-encoded only after a change."""
+        today = datetime.now(timezone.utc).date().isoformat()
+        cached = self._bodies.get(kind)
+        if cached is not None and cached[0] == self.version and cached[1] == today:
+            return cached[2]
+        snap = self.snapshot()
+        if kind == "categories":
+            data: Any = {
+                "categories": [
+                    {"id": category_id, "liveCount": n} for category_id, n in sorted(snap["categories"].items())
+                ]
+            }
+        else:
+            data = dict(sorted(snap["sports"].items()))
+        body = json_dumps({"success": True, "data": data}).encode()
+        self._bodies[kind] = (snap["version"], snap["day"], body)
+        return body
+
+    def persist(self, conn: PGConnection) -> Tuple[int, int]:
+        """Write the aggregate to Postgres; return (category rows, sport rows) changed."""
+        self.prune()
+        snap = self.snapshot()
+        categories = sorted(snap["categories"].items())
+        sports = sorted(snap["sports"].items())
+        changed_categories = upsert_many(conn, UPSERT_LIVE_CATEGORY_COUNT_BATCH, categories)
+        changed_categories += upsert(conn, ZERO_LIVE_CATEGORY_COUNTS, ([k for k, _ in categories],))
+        changed_sports = upsert_many(
+            conn, UPSERT_EVENT_COUNT_BY_SPORT_BATCH, [(k, v["live"], v["total"]) for k, v in sports]
+        )
+        changed_sports += upsert(conn, ZERO_EVENT_COUNT_BY_SPORT, ([k for k, _ in sports],))
+        commit(conn)
+        return changed_categories, changed_sports
+
+
+LIVE_COUNTERS = LiveCounters()
+
+# Same paths as upstream, so a client can point at either
+COUNTER_PATHS = {
+    "/football/live/category-counts": "categories",
+    "/football/events/count-by-sport": "sports",
+}
+
+
+class _CountersHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        path = self.path.split("?", 1)[0]
+        kind = COUNTER_PATHS.get(path)
+        if kind is not None:
+            body = LIVE_COUNTERS.body(kind)
+        elif path == EVENT_LAG_PATH:
+            body = EVENT_LAG.body()
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logger.debug("counters: " + fmt, *args)
+
+
+def serve_counters(host: str = COUNTERS_HOST, port: int = COUNTERS_PORT) -> ThreadingHTTPServer:
+    """Serve LIVE_COUNTERS on a daemon thread; call shutdown() on the result to stop."""
+    server = ThreadingHTTPServer((host, port), _CountersHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="counters-http", daemon=True).start()
+    logger.info(
+        "Live counters served on http://%s:%d (%s)",
+        host, server.server_address[1], ", ".join([*COUNTER_PATHS, EVENT_LAG_PATH]),
+    )
+    return server
+
+
+class CountersPersister:
+    """Persist LIVE_COUNTERS every ``interval`` seconds on a pool connection, and once on stop()."""
+
+    def __init__(self, pool: ConnectionPool, interval: float = COUNTERS_PERSIST_SECONDS) -> None:
+        self.pool = pool
+        self.interval = interval
+        self._stop = threading.Event()
+        self._persisted_version = -1
+        self._thread = threading.Thread(target=self._loop, name="counters-persist", daemon=True)
+        self._thread.start()
+
+    def persist(self) -> None:
+        version = LIVE_COUNTERS.version
+        if version == self._persisted_version:
+            return
+        try:
+            with self.pool.connection() as conn:
+                LIVE_COUNTERS.persist(conn)
+            self._persisted_version = version
+        except psycopg2.Error as e:
+            logger.warning("Persisting live counters failed: %s", e)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.persist()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.persist()
+
+
+# ---------------
+# Ingestion lag
+# ---------------
+# Every event write records when its payload's response arrived (write_event,
+# fed by api_response_time), and the connection stamps those records at
+# commit (IngestConnection.commit, or _send_batches for the async engine)
+# into event_freshness, so commit batching and sharding show up in the lag.
+# EVENT_LAG keeps fetch-to-commit lag samples for percentiles and the fetch
+# time of each live event's latest data for "older than N seconds while
+# live" gauges. The scheduler boosts live events whose details lag past
+# LIVE_LAG_SLA_SECONDS, and the event_details phase refetches them.
+
+EVENT_LAG_PATH = "/metrics/event-lag"
+
+# Live events by the age of their latest data (any source), per gauge threshold
+LIVE_LAG_GAUGES_SQL = """
+WITH live AS (
+  SELECT e.id, extract(epoch FROM now() - max(f.fetched_at)) AS age
+  FROM events e
+  LEFT JOIN event_freshness f ON f.event_id = e.id
+  WHERE e.status_type = 'inprogress'
+  GROUP BY e.id
+)
+SELECT g, count(*) FILTER (WHERE age IS NULL OR age > g)
+FROM unnest(%s::int[]) AS g CROSS JOIN live
+GROUP BY g
+"""
+
+LAGGING_LIVE_EVENTS_SQL = """
+SELECT e.id
+FROM events e
+LEFT JOIN event_freshness f ON f.event_id = e.id AND f.source = %s
+WHERE e.id = ANY(%s) AND e.status_type = 'inprogress'
+  AND (f.fetched_at IS NULL OR f.fetched_at < now() - make_interval(secs => %s))
+"""
+
+
+def _freshness_rows(pending: List[FreshnessEntry]) -> List[FreshnessEntry]:
+    """Latest entry per (event, source), as rows for UPSERT_EVENT_FRESHNESS_BATCH."""
+    latest: Dict[Tuple[int, str], FreshnessEntry] = {}
+    for entry in pending:
+        latest[(entry[0], entry[1])] = entry
+    return list(latest.values())
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list (0 when empty)."""
+    if not ordered:
+        return 0.0
+    rank = int(len(ordered) * pct / 100.0 + 0.999999)
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+class EventLag:
+    """Fetch-to-commit lag samples and the data age of live events written by this process."""
+
+    def __init__(self, samples: int = LAG_SAMPLES) -> None:
+        self._lock = threading.Lock()
+        self._lags: "deque[float]" = deque(maxlen=samples)
+        self._live_fetched: Dict[int, float] = {}
+        self.committed = 0
+
+    def record(self, rows: Iterable[FreshnessEntry], committed_at: float) -> None:
+        with self._lock:
+            for event_id, _, status_type, _, fetched_at in rows:
+                self._lags.append(committed_at - fetched_at)
+                self.committed += 1
+                if status_type == LIVE_STATUS_TYPE:
+                    self._live_fetched[event_id] = max(fetched_at, self._live_fetched.get(event_id, 0.0))
+                else:
+                    self._live_fetched.pop(event_id, None)
+
+    def add_samples(self, lags: Iterable[float]) -> None:
+        """Fold in lag samples recorded by another process (shards)."""
+        with self._lock:
+            for lag in lags:
+                self._lags.append(lag)
+                self.committed += 1
+
+    def samples(self) -> List[float]:
+        with self._lock:
+            return list(self._lags)
+
+    def take_samples(self) -> List[float]:
+        """Return the lag samples and forget them (a shard reporting one chunk)."""
+        with self._lock:
+            lags = list(self._lags)
+            self._lags.clear()
+            return lags
+
+    def snapshot(self, gauges: Sequence[int] = LAG_GAUGE_SECONDS) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            ordered = sorted(self._lags)
+            ages = [now - fetched_at for fetched_at in self._live_fetched.values()]
+            committed = self.committed
+        lag_ms = {f"p{pct}": round(_percentile(ordered, pct) * 1000, 1) for pct in (50, 90, 99)}
+        lag_ms["max"] = round(ordered[-1] * 1000, 1) if ordered else 0.0
+        return {
+            "committed": committed,
+            "samples": len(ordered),
+            "lag_ms": lag_ms,
+            "live_events": len(ages),
+            "live_older_than_s": {str(g): sum(1 for age in ages if age > g) for g in gauges},
+        }
+
+    def body(self) -> bytes:
+        return json_dumps({"success": True, "data": self.snapshot()}).encode()
+
+
+EVENT_LAG = EventLag()
+
+
+def live_lag_gauges(conn: PGConnection, gauges: Sequence[int] = LAG_GAUGE_SECONDS) -> Dict[str, int]:
+    """Across the whole database: live events whose latest data is older than each threshold (seconds)."""
+    with conn.cursor() as cur:
+        cur.execute(LIVE_LAG_GAUGES_SQL, (list(gauges),))
+        counts = dict(cur.fetchall())
+    return {str(g): counts.get(g, 0) for g in gauges}
+
+
+def lagging_live_events(
+    conn: PGConnection, event_ids: List[int], source: str = "details", sla: float = LIVE_LAG_SLA_SECONDS
+) -> Set[int]:
+    """Live events among ``event_ids`` whose ``source`` data is missing or older than ``sla`` seconds."""
+    with conn.cursor() as cur:
+        cur.execute(LAGGING_LIVE_EVENTS_SQL, (source, list(event_ids), sla))
+        return {row[0] for row in cur.fetchall()}
+
+
+# ---------------
+# Change feed
+# ---------------
+# Triggers in SCHEMA_SQL append to change_feed; these helpers only bracket a run
+# so it can report what it changed, and keep the table bounded.
+
+
+def change_feed_position(conn: PGConnection) -> int:
+    """Highest change_feed seq currently visible (0 when empty)."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT COALESCE(MAX(seq), 0) FROM change_feed")
+        return int(cur.fetchone()[0])
+
+
+def summarize_change_feed(conn: PGConnection, since_seq: int) -> Dict[str, int]:
+    """Count changes recorded after ``since_seq`` by change type."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT change, count(*) FROM change_feed WHERE seq > %s GROUP BY change", (since_seq,))
+        return {change: int(n) for change, n in cur.fetchall()}
+
+
+def prune_change_feed(conn: PGConnection, retention_days: int = CHANGE_FEED_RETENTION_DAYS) -> int:
+    if retention_days <= 0:
+        return 0
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM change_feed WHERE changed_at < now() - make_interval(days => %s)",
+            (retention_days,),
+        )
+        deleted = cur.rowcount
+    commit(conn)
+    return deleted
+
+
+# ---------------
+# Local search index
+# ---------------
+# search_entities holds one row per player/team/tournament with its name, all
+# fieldTranslations names and a popularity score (highest user_count it is
+# seen under), indexed by tsvector and, when pg_trgm is available, trigrams.
+# search_prefixes precomputes the top SEARCH_PREFIX_TOP entities for every
+# prefix of every name token, so autocomplete is a primary-key range read:
+#   SELECT entity_type, entity_id, name, slug FROM search_prefixes
+#   WHERE prefix = lower(%s) ORDER BY rank
+# and fuzzy search falls back to search_entities (names % q / document @@ q).
+
+_TRANSLATED_NAMES_SQL = (
+    "COALESCE((SELECT string_agg(value, ' ') FROM jsonb_each_text("
+    "CASE WHEN jsonb_typeof({col}->'nameTranslation') = 'object' THEN {col}->'nameTranslation' ELSE '{{}}'::jsonb END"
+    ")), '')"
+)
+
+BUILD_SEARCH_ENTITIES_SQL = f"""
+WITH event_pop AS (
+  SELECT e.id AS event_id, COALESCE(ut.user_count, 0) AS pop
+  FROM events e
+  LEFT JOIN tournaments t ON t.id = e.tournament_id
+  LEFT JOIN unique_tournaments ut ON ut.id = t.unique_tournament_id
+),
+docs AS (
+  SELECT 'unique_tournament' AS entity_type, ut.id AS entity_id, ut.name, ut.slug,
+         {_TRANSLATED_NAMES_SQL.format(col="ut.translations")} AS translated, COALESCE(ut.user_count, 0) AS popularity
+  FROM unique_tournaments ut
+  UNION ALL
+  SELECT 'tournament', t.id, t.name, t.slug,
+         {_TRANSLATED_NAMES_SQL.format(col="t.translations")}, COALESCE(ut.user_count, 0)
+  FROM tournaments t
+  LEFT JOIN unique_tournaments ut ON ut.id = t.unique_tournament_id
+  UNION ALL
+  SELECT 'team', tm.id, tm.name, tm.slug,
+         {_TRANSLATED_NAMES_SQL.format(col="tm.translations")},
+         COALESCE((SELECT MAX(ep.pop) FROM event_teams et JOIN event_pop ep ON ep.event_id = et.event_id WHERE et.team_id = tm.id), 0)
+  FROM teams tm
+  UNION ALL
+  SELECT 'player', p.id, p.name, p.slug, COALESCE(p.short_name, ''),
+         COALESCE((SELECT MAX(ep.pop) FROM lineup_players lp JOIN event_pop ep ON ep.event_id = lp.event_id WHERE lp.player_id = p.id), 0)
+  FROM players p
+)
+INSERT INTO search_entities (entity_type, entity_id, name, slug, names, popularity, document)
+SELECT entity_type, entity_id, name, slug,
+       lower(name || ' ' || translated),
+       popularity,
+       setweight(to_tsvector('simple', name), 'A') || setweight(to_tsvector('simple', translated), 'B')
+FROM docs
+WHERE name IS NOT NULL
+"""
+
+BUILD_SEARCH_PREFIXES_SQL = """
+INSERT INTO search_prefixes (prefix, rank, entity_type, entity_id, name, slug, popularity)
+SELECT prefix, rank, entity_type, entity_id, name, slug, popularity
+FROM (
+  SELECT p.prefix, p.entity_type, p.entity_id, p.name, p.slug, p.popularity,
+         row_number() OVER (
+           PARTITION BY p.prefix ORDER BY p.popularity DESC, length(p.name), p.entity_type, p.entity_id
+         ) AS rank
+  FROM (
+    SELECT DISTINCT left(tok.token, n) AS prefix, s.entity_type, s.entity_id, s.name, s.slug, s.popularity
+    FROM search_entities s
+    CROSS JOIN LATERAL (
+      SELECT regexp_split_to_table(lower(s.name), '[^[:alnum:]]+') AS token
+      UNION
+      SELECT lower(s.name)
+    ) tok
+    CROSS JOIN LATERAL generate_series(1, LEAST(length(tok.token), %(max_len)s)) AS n
+    WHERE tok.token <> ''
+  ) p
+) ranked
+WHERE rank <= %(top)s
+"""
+
+
+def build_search_index(conn: PGConnection) -> None:
+    """Rebuild the local search tables from ingested entities.
+
+    Runs in one transaction, so readers keep seeing the previous index until
+    the new one is committed.
+    """
+    try:
+        trigram = False
+        with conn.cursor() as cur:
+            cur.execute("SAVEPOINT search_trgm")
             try:
-                # Add rate limiting delay
-                time.sleep(IMAGE_DOWNLOAD_DELAY)
-                
-                data = api_get(f"/tournament/{tournament_id}/image")
-                if data.get("success") and data.get("data"):
-                    image_data = data["data"]
-                    upsert(
-                        conn,
-                        UPSERT_IMAGES_TOURNAMENT,
-                        (
-                            tournament_id,
-                            image_data.get("url"),
-                            image_data.get("type"),
-                            image_data.get("width"),
-                            image_data.get("height"),
-                            image_data.get("size"),
-                            psycopg2.extras.Json(image_data),
-                        ),
-                    )
-            except Exception as e:
-                logger.debug("Tournament image fetch failed for tournament %s: %s", tournament_id, e)
-                continue
-        
+                cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_search_entities_names_trgm "
+                    "ON search_entities USING GIN (names gin_trgm_ops)"
+                )
+                cur.execute("RELEASE SAVEPOINT search_trgm")
+                trigram = True
+            except psycopg2.Error as e:
+                cur.execute("ROLLBACK TO SAVEPOINT search_trgm")
+                logger.info("pg_trgm unavailable (%s); search index uses tsvector only", str(e).strip().splitlines()[0])
+            cur.execute("DELETE FROM search_prefixes")
+            cur.execute("DELETE FROM search_entities")
+            cur.execute(BUILD_SEARCH_ENTITIES_SQL)
+            entities = cur.rowcount
+            cur.execute(BUILD_SEARCH_PREFIXES_SQL, {"max_len": SEARCH_PREFIX_MAX_LEN, "top": SEARCH_PREFIX_TOP})
+            prefixes = cur.rowcount
         commit(conn)
+        logger.info(
+            "Built search index: %d entities, %d prefix entries%s",
+            entities, prefixes, " (with trigram index)" if trigram else "",
+        )
     except Exception as e:
-        logger.debug("Tournament images ingestion failed: %s", e)
+        conn.rollback()
+        logger.exception("Failed building search index: %s", e)
 
 
 # ---------------
-# Main flow
+# Refresh planning
 # ---------------
+# Each entity class records when it was last fetched (fetched_at, or
+# players.transfers_fetched_at for transfer history). The planner turns that
+# into a prioritised queue: never-fetched rows first, then by popularity (the
+# highest unique_tournaments.user_count the entity appears under), then
+# oldest first, capped at a per-run budget.
+
+class RefreshItem(NamedTuple):
+    key: Tuple[Any, ...]
+    fetched_at: Optional[datetime]
+    popularity: int
+
+
+_EVENT_POPULARITY_CTE = """
+WITH event_pop AS (
+  SELECT e.id AS event_id, COALESCE(ut.user_count, 0) AS pop
+  FROM events e
+  LEFT JOIN tournaments t ON t.id = e.tournament_id
+  LEFT JOIN unique_tournaments ut ON ut.id = t.unique_tournament_id
+)
+"""
 
-def main() -> None:
-    logger.info("API base: %s", API_BASE)
-    ensure_database_exists()
+# entity class -> (number of key columns, query yielding key columns..., fetched_at, pop)
+# Queries take %(ttl)s (hours) and return only stale rows.
+_REFRESH_QUERIES: Dict[str, Tuple[int, str]] = {
+    "players": (1, """
+        SELECT p.id, p.fetched_at, COALESCE(MAX(ep.pop), 0) AS pop
+        FROM players p
+        LEFT JOIN lineup_players lp ON lp.player_id = p.id
+        LEFT JOIN event_pop ep ON ep.event_id = lp.event_id
+        WHERE p.fetched_at IS NULL OR p.fetched_at < now() - %(ttl)s * interval '1 hour'
+        GROUP BY p.id, p.fetched_at
+    """),
+    "transfers": (1, """
+        SELECT p.id, p.transfers_fetched_at AS fetched_at, COALESCE(MAX(ep.pop), 0) AS pop
+        FROM players p
+        LEFT JOIN lineup_players lp ON lp.player_id = p.id
+        LEFT JOIN event_pop ep ON ep.event_id = lp.event_id
+        WHERE p.transfers_fetched_at IS NULL OR p.transfers_fetched_at < now() - %(ttl)s * interval '1 hour'
+        GROUP BY p.id, p.transfers_fetched_at
+    """),
+    "teams": (1, """
+        SELECT tm.id, tm.fetched_at, COALESCE(MAX(ep.pop), 0) AS pop
+        FROM teams tm
+        LEFT JOIN event_teams et ON et.team_id = tm.id
+        LEFT JOIN event_pop ep ON ep.event_id = et.event_id
+        WHERE tm.fetched_at IS NULL OR tm.fetched_at < now() - %(ttl)s * interval '1 hour'
+        GROUP BY tm.id, tm.fetched_at
+    """),
+    "standings": (2, """
+        SELECT t.unique_tournament_id, e.season_id, MAX(st.fetched_at) AS fetched_at, COALESCE(MAX(ep.pop), 0) AS pop
+        FROM events e
+        JOIN tournaments t ON t.id = e.tournament_id
+        JOIN event_pop ep ON ep.event_id = e.id
+        LEFT JOIN (
+          SELECT tournament_id, season_id, MAX(fetched_at) AS fetched_at
+          FROM standings GROUP BY tournament_id, season_id
+        ) st ON st.tournament_id = t.unique_tournament_id AND st.season_id = e.season_id
+        WHERE t.unique_tournament_id IS NOT NULL AND e.season_id IS NOT NULL
+        GROUP BY t.unique_tournament_id, e.season_id
+        HAVING MAX(st.fetched_at) IS NULL OR MAX(st.fetched_at) < now() - %(ttl)s * interval '1 hour'
+    """),
+    # venues/referees are refreshed through the details of their latest event
+    "venues": (2, """
+        SELECT v.id, MAX(e.id) AS event_id, v.fetched_at, COALESCE(MAX(ep.pop), 0) AS pop
+        FROM venues v
+        JOIN events e ON e.venue_id = v.id
+        JOIN event_pop ep ON ep.event_id = e.id
+        WHERE v.fetched_at IS NULL OR v.fetched_at < now() - %(ttl)s * interval '1 hour'
+        GROUP BY v.id, v.fetched_at
+    """),
+    "referees": (2, """
+        SELECT r.id, MAX(e.id) AS event_id, r.fetched_at, COALESCE(MAX(ep.pop), 0) AS pop
+        FROM referees r
+        JOIN events e ON e.referee_id = r.id
+        JOIN event_pop ep ON ep.event_id = e.id
+        WHERE r.fetched_at IS NULL OR r.fetched_at < now() - %(ttl)s * interval '1 hour'
+        GROUP BY r.id, r.fetched_at
+    """),
+}
+
+
+def plan_refresh(conn: PGConnection, entity: str, budget: Optional[int] = None) -> List[RefreshItem]:
+    """Prioritised queue of stale ``entity`` items (see _REFRESH_QUERIES for keys)."""
+    nkeys, query = _REFRESH_QUERIES[entity]
+    with conn.cursor() as cur:
+        cur.execute(
+            _EVENT_POPULARITY_CTE
+            + f"SELECT * FROM ({query}) q "
+            "ORDER BY q.fetched_at IS NOT NULL, q.pop DESC, q.fetched_at LIMIT %(budget)s",
+            {"ttl": REFRESH_TTL_HOURS[entity], "budget": REFRESH_BUDGET if budget is None else budget},
+        )
+        return [RefreshItem(tuple(row[:nkeys]), row[nkeys], row[nkeys + 1]) for row in cur.fetchall()]
+
+
+def refresh_backlog(conn: PGConnection) -> Dict[str, int]:
+    """Number of stale items per entity class (before any budget)."""
+    backlog: Dict[str, int] = {}
+    with conn.cursor() as cur:
+        for entity, (_, query) in _REFRESH_QUERIES.items():
+            cur.execute(_EVENT_POPULARITY_CTE + f"SELECT count(*) FROM ({query}) q", {"ttl": REFRESH_TTL_HOURS[entity]})
+            backlog[entity] = cur.fetchone()[0]
+    return backlog
+
+
+def _stale_players_sql(column: str) -> str:
+    return f"SELECT id FROM players WHERE id = ANY(%s) AND ({column} IS NULL OR {column} < now() - %s * interval '1 hour')"
+
+
+def stale_player_ids(conn: PGConnection, column: str, player_ids: List[int], ttl_hours: float) -> Set[int]:
+    """Subset of ``player_ids`` whose ``column`` (fetched_at / transfers_fetched_at) is missing or older than ``ttl_hours``."""
+    if not player_ids:
+        return set()
+    with conn.cursor() as cur:
+        cur.execute(_stale_players_sql(column), (list(player_ids), ttl_hours))
+        return {row[0] for row in cur.fetchall()}
+
+
+# ---------------
+# Event scheduling policy
+# ---------------
+# Under a request or time budget the most valuable events should be enriched
+# first. Each of the day's events gets a score from live status, tournament
+# priority, unique tournament followers (log scale), how close kick-off is
+# to now and, for live events, how far their details lag behind the SLA
+# (event_freshness); the schedule's checkpoint positions are rewritten in score order,
+# so every per-event phase (and a resumed run) works through the same list.
+
+EVENT_PRIORITY_SQL = """
+WITH base AS (
+  SELECT c.item, c.position, e.id,
+         (e.status_type = 'inprogress')::int AS live,
+         COALESCE(t.priority, 0) AS tournament_priority,
+         ln(1 + GREATEST(COALESCE(ut.user_count, 0), 0)) AS users,
+         exp(GREATEST(-abs(COALESCE(e.start_ts, 0) - extract(epoch FROM now())) / (%(tau_hours)s * 3600.0), -50)) AS proximity,
+         -- 0 within the SLA, rising to 1 at twice the SLA (or never enriched)
+         CASE WHEN e.status_type = 'inprogress'
+              THEN LEAST(GREATEST(COALESCE(extract(epoch FROM now() - f.fetched_at), 1e9) / %(lag_sla)s - 1, 0), 1)
+              ELSE 0 END AS lag
+  FROM bootstrap_checkpoints c
+  JOIN events e ON e.id = c.item::bigint
+  LEFT JOIN tournaments t ON t.id = e.tournament_id
+  LEFT JOIN unique_tournaments ut ON ut.id = t.unique_tournament_id
+  LEFT JOIN event_freshness f ON f.event_id = e.id AND f.source = 'details'
+  WHERE c.run_key = %(run_key)s AND c.phase = 'schedule' AND c.item <> '*'
+),
+scored AS (
+  SELECT item, position, id,
+         %(w_live)s * live
+         + %(w_tournament_priority)s * tournament_priority / GREATEST(MAX(tournament_priority) OVER (), 1)
+         + %(w_user_count)s * users / GREATEST(MAX(users) OVER (), 1e-9)
+         + %(w_proximity)s * proximity
+         + %(w_lag)s * lag AS score
+  FROM base
+)
+"""
+
+
+def prioritize_schedule(conn: PGConnection, run_key: str) -> List[Tuple[int, float]]:
+    """Renumber the run's schedule checkpoints by priority score; return the top targets with scores."""
+    params: Dict[str, Any] = {"run_key": run_key, "tau_hours": EVENT_PROXIMITY_HOURS, "lag_sla": LIVE_LAG_SLA_SECONDS}
+    params.update({f"w_{k}": v for k, v in EVENT_PRIORITY_WEIGHTS.items()})
+    with conn.cursor() as cur:
+        cur.execute(
+            EVENT_PRIORITY_SQL
+            + """
+            , ranked AS (
+              SELECT item, row_number() OVER (ORDER BY score DESC, position, id) - 1 AS rank FROM scored
+            )
+            UPDATE bootstrap_checkpoints c SET position = ranked.rank
+            FROM ranked
+            WHERE c.run_key = %(run_key)s AND c.phase = 'schedule' AND c.item = ranked.item
+            """,
+            params,
+        )
+        cur.execute(EVENT_PRIORITY_SQL + "SELECT id, score FROM scored ORDER BY score DESC, position LIMIT %(limit)s",
+                    dict(params, limit=MAX_EVENTS))
+        return [(row[0], float(row[1])) for row in cur.fetchall()]
+
+
+# ---------------
+# Per-event enrichment
+# ---------------
+# Each per-event phase is one handler taking (conn, event_id), run by either
+# engine (see Ingest steps). Phases after lineups read starters back from
+# lineup_players, so they can run (or resume) in a later process than the one
+# that ingested the lineups.
+
+EVENT_STARTERS_SQL = """
+SELECT player_id FROM (
+  SELECT lp.player_id, et.side,
+         row_number() OVER (PARTITION BY lp.team_id ORDER BY lp.shirt_number NULLS LAST, lp.player_id) AS n
+  FROM lineup_players lp
+  JOIN event_teams et ON et.event_id = lp.event_id AND et.team_id = lp.team_id
+  WHERE lp.event_id = %s AND lp.role = 'starter'
+) s
+WHERE n <= %s
+ORDER BY side = 'away', n
+"""
+
+
+def _starters_steps(event_id: int, per_side: int = MAX_STARTERS) -> Steps:
+    return [row[0] for row in (yield Read(EVENT_STARTERS_SQL, (event_id, per_side)))]
+
+
+def event_starters(conn: PGConnection, event_id: int, per_side: int = MAX_STARTERS) -> Any:
+    """Up to ``per_side`` stored starters per team, home first."""
+    return run_steps(conn, _starters_steps(event_id, per_side))
+
+
+def _event_heatmaps_steps(conn: PGConnection, event_id: int) -> Steps:
+    starters = yield from _starters_steps(event_id)
+    yield Fanout([_player_heatmap_steps(conn, event_id, pid) for pid in starters])
+
+
+def _event_transfers_steps(conn: PGConnection, event_id: int) -> Steps:
+    # Transfer histories change rarely: only refetch the stale ones
+    starters = yield from _starters_steps(event_id)
+    if not starters:
+        return
+    stale = {row[0] for row in (yield Read(_stale_players_sql("transfers_fetched_at"), (starters, REFRESH_TTL_HOURS["transfers"])))}
+    yield Fanout([_player_transfers_steps(conn, pid) for pid in starters if pid in stale], pause=0.05)
+
+
+def _event_player_statistics_steps(conn: PGConnection, event_id: int) -> Steps:
+    starters = yield from _starters_steps(event_id)
+    yield Fanout([_player_statistics_steps(conn, event_id, pid) for pid in starters])
+
+
+def ingest_event_heatmaps(conn: PGConnection, event_id: int) -> Any:
+    return run_steps(conn, _event_heatmaps_steps(conn, event_id))
 
-    with _connect(DB_NAME) as conn:
-        conn.autocommit = False
-        run_schema(conn)
 
-        # Seed reference
-        seed_sports(conn)
+def ingest_event_transfers(conn: PGConnection, event_id: int) -> Any:
+    return run_steps(conn, _event_transfers_steps(conn, event_id))
 
-        # Ingest categories and tournaments catalog
+
+def ingest_event_player_statistics(conn: PGConnection, event_id: int) -> Any:
+    return run_steps(conn, _event_player_statistics_steps(conn, event_id))
+
+
+EVENT_PHASE_HANDLERS: Dict[str, Callable[[PGConnection, int], Any]] = {
+    "event_details": enrich_event_details,
+    "lineups": ingest_lineups,
+    "heatmaps": ingest_event_heatmaps,
+    "transfers": ingest_event_transfers,
+    "player_statistics": ingest_event_player_statistics,
+    "team_statistics": ingest_team_statistics,
+}
+
+
+def event_phase_stop_reason(phase: str) -> Optional[str]:
+    """Why a per-event loop should stop before its next event, if it should."""
+    if over_memory_limit():
+        return "RSS ceiling reached"
+    endpoint = EVENT_PHASE_ENDPOINTS.get(phase)
+    if payload_shape_broken(endpoint):
+        return f"{endpoint} payloads do not match their contract"
+    return None
+
+
+def process_event(conn: PGConnection, event_id: int) -> None:
+    """Enrich one scheduled event: details, lineups, and per-starter data."""
+    enrich_event_details(conn, event_id)
+    starters_home, starters_away = ingest_lineups(conn, event_id)
+
+    # Heatmaps and transfers for starters (limit to avoid overload)
+    starters = starters_home[:MAX_STARTERS] + starters_away[:MAX_STARTERS]
+    # Transfer histories change rarely: only refetch the stale ones
+    stale_transfers = (
+        stale_player_ids(conn, "transfers_fetched_at", starters, REFRESH_TTL_HOURS["transfers"]) if FETCH_TRANSFERS else set()
+    )
+    for pid in starters:
+        if FETCH_HEATMAPS:
+            ingest_player_heatmap(conn, event_id, pid)
+        if pid in stale_transfers:
+            ingest_player_transfers(conn, pid)
+            time.sleep(0.05)
+        # Ingest player statistics for each player
+        if FETCH_STATISTICS:
+            ingest_player_statistics(conn, event_id, pid)
+
+    # Ingest team statistics for the event (outside player loop)
+    if FETCH_STATISTICS:
+        ingest_team_statistics(conn, event_id)
+
+
+# ---------------
+# Sharded ingestion
+# ---------------
+# The coordinator streams the tournament catalog or the schedule once and
+# partitions the rows by a stable hash of the unique tournament id; per-event
+# phases partition their pending event ids by their event's unique tournament
+# the same way, so one shard owns all of a competition's events (and most of
+# the team rows they share) in every phase. Each partition is cut into
+# chunks of SHARD_CHUNK_SIZE that are handed to the worker processes as soon
+# as they fill, so writing overlaps fetching; at most two chunks per worker
+# are queued, which bounds the coordinator's memory. Each worker process opens
+# one DB connection when it starts and writes every chunk it runs on it.
+# Categories and the tournament-level phases stay in the coordinator.
+
+SHARD_ROW_SOURCES: Dict[str, Tuple[str, str, Callable[..., Any]]] = {
+    # kind -> (API path, list prefix, row writer)
+    "catalog": ("/football/tournaments", "data.results", _ingest_catalog_row),
+    "schedule": ("/football/events/scheduled", "data.events", _ingest_scheduled_event),
+}
+
+
+def shard_of(key: Optional[int], shards: int) -> int:
+    """Stable shard index for a tournament or event id (same answer in every process)."""
+    if key is None or shards <= 1:
+        return 0
+    return zlib.crc32(str(key).encode("ascii")) % shards
+
+
+def _schedule_shard_key(row: Dict[str, Any]) -> Optional[int]:
+    tournament = row.get("tournament") or {}
+    return (tournament.get("uniqueTournament") or {}).get("id") or tournament.get("id")
+
+
+EVENT_SHARD_KEYS_SQL = (
+    "SELECT e.id, COALESCE(t.unique_tournament_id, e.tournament_id) "
+    "FROM events e LEFT JOIN tournaments t ON t.id = e.tournament_id WHERE e.id = ANY(%s)"
+)
+
+
+def event_shard_keys(conn: PGConnection, event_ids: List[int]) -> Dict[int, int]:
+    """The unique tournament id (else the tournament id) of each event: what per-event shards partition on."""
+    with conn.cursor() as cur:
+        cur.execute(EVENT_SHARD_KEYS_SQL, (list(event_ids),))
+        keys = {int(eid): key for eid, key in cur.fetchall() if key is not None}
+    conn.rollback()
+    return keys
+
+
+def _with_deadlock_retry(conn: PGConnection, fn: Callable[[], Any], attempts: int = 3) -> Any:
+    """Run ``fn`` and commit; retry on deadlock with another shard's transaction."""
+    for attempt in range(1, attempts + 1):
+        try:
+            result = fn()
+            commit(conn)
+            return result
+        except psycopg2.errors.DeadlockDetected:
+            conn.rollback()
+            if attempt == attempts:
+                raise
+            time.sleep(0.05 * attempt)
+
+
+def _shard_metrics(shard: int, started: float, metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Attach this worker's counters to a chunk's metrics and reset them (workers run many chunks)."""
+    metrics["shard"] = shard
+    metrics["seconds"] = time.monotonic() - started
+    with _stats_lock:
+        metrics["api"] = dict(API_STATS)
+        metrics["writes"] = {t: dict(v) for t, v in WRITE_STATS.items()}
+        API_STATS.update(dict.fromkeys(API_STATS, 0))
+        WRITE_STATS.clear()
+    with _payload_lock:
+        metrics["payloads"] = {ep: dict(v) for ep, v in PAYLOAD_STATS.items()}
+        PAYLOAD_STATS.clear()
+    metrics["event_lag"] = EVENT_LAG.take_samples()
+    return metrics
+
+
+# The worker process's DB connection: opened once by the pool initializer and
+# reused for every chunk the worker runs, so its prepared statements are too
+_shard_conn: Optional[IngestConnection] = None
+
+
+def _init_shard_worker() -> IngestConnection:
+    """ProcessPoolExecutor initializer: open this worker's DB connection."""
+    global _shard_conn
+    conn = _shard_conn = _connect(DB_NAME)
+    conn.autocommit = False
+    atexit.register(_close_quietly, conn)
+    return conn
+
+
+def _shard_connection() -> IngestConnection:
+    """This worker's connection, reopened if it was closed (e.g. the server dropped it)."""
+    if _shard_conn is None or _shard_conn.closed:
+        return _init_shard_worker()
+    return _shard_conn
+
+
+def _run_shard(shard: int, kind: str, rows: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> Dict[str, Any]:
+    """Worker entry point: write one shard's catalog or schedule rows.
+
+    ``fetched_at`` is when the coordinator's response arrived; schedule rows
+    stamp their event freshness with it.
+    """
+    started = time.monotonic()
+    metrics: Dict[str, Any] = {"rows": 0, "errors": 0}
+    write_row = SHARD_ROW_SOURCES[kind][2]
+    extra_args = (fetched_at,) if kind == "schedule" else ()
+    conn = _shard_connection()
+    # Shared rows (teams, countries, categories) are upserted by several
+    # shards, so keep transactions short: one per row.
+    for row in rows:
+        try:
+            _with_deadlock_retry(conn, lambda: write_row(conn, row, *extra_args))
+            metrics["rows"] += 1
+        except Exception as e:
+            conn.rollback()
+            metrics["errors"] += 1
+            row_id = (row.get("entity") or {}).get("id") if kind == "catalog" else row.get("id")
+            logger.warning("Shard %d %s row %s failed: %s", shard, kind, row_id, e)
+    return _shard_metrics(shard, started, metrics)
+
+
+def _run_shard_items(shard: int, phase: str, event_ids: List[int], run_key: str) -> Dict[str, Any]:
+    """Worker entry point: run a per-event phase for one shard's events, checkpointing each that succeeds."""
+    started = time.monotonic()
+    metrics: Dict[str, Any] = {"rows": 0, "errors": 0, "stopped": 0}
+    checkpoints = Checkpoints(run_key)
+    conn = _shard_connection()
+    for eid in event_ids:
+        reason = event_phase_stop_reason(phase)
+        if reason:
+            logger.warning("Shard %d stopping %s at event %s: %s", shard, phase, eid, reason)
+            metrics["errors"] += 1
+            metrics["stopped"] = 1
+            break
+        try:
+            if _run_event_item(conn, checkpoints, phase, eid):
+                metrics["rows"] += 1
+            else:
+                metrics["errors"] += 1
+        except psycopg2.Error as e:
+            conn.rollback()
+            metrics["errors"] += 1
+            logger.warning("Shard %d %s for event %s aborted on DB error: %s", shard, phase, eid, e)
+    return _shard_metrics(shard, started, metrics)
+
+
+def _chunks_by_shard(keyed: Iterable[Tuple[int, Any]], shards: int, size: int = SHARD_CHUNK_SIZE) -> Iterator[Tuple[int, List[Any]]]:
+    """Group ``(shard, item)`` pairs into per-shard chunks, yielding each as soon as it is full (then the remainders)."""
+    parts: List[List[Any]] = [[] for _ in range(shards)]
+    for k, item in keyed:
+        parts[k].append(item)
+        if len(parts[k]) >= size:
+            yield k, parts[k]
+            parts[k] = []
+    for k, part in enumerate(parts):
+        if part:
+            yield k, part
+
+
+def _fold_shard(fut: Any, k: int, label: str, totals: Dict[str, float]) -> int:
+    """Fold a finished shard chunk into ``totals`` and this process's counters; return its API requests."""
+    try:
+        m = fut.result()
+    except Exception as e:
+        logger.error("Shard %d crashed: %s", k, e)
+        totals["errors"] += 1
+        totals["stopped"] += 1
+        return 0
+    for key in totals:
+        totals[key] += m.get(key, 0)
+    for key, n in (m.get("api") or {}).items():
+        count_api(key, n)
+    for table, v in (m.get("writes") or {}).items():
+        _record_table_write(table, v["written"], v["written"] + v["skipped"])
+    for endpoint, v in (m.get("payloads") or {}).items():
+        _count_payload(endpoint, **v)
+    EVENT_LAG.add_samples(m.get("event_lag") or [])
+    logger.debug(
+        "Shard %d finished a %s chunk: %d rows, %d errors in %.1fs", k, label, m["rows"], m["errors"], m["seconds"]
+    )
+    return (m.get("api") or {}).get("fetched", 0)
+
+
+def _stream_shards(
+    pool: ProcessPoolExecutor,
+    fn: Callable[..., Dict[str, Any]],
+    jobs: Iterable[Tuple[int, Tuple[Any, ...]]],
+    label: str,
+    shards: int,
+    stop_early: bool = False,
+) -> Dict[str, float]:
+    """Submit ``fn(*args)`` for each ``(shard, args)`` job as it is produced and fold the results.
+
+    At most two chunks per worker are in flight; producing the next job waits
+    for one to finish. With ``stop_early``, no further jobs are submitted once
+    a chunk reports that it stopped. Returns the folded totals and logs a summary.
+    """
+    started = time.monotonic()
+    totals: Dict[str, float] = {"rows": 0, "errors": 0, "stopped": 0}
+    inflight: Dict[Any, int] = {}
+    chunks = api_fetched = 0
+    try:
+        for k, args in jobs:
+            inflight[pool.submit(fn, *args)] = k
+            chunks += 1
+            if len(inflight) >= 2 * shards:
+                done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    api_fetched += _fold_shard(fut, inflight.pop(fut), label, totals)
+            if stop_early and totals["stopped"]:
+                break
+    finally:
+        for fut in as_completed(inflight):
+            api_fetched += _fold_shard(fut, inflight[fut], label, totals)
+    elapsed = time.monotonic() - started
+    logger.info(
+        "Sharded %s: %d rows, %d errors in %d chunks over %.1fs (%.1f rows/s); worker API requests: %d",
+        label, totals["rows"], totals["errors"], chunks, elapsed, totals["rows"] / elapsed if elapsed else 0.0, api_fetched,
+    )
+    return totals
+
+
+def run_sharded(kind: str, shards: int = SHARDS) -> IdSet:
+    """Partition the catalog or today's schedule by unique tournament id and write it in ``shards`` processes.
+
+    Chunks go to the workers while the response is still streaming in. For
+    the schedule, returns the ingested event ids in upstream order.
+    """
+    path, prefix, _ = SHARD_ROW_SOURCES[kind]
+    params = {"date": datetime.now(timezone.utc).date().isoformat()} if kind == "schedule" else None
+    event_ids = IdSet()
+
+    def keyed_rows() -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for row in api_iter_items(path, prefix, params=params):
+            if kind == "catalog":
+                yield shard_of((row.get("entity") or {}).get("id"), shards), row
+            elif row.get("id") is not None and event_ids.add(int(row["id"])):
+                yield shard_of(_schedule_shard_key(row), shards), row
+
+    def jobs() -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        for k, chunk in _chunks_by_shard(keyed_rows(), shards):
+            # the first row has arrived by now, so this is the response time
+            yield k, (k, kind, chunk, api_response_time())
+
+    logger.info("Streaming %s rows to %d shard workers", kind, shards)
+    # spawn: workers must not inherit the coordinator's DB socket
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=shards, mp_context=ctx, initializer=_init_shard_worker) as pool:
+            _stream_shards(pool, _run_shard, jobs(), kind, shards)
+    except Exception as e:
+        logger.exception("Failed streaming %s to shard workers: %s", kind, e)
+        event_ids.close()
+        return IdSet()
+    return event_ids
+
+
+def run_items_sharded(
+    phase: str, event_ids: List[int], run_key: str, shard_keys: Dict[int, int], shards: int = SHARDS
+) -> Dict[str, float]:
+    """Run a per-event phase for ``event_ids`` across ``shards`` processes; return the folded totals.
+
+    ``shard_keys`` maps event ids to their partition key (event_shard_keys);
+    an event missing from it is placed by its own id.
+    """
+    chunks = _chunks_by_shard(((shard_of(shard_keys.get(eid, eid), shards), eid) for eid in event_ids), shards)
+    jobs = ((k, (k, phase, chunk, run_key)) for k, chunk in chunks)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=shards, mp_context=ctx, initializer=_init_shard_worker) as pool:
+        return _stream_shards(pool, _run_shard_items, jobs, phase, shards, stop_early=True)
+
+
+# ---------------
+# Async engine
+# ---------------
+# BOOTSTRAP_ENGINE=async runs the per-event phases on one event loop. The
+# handlers are the sync engine's own (EVENT_PHASE_HANDLERS): called on a
+# StatementBatch bound to an AsyncIngest they return an awaitable, their API
+# requests go out concurrently through aiohttp, and their writes are
+# collected in the batch and then sent on a psycopg 3 connection in pipeline
+# mode, so a whole group of events is in flight without waiting on each
+# result. A group of ASYNC_SYNC_EVENTS events is one transaction, checkpoints
+# included; if it fails the events are replayed one at a time so only the
+# bad event is lost. An event whose handler noted a retryable failure is
+# written but not checkpointed. Every other phase keeps running on the sync
+# engine.
+
+CHECKPOINT_MARK_SQL = (
+    "INSERT INTO bootstrap_checkpoints (run_key, phase, item, position) VALUES (%s, %s, %s, %s) "
+    "ON CONFLICT (run_key, phase, item) DO UPDATE SET position = EXCLUDED.position, completed_at = now()"
+)
+
+
+def async_engine_enabled() -> bool:
+    return ENGINE == "async" and psycopg is not None and aiohttp is not None and psycopg.Pipeline.is_supported()
+
+
+def _pg3_params(params: Tuple[Any, ...]) -> Tuple[Any, ...]:
+    # JSONB parameters are built as psycopg2 Json adapters; psycopg 3 wants Jsonb
+    return tuple(Jsonb(p.adapted, dumps=json_dumps) if isinstance(p, psycopg2.extras.Json) else p for p in params)
+
+
+async def _async_connect(autocommit: bool = False) -> Any:
+    if DATABASE_URL:
+        return await psycopg.AsyncConnection.connect(DATABASE_URL, autocommit=autocommit)
+    return await psycopg.AsyncConnection.connect(autocommit=autocommit, **_connect_params(DB_NAME))
+
+
+class AsyncIngest:
+    """Drives ingest handlers on the event loop: HTTP through aiohttp, reads on their own connection."""
+
+    def __init__(self, session: Any, reader: Any) -> None:
+        self.session = session
+        # Reads (starters, event teams) use their own autocommit connection so
+        # they never wait behind the writer's pipeline
+        self.reader = reader
+        self._limit = asyncio.Semaphore(ASYNC_HTTP_CONCURRENCY)
+        self._inflight: Dict[ApiKey, "asyncio.Future[Any]"] = {}
+
+    async def api_get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """api_get for the event loop: same run memo, with in-flight requests shared as futures."""
+        if not DEDUPE_REQUESTS:
+            count_api("fetched")
+            return await self._fetch(path, params)
+        key = _api_key(path, params)
+        while True:
+            elsewhere: Optional[threading.Event] = None
+            with _api_lock:
+                if key in _api_cache:
+                    count_api("cache_hits")
+                    _response_at.set(_api_fetched_at.get(key))
+                    return _api_cache[key]
+                if key in _api_errors:
+                    count_api("cache_hits")
+                    raise _api_errors[key]
+                pending = self._inflight.get(key)
+                owner = pending is None and key not in _api_inflight
+                if owner:
+                    # the threading marker makes sync workers and other loops wait for this fetch
+                    _api_inflight[key] = threading.Event()
+                    pending = self._inflight[key] = asyncio.ensure_future(self._fetch_memo(key, path, params))
+                    count_api("fetched")
+                else:
+                    elsewhere = None if pending is not None else _api_inflight[key]
+                    count_api("coalesced")
+            if elsewhere is not None:
+                # a sync worker or another phase's event loop is fetching it
+                await asyncio.get_running_loop().run_in_executor(None, elsewhere.wait)
+                continue
+            try:
+                # shielded: a cancelled caller must not cancel the fetch others wait on
+                data = await asyncio.shield(pending)
+            except Exception:
+                if owner:
+                    raise
+                # re-check the memo; if that fetch failed transiently, this caller retries it
+                continue
+            _response_at.set(_api_fetched_at.get(key))
+            return data
+
+    async def _fetch_memo(self, key: ApiKey, path: str, params: Optional[Dict[str, Any]]) -> Any:
+        try:
+            data = await self._fetch(path, params)
+            with _api_lock:
+                _api_cache[key] = data
+                _api_fetched_at[key] = api_response_time()
+            return data
+        except aiohttp.ClientResponseError as e:
+            if 400 <= e.status < 500:
+                with _api_lock:
+                    _api_errors[key] = e
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            with _api_lock:
+                marker = _api_inflight.pop(key, None)
+            if marker is not None:
+                marker.set()
+
+    async def _fetch(self, path: str, params: Optional[Dict[str, Any]]) -> Any:
+        query = {k: str(v) for k, v in (params or {}).items()}
+        async with self._limit:
+            async with self.session.get(f"{API_BASE}{path}", params=query) as r:
+                r.raise_for_status()
+                body = await r.read()
+                _response_at.set(time.time())
+        try:
+            return json_loads(body)
+        except Exception:
+            return body.decode("utf-8", "replace")
+
+    async def fetch_rows(self, sql: str, params: Tuple[Any, ...]) -> List[Tuple[Any, ...]]:
+        async with self.reader.cursor() as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+    async def run_steps(self, batch: StatementBatch, steps: Steps) -> Any:
+        """run_steps on the event loop: requests and reads are awaited, a Fanout runs concurrently."""
+        answer: Any = None
+        error: Optional[Exception] = None
+        while True:
+            try:
+                step = steps.send(answer) if error is None else steps.throw(error)
+            except StopIteration as done:
+                return done.value
+            answer, error = None, None
+            try:
+                if isinstance(step, Fetch):
+                    answer = await self.api_get(step.path, step.params)
+                elif isinstance(step, Read):
+                    answer = await self.fetch_rows(step.sql, step.params)
+                else:
+                    answer = await asyncio.gather(*(self.run_steps(batch, sub) for sub in step.steps))
+            except Exception as e:
+                error = e
+
+
+async def _send_batches(writer: Any, phase: str, run_key: str, items: List[Tuple[int, StatementBatch]]) -> None:
+    """Write ``items`` and their checkpoints as one pipelined transaction, then account the results."""
+    sent: List[Tuple[Any, str, int, Optional[Callable[[int, Any], Any]]]] = []
+    freshness = _freshness_rows([entry for _, batch in items for entry in batch.event_freshness])
+    async with writer.pipeline():
+        for event_id, batch in items:
+            for sql, params, rows, on_result in batch.statements:
+                cur = writer.cursor()
+                await cur.execute(sql, _pg3_params(params))
+                sent.append((cur, sql, rows, on_result))
+            if not batch.failures:
+                await writer.execute(CHECKPOINT_MARK_SQL, (run_key, phase, str(event_id), None))
+        if freshness:
+            cur = writer.cursor()
+            await cur.execute(UPSERT_EVENT_FRESHNESS_BATCH, tuple(list(col) for col in zip(*freshness)))
+            sent.append((cur, UPSERT_EVENT_FRESHNESS_BATCH, len(freshness), None))
+    # Leaving the pipeline block syncs: every result is in, or the first error was raised
+    await writer.commit()
+    EVENT_LAG.record(freshness, time.time())
+    for cur, sql, rows, on_result in sent:
+        rowcount = max(cur.rowcount, 0)
+        if on_result is None:
+            _record_write(sql, rowcount, rows)
+        else:
+            on_result(rowcount, await cur.fetchone())
+
+
+async def run_event_phase_async(phase: str, event_ids: List[int], run_key: str) -> bool:
+    """Async counterpart of the sync per-event loop in _run_event_phase."""
+    handler = EVENT_PHASE_HANDLERS[phase]
+    queue: "asyncio.Queue[Optional[Tuple[int, StatementBatch]]]" = asyncio.Queue(maxsize=ASYNC_SYNC_EVENTS * 2)
+    ids = iter(event_ids)
+    stopped = False
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout) as session, \
+            await _async_connect(autocommit=True) as reader, \
+            await _async_connect() as writer:
+        ingest = AsyncIngest(session, reader)
+
+        async def produce() -> None:
+            nonlocal stopped
+            for eid in ids:
+                reason = None if stopped else event_phase_stop_reason(phase)
+                if stopped or reason:
+                    if not stopped:
+                        logger.warning("Stopping %s at event %s: %s", phase, eid, reason)
+                    stopped = True
+                    return
+                batch = StatementBatch(ingest)
+                with tracking_ingest_failures() as failures:
+                    await handler(batch, eid)
+                if failures:
+                    logger.info("Event %s %s left for retry (%d retryable failure(s))", eid, phase, len(failures))
+                    batch.failures = failures
+                await queue.put((eid, batch))
+
+        async def flush(items: List[Tuple[int, StatementBatch]]) -> None:
+            try:
+                await _send_batches(writer, phase, run_key, items)
+            except psycopg.Error as e:
+                await writer.rollback()
+                if len(items) == 1:
+                    logger.warning("Event %s %s aborted on DB error: %s", items[0][0], phase, e)
+                    return
+                for item in items:
+                    await flush([item])
+
+        async def consume() -> None:
+            group: List[Tuple[int, StatementBatch]] = []
+            while True:
+                item = await queue.get()
+                if item is not None:
+                    group.append(item)
+                if group and (item is None or len(group) >= ASYNC_SYNC_EVENTS or queue.empty()):
+                    await flush(group)
+                    group = []
+                if item is None:
+                    return
+
+        # Producers share one id iterator; the HTTP semaphore bounds requests in flight
+        consumer = asyncio.create_task(consume())
+        await asyncio.gather(*(produce() for _ in range(ASYNC_HTTP_CONCURRENCY)))
+        await queue.put(None)
+        await consumer
+    return not stopped
+
+
+# ---------------
+# Phase timing and profiling
+# ---------------
+
+
+class PhaseTimer:
+    """Times the phases of a run and writes a summary table plus a JSON run report.
+
+    Each phase records wall and CPU seconds, the API requests and upserts it
+    caused, and RSS after the phase (current, change, process peak). API
+    requests and upserts are counted per phase (see _phase_counters); CPU and
+    RSS are process-wide, so a phase that overlapped others under
+    PHASE_WORKERS lists them in ``overlapped`` and is starred in the summary.
+    Phases named in BOOTSTRAP_PROFILE are run under cProfile (``.prof``
+    plus a ``.txt`` top list) or a py-spy sampling recorder (``.svg``), written
+    into the run's report folder.
+    """
+
+    def __init__(
+        self,
+        report_dir: str = REPORT_DIR,
+        profile: Optional[Set[str]] = None,
+        profiler: str = PROFILER,
+    ) -> None:
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self.started_at = datetime.now(timezone.utc)
+        self.profile = PROFILE_PHASES if profile is None else profile
+        self.profiler = profiler
+        base = report_dir or ("data/bootstrap_runs" if self.profile else "")
+        self.run_dir = os.path.join(base, self.run_id) if base else ""
+        self.write_report = bool(report_dir)
+        self.phases: List[Dict[str, Any]] = []
+        # Running phase -> names of the phases it has overlapped so far
+        self._running: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _profiling(self, name: str) -> bool:
+        return bool(self.profile) and ("all" in self.profile or name in self.profile)
+
+    def _artifact(self, name: str, ext: str) -> str:
+        os.makedirs(self.run_dir, exist_ok=True)
+        return os.path.join(self.run_dir, f"{name}.{ext}")
+
+    def _start_py_spy(self, name: str) -> Optional[subprocess.Popen]:
+        exe = shutil.which("py-spy")
+        if exe is None:
+            logger.warning("py-spy not found on PATH; profiling phase %s with cProfile instead", name)
+            return None
+        return subprocess.Popen(
+            [exe, "record", "--pid", str(os.getpid()), "--rate", "100", "--subprocesses",
+             "--output", self._artifact(name, "svg")],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        counters: Dict[str, int] = {}
+        token = _phase_counters.set(counters)
+        with self._lock:
+            for others in self._running.values():
+                others.add(name)
+            overlapped = self._running[name] = set(self._running)
+            overlapped.discard(name)
+        profiler: Optional[cProfile.Profile] = None
+        spy: Optional[subprocess.Popen] = None
+        if self._profiling(name):
+            if self.profiler == "py-spy":
+                spy = self._start_py_spy(name)
+            if spy is None:
+                profiler = cProfile.Profile()
+                profiler.enable()
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        rss0 = rss_mb()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            _phase_counters.reset(token)
+            with self._lock:
+                self._running.pop(name, None)
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(self._artifact(name, "prof"))
+                with open(self._artifact(name, "txt"), "w") as f:
+                    pstats.Stats(profiler, stream=f).sort_stats("cumulative").print_stats(40)
+            if spy is not None:
+                spy.send_signal(signal.SIGINT)  # py-spy writes its output on interrupt
+                try:
+                    spy.wait(timeout=30)
+                except subprocess.TimeoutExpired:
+                    spy.kill()
+            with _stats_lock:
+                counted = dict(counters)
+            entry = {
+                "phase": name,
+                "status": status,
+                "wall_seconds": round(wall, 3),
+                "cpu_seconds": round(cpu, 3),
+                "api_requests": counted.get("fetched", 0),
+                "rows_written": counted.get("written", 0),
+                "rows_skipped": counted.get("skipped", 0),
+                "rss_mb": round(rss_mb(), 1),
+                "rss_delta_mb": round(rss_mb() - rss0, 1),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                "overlapped": sorted(overlapped),
+                "profile": self.profiler if (profiler is not None or spy is not None) else None,
+            }
+            with self._lock:
+                self.phases.append(entry)
+            logger.debug("Phase %s finished in %.2fs (%s)", name, wall, status)
+
+    def summary_table(self) -> str:
+        header = (
+            f"{'phase':<22} {'status':<6} {'wall s':>8} {'cpu s':>8} {'api':>6} {'written':>8} {'skipped':>8} "
+            f"{'rss MB':>8} {'+/- MB':>8} {'peak MB':>8}"
+        )
+        lines = [header, "-" * len(header)]
+        for p in self.phases:
+            label = p["phase"] + ("*" if p["overlapped"] else "")
+            lines.append(
+                f"{label:<22} {p['status']:<6} {p['wall_seconds']:>8.2f} {p['cpu_seconds']:>8.2f} "
+                f"{p['api_requests']:>6} {p['rows_written']:>8} {p['rows_skipped']:>8} "
+                f"{p['rss_mb']:>8.1f} {p['rss_delta_mb']:>+8.1f} {p['peak_rss_mb']:>8.1f}"
+            )
+        total = sum(p["wall_seconds"] for p in self.phases)
+        lines.append(f"{'total':<22} {'':<6} {total:>8.2f}")
+        if any(p["overlapped"] for p in self.phases):
+            lines.append("* ran alongside other phases: cpu s and RSS are shared with them (api and rows are its own)")
+        return "\n".join(lines)
+
+    def finish(self, extra: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Log the summary table and write report.json; return the report path if written."""
+        logger.info("Phase timings:\n%s", self.summary_table())
+        if not self.write_report:
+            return None
+        report = {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "phases": self.phases,
+            "api": dict(API_STATS),
+            "writes": WRITE_STATS,
+            "payloads": PAYLOAD_STATS,
+            "event_lag": EVENT_LAG.snapshot(),
+            "config": {
+                "api_base": API_BASE,
+                "max_events": MAX_EVENTS,
+                "max_tournaments": MAX_TOURNAMENTS,
+                "shards": SHARDS,
+                "json_codec": JSON_CODEC,
+                "profile": sorted(self.profile),
+                "profiler": self.profiler,
+                "low_memory": LOW_MEMORY,
+                "rss_limit_mb": RSS_LIMIT_MB,
+            },
+        }
+        report.update(extra or {})
+        path = self._artifact("report", "json")
+        try:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=2, default=str)
+        except OSError as e:
+            logger.warning("Could not write run report %s: %s", path, e)
+            return None
+        logger.info("Run report written to %s", path)
+        return path
+
+
+# ---------------
+# Phase graph and checkpoints
+# ---------------
+# main() runs PHASES as a dependency graph: a phase starts once the phases it
+# depends on (among those selected) have finished, and independent phases run
+# concurrently on pool connections. Completion is checkpointed per run key
+# (default: today's UTC date) so a rerun skips finished phases, and per-event
+# phases skip the events they already processed.
+
+CHECKPOINT_DONE = "*"
+
+
+class Checkpoints:
+    """Completed phases and work items for one run key, stored in bootstrap_checkpoints."""
+
+    def __init__(self, run_key: str) -> None:
+        self.run_key = run_key
+
+    def is_done(self, conn: PGConnection, phase: str) -> bool:
+        return CHECKPOINT_DONE in self.completed(conn, phase, items=[CHECKPOINT_DONE])
+
+    def completed(self, conn: PGConnection, phase: str, items: Optional[List[str]] = None) -> Set[str]:
+        with conn.cursor() as cur:
+            if items is None:
+                cur.execute(
+                    "SELECT item FROM bootstrap_checkpoints WHERE run_key = %s AND phase = %s",
+                    (self.run_key, phase),
+                )
+            else:
+                cur.execute(
+                    "SELECT item FROM bootstrap_checkpoints WHERE run_key = %s AND phase = %s AND item = ANY(%s)",
+                    (self.run_key, phase, items),
+                )
+            return {row[0] for row in cur.fetchall()}
+
+    def mark(self, conn: PGConnection, phase: str, items: Iterable[Any], start: Optional[int] = None) -> None:
+        """Record ``items`` as done (the caller commits). ``start`` numbers them in order."""
+        rows = [
+            (self.run_key, phase, str(item), None if start is None else start + i)
+            for i, item in enumerate(items)
+        ]
+        if not rows:
+            return
+        with conn.cursor() as cur:
+            psycopg2.extras.execute_values(
+                cur,
+                "INSERT INTO bootstrap_checkpoints (run_key, phase, item, position) VALUES %s "
+                "ON CONFLICT (run_key, phase, item) DO UPDATE SET position = EXCLUDED.position, completed_at = now()",
+                rows,
+            )
+
+    def reset(self, conn: PGConnection, phases: Iterable[str]) -> None:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM bootstrap_checkpoints WHERE run_key = %s AND phase = ANY(%s)",
+                (self.run_key, list(phases)),
+            )
+
+    def ordered_items(self, conn: PGConnection, phase: str) -> List[str]:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT item FROM bootstrap_checkpoints WHERE run_key = %s AND phase = %s AND item <> %s "
+                "ORDER BY position NULLS LAST, item",
+                (self.run_key, phase, CHECKPOINT_DONE),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def iter_items(self, conn: PGConnection, phase: str, limit: Optional[int] = None) -> Iterator[int]:
+        """Integer items of ``phase`` in position order, streamed from a server-side cursor."""
+        with conn.cursor(name=f"checkpoint_items_{phase}") as cur:
+            cur.itersize = 5000
+            cur.execute(
+                "SELECT item::bigint FROM bootstrap_checkpoints "
+                "WHERE run_key = %s AND phase = %s AND item <> %s ORDER BY position NULLS LAST, item LIMIT %s",
+                (self.run_key, phase, CHECKPOINT_DONE, limit),
+            )
+            for row in cur:
+                yield row[0]
+
+
+class PhaseContext:
+    """State shared by the phases of one run."""
+
+    def __init__(self, pool: ConnectionPool, checkpoints: Checkpoints, timer: PhaseTimer) -> None:
+        self.pool = pool
+        self.checkpoints = checkpoints
+        self.timer = timer
+        self._lock = threading.Lock()
+        self._tournament_plan: Optional[List[Tuple[int, int]]] = None
+        # phase -> items left for retry by a phase that otherwise finished
+        self.partial: Dict[str, int] = {}
+
+    def mark_partial(self, phase: str, failed: int) -> None:
+        with self._lock:
+            self.partial[phase] = failed
+
+    def event_targets(self) -> List[int]:
+        """Events to enrich this run: the first MAX_EVENTS of the schedule, in priority (or upstream) order."""
+        with self.pool.connection() as conn:
+            return list(self.checkpoints.iter_items(conn, "schedule", limit=MAX_EVENTS))
+
+    def tournament_plan(self) -> List[Tuple[int, int]]:
+        """Stale (unique tournament, season) pairs for this run, most popular first.
+
+        Planned once per run key and stored, so standings and tournament
+        features work through the same list even across a resume (refreshing
+        standings would otherwise drop pairs from a re-plan).
+        """
+        with self._lock:
+            if self._tournament_plan is None:
+                with self.pool.connection() as conn:
+                    stored = self.checkpoints.ordered_items(conn, "tournament_plan")
+                    if stored:
+                        plan = [(int(a), int(b)) for a, b in (item.split(":") for item in stored)]
+                    else:
+                        plan = [item.key for item in plan_refresh(conn, "standings", budget=MAX_TOURNAMENTS)]
+                        self.checkpoints.mark(conn, "tournament_plan", [f"{a}:{b}" for a, b in plan], start=0)
+                self._tournament_plan = plan
+            return self._tournament_plan
+
+
+class Phase(NamedTuple):
+    name: str
+    deps: Tuple[str, ...]
+    run: Callable[[PhaseContext], Optional[bool]]
+    # Default selection; a phase named explicitly on the command line runs regardless
+    enabled: bool = True
+
+
+def _run_event_item(conn: PGConnection, checkpoints: Checkpoints, phase: str, event_id: int) -> bool:
+    """Run one event's handler; checkpoint it only if nothing retryable failed. Return whether it was."""
+    with tracking_ingest_failures() as failures:
+        EVENT_PHASE_HANDLERS[phase](conn, event_id)
+    if failures:
+        logger.info("Event %s %s left for retry (%d retryable failure(s))", event_id, phase, len(failures))
+        return False
+    checkpoints.mark(conn, phase, [event_id])
+    commit(conn)
+    return True
+
+
+def _run_event_phase(ctx: PhaseContext, phase: str) -> bool:
+    """Run a per-event phase over the run's targets, skipping events already checkpointed."""
+    targets = ctx.event_targets()
+    with ctx.pool.connection() as conn:
+        done = ctx.checkpoints.completed(conn, phase)
+        if phase == "event_details" and done:
+            # Live events whose details fell behind the SLA are enriched again
+            done -= {str(eid) for eid in lagging_live_events(conn, targets)}
+            conn.rollback()
+    pending = [eid for eid in targets if str(eid) not in done]
+    if len(pending) < len(targets):
+        logger.info("%s: resuming, %d of %d events already done", phase, len(targets) - len(pending), len(targets))
+    if async_engine_enabled():
+        finished = asyncio.run(run_event_phase_async(phase, pending, ctx.checkpoints.run_key))
+    elif SHARDS > 1 and len(pending) > 1:
+        with ctx.pool.connection() as conn:
+            shard_keys = event_shard_keys(conn, pending)
+        finished = not run_items_sharded(phase, pending, ctx.checkpoints.run_key, shard_keys)["stopped"]
+    else:
+        finished = True
+        for eid in pending:
+            reason = event_phase_stop_reason(phase)
+            if reason:
+                logger.warning("Stopping %s at event %s: %s", phase, eid, reason)
+                finished = False
+                break
+            try:
+                # Each event checks out its own connection so a dropped
+                # connection only costs one event.
+                with ctx.pool.connection() as conn:
+                    _run_event_item(conn, ctx.checkpoints, phase, eid)
+            except psycopg2.Error as e:
+                logger.warning("Event %s %s aborted on DB error: %s", eid, phase, e)
+    if not finished:
+        return False
+    # Events whose handler failed (or hit a DB error) are not checkpointed; the
+    # phase stays open so a rerun with the same key retries just those
+    with ctx.pool.connection() as conn:
+        completed = ctx.checkpoints.completed(conn, phase)
+    failed = sum(1 for eid in pending if str(eid) not in completed)
+    if failed:
+        ctx.mark_partial(phase, failed)
+    return True
+
+
+def phase_categories(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
         ingest_categories(conn)
+
+
+def phase_tournaments(ctx: PhaseContext) -> None:
+    if SHARDS > 1:
+        run_sharded("catalog").close()
+        return
+    with ctx.pool.connection() as conn:
         ingest_tournaments_catalog(conn)
 
-        # Ingest today's scheduled events
-        event_ids = ingest_scheduled_events_for_today(conn)
-
-        # For each event, enrich and pull lineups+heatmaps+transfers for starters
-        # Cap events processed to avoid long first run
-        for eid in event_ids[:MAX_EVENTS]:
-            enrich_event_details(conn, eid)
-            starters_home, starters_away = ingest_lineups(conn, eid)
-
-            # Heatmaps and transfers for starters (limit to avoid overload)
-            for pid in starters_home[:MAX_STARTERS] + starters_away[:MAX_STARTERS]:
-                if FETCH_HEATMAPS:
-                    ingest_player_heatmap(conn, eid, pid)
-                if FETCH_TRANSFERS:
-                    ingest_player_transfers(conn, pid)
-                    time.sleep(0.05)
-                # Ingest player statistics for each player
-                if FETCH_STATISTICS:
-                    ingest_player_statistics(conn, eid, pid)
-            
-            # Ingest team statistics for the event (outside player loop)
-            if FETCH_STATISTICS:
-                ingest_team_statistics(conn, eid)
-        
-        # Ingest tournament-level data
-        if FETCH_STANDINGS or FETCH_TOURNAMENT_FEATURES:
-            # Get unique tournaments from processed events
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT DISTINCT t.unique_tournament_id, s.id as season_id
-                FROM events e
-                JOIN tournaments t ON e.tournament_id = t.id
-                JOIN seasons s ON e.season_id = s.id
-                WHERE t.unique_tournament_id IS NOT NULL
-                LIMIT 10
-            """)
-            tournament_seasons = cursor.fetchall()
-            
-            for unique_tournament_id, season_id in tournament_seasons:
-                if FETCH_STANDINGS:
-                    ingest_standings(conn, unique_tournament_id, season_id)
-                if FETCH_TOURNAMENT_FEATURES:
-                    ingest_tournament_featured_events(conn, unique_tournament_id)
-                    ingest_tournament_videos(conn, unique_tournament_id)
-        
-        # Ingest trending and suggestion data
-        if FETCH_TRENDING:
-            ingest_trending_players(conn)
-        
-        if FETCH_SUGGESTIONS:
-            ingest_suggestions(conn, "football")
-            ingest_suggestions(conn, "basketball")
-            ingest_suggestions(conn, "tennis")
-        
-        # Ingest live counts and event counts
-        if FETCH_LIVE_COUNTS:
+
+def phase_schedule(ctx: PhaseContext) -> bool:
+    if SHARDS > 1:
+        event_ids = run_sharded("schedule")
+        # Shard processes tracked their events in their own counters
+        with ctx.pool.connection() as conn:
+            LIVE_COUNTERS.load(conn)
+    else:
+        with ctx.pool.connection() as conn:
+            event_ids = ingest_scheduled_events_for_today(conn)
+    try:
+        # Record the ingested ids in upstream order: they are the run's event targets
+        with ctx.pool.connection() as conn:
+            ctx.checkpoints.reset(conn, ["schedule"])
+            ids = iter(event_ids)
+            position = 0
+            while True:
+                chunk = list(itertools.islice(ids, 5000))
+                if not chunk:
+                    break
+                ctx.checkpoints.mark(conn, "schedule", chunk, start=position)
+                position += len(chunk)
+            if position and EVENT_ORDER == "priority":
+                top = prioritize_schedule(conn, ctx.checkpoints.run_key)
+                logger.info(
+                    "Event targets by priority: %s",
+                    ", ".join(f"{eid} ({score:.2f})" for eid, score in top) or "none",
+                )
+        return position > 0
+    finally:
+        event_ids.close()
+
+
+def phase_standings(ctx: PhaseContext) -> None:
+    tournament_seasons = ctx.tournament_plan()
+    with ctx.pool.connection() as conn:
+        done = ctx.checkpoints.completed(conn, "standings")
+        for unique_tournament_id, season_id in tournament_seasons:
+            key = f"{unique_tournament_id}:{season_id}"
+            if key in done:
+                continue
+            if not ingest_standings(conn, unique_tournament_id, season_id):
+                # Upstream failed, timed out or was empty: derive the table from results
+                recompute_standings_locally(conn, unique_tournament_id, season_id)
+            ctx.checkpoints.mark(conn, "standings", [key])
+            commit(conn)
+
+
+def phase_tournament_features(ctx: PhaseContext) -> None:
+    # One pass per unique tournament, with its first (most popular) planned season
+    seasons: Dict[int, int] = {}
+    for unique_tournament_id, season_id in ctx.tournament_plan():
+        seasons.setdefault(unique_tournament_id, season_id)
+    with ctx.pool.connection() as conn:
+        done = ctx.checkpoints.completed(conn, "tournament_features")
+        for unique_tournament_id, season_id in seasons.items():
+            if str(unique_tournament_id) in done:
+                continue
+            ingest_tournament_featured_events(conn, unique_tournament_id)
+            ingest_tournament_videos(conn, unique_tournament_id, season_id)
+            ctx.checkpoints.mark(conn, "tournament_features", [unique_tournament_id])
+            commit(conn)
+
+
+def phase_trending(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        ingest_trending_players(conn)
+
+
+def phase_suggestions(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        ingest_suggestions(conn, "football")
+        ingest_suggestions(conn, "basketball")
+        ingest_suggestions(conn, "tennis")
+
+
+def phase_live_counts(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        if LIVE_COUNTS_SOURCE == "upstream":
             ingest_live_category_counts(conn)
             ingest_event_count_by_sport(conn)
-        
-        # Ingest images (with rate limiting)
-        if FETCH_IMAGES:
-            logger.info("Starting image ingestion with rate limiting...")
-            ingest_player_images(conn)
-            ingest_team_images(conn)
-            ingest_tournament_images(conn)
-
-    logger.info("Bootstrap completed successfully")
+            return
+        categories, sports = LIVE_COUNTERS.persist(conn)
+    logger.info("Live counters persisted from local events (%d category, %d sport rows changed)", categories, sports)
+
+
+def phase_standings_snapshots(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        # Pairs are collected before the refresh commits (which closes the items cursor)
+        pairs = standings_pairs_for_events(conn, ctx.checkpoints.iter_items(conn, "schedule"))
+        refresh_standings_snapshots(conn, pairs)
+
+
+def phase_team_form(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        refresh_team_aggregates(conn)
+
+
+def phase_player_profiles(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        ingest_player_profiles(conn)
+
+
+def phase_search_index(ctx: PhaseContext) -> None:
+    with ctx.pool.connection() as conn:
+        build_search_index(conn)
+
+
+def phase_images(ctx: PhaseContext) -> None:
+    logger.info("Starting image ingestion (%d workers, %.2fs spacing)...", IMAGE_CONCURRENCY, IMAGE_DOWNLOAD_DELAY)
+    # Image work is chosen by what is missing or stale, so a rerun resumes
+    # mid-kind on its own; finished kinds are skipped outright.
+    with ctx.pool.connection() as conn:
+        done = ctx.checkpoints.completed(conn, "images")
+        for kind in IMAGE_KINDS:
+            if kind in done:
+                continue
+            ingest_images(conn, kind)
+            ctx.checkpoints.mark(conn, "images", [kind])
+            commit(conn)
+
+
+def _event_phase(name: str) -> Callable[[PhaseContext], bool]:
+    return lambda ctx: _run_event_phase(ctx, name)
+
+
+PHASES: Dict[str, Phase] = {
+    p.name: p
+    for p in (
+        Phase("categories", (), phase_categories),
+        Phase("tournaments", ("categories",), phase_tournaments),
+        Phase("schedule", ("tournaments",), phase_schedule),
+        Phase("event_details", ("schedule",), _event_phase("event_details")),
+        Phase("lineups", ("schedule",), _event_phase("lineups")),
+        Phase("heatmaps", ("lineups",), _event_phase("heatmaps"), FETCH_HEATMAPS),
+        Phase("transfers", ("lineups",), _event_phase("transfers"), FETCH_TRANSFERS),
+        Phase("player_statistics", ("lineups",), _event_phase("player_statistics"), FETCH_STATISTICS),
+        Phase("team_statistics", ("schedule",), _event_phase("team_statistics"), FETCH_STATISTICS),
+        Phase("standings", ("schedule",), phase_standings, FETCH_STANDINGS),
+        Phase("tournament_features", ("schedule",), phase_tournament_features, FETCH_TOURNAMENT_FEATURES),
+        Phase("trending", (), phase_trending, FETCH_TRENDING),
+        Phase("suggestions", (), phase_suggestions, FETCH_SUGGESTIONS),
+        Phase("live_counts", ("categories", "schedule"), phase_live_counts, FETCH_LIVE_COUNTS),
+        Phase("standings_snapshots", ("schedule", "standings"), phase_standings_snapshots, STANDINGS_SNAPSHOTS),
+        Phase("team_form", ("schedule", "event_details"), phase_team_form, BUILD_TEAM_FORM),
+        Phase("player_profiles", ("lineups", "trending"), phase_player_profiles, FETCH_PLAYER_PROFILES),
+        Phase("search_index", ("tournaments", "event_details", "lineups", "player_profiles"), phase_search_index, BUILD_SEARCH_INDEX),
+        Phase("images", ("tournaments", "schedule", "lineups"), phase_images, FETCH_IMAGES),
+    )
+}
+
+
+def select_phases(
+    only: Optional[List[str]] = None,
+    skip: Optional[List[str]] = None,
+    with_deps: bool = False,
+) -> List[str]:
+    """Phase names to run, in declaration (topological) order."""
+    for name in (only or []) + (skip or []):
+        if name not in PHASES:
+            raise ValueError(f"Unknown phase {name!r}; known phases: {', '.join(PHASES)}")
+    if only:
+        selected = set(only)
+        if with_deps:
+            stack = list(selected)
+            while stack:
+                for dep in PHASES[stack.pop()].deps:
+                    if dep not in selected:
+                        selected.add(dep)
+                        stack.append(dep)
+    else:
+        selected = {name for name, phase in PHASES.items() if phase.enabled}
+    selected -= set(skip or [])
+    return [name for name in PHASES if name in selected]
+
+
+def run_phases(ctx: PhaseContext, names: List[str], workers: int = PHASE_WORKERS, force: bool = False) -> Dict[str, str]:
+    """Run ``names`` respecting dependencies, up to ``workers`` at a time.
+
+    A dependency outside ``names`` counts as satisfied. Phases already
+    checkpointed for the run key are skipped unless ``force``. A phase that
+    ran to the end but left items for retry is "partial": it is not
+    checkpointed, but its dependents still run on what it wrote. Returns
+    phase -> "done" | "skipped" | "partial" | "incomplete" | "failed" | "blocked".
+    """
+    status: Dict[str, str] = {}
+    pending = list(names)
+
+    def execute(name: str) -> str:
+        if not force:
+            with ctx.pool.connection() as conn:
+                if ctx.checkpoints.is_done(conn, name):
+                    logger.info("Phase %s already complete for run %s; skipping", name, ctx.checkpoints.run_key)
+                    return "skipped"
+        with ctx.timer.phase(name):
+            finished = PHASES[name].run(ctx)
+        if finished is False:
+            logger.warning("Phase %s did not finish; it will resume on the next run", name)
+            return "incomplete"
+        failed = ctx.partial.pop(name, 0)
+        if failed:
+            logger.warning("Phase %s left %d item(s) for retry; they are retried on the next run", name, failed)
+            return "partial"
+        with ctx.pool.connection() as conn:
+            ctx.checkpoints.mark(conn, name, [CHECKPOINT_DONE])
+        return "done"
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="phase") as executor:
+        running: Dict[Any, str] = {}
+        while pending or running:
+            for name in list(pending):
+                deps = [d for d in PHASES[name].deps if d in names]
+                if any(status.get(d) in ("failed", "incomplete", "blocked") for d in deps):
+                    logger.warning("Phase %s not run: a dependency did not finish", name)
+                    status[name] = "blocked"
+                    pending.remove(name)
+                elif all(status.get(d) in ("done", "skipped", "partial") for d in deps):
+                    running[executor.submit(execute, name)] = name
+                    pending.remove(name)
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                name = running.pop(fut)
+                try:
+                    status[name] = fut.result()
+                except Exception as e:
+                    logger.exception("Phase %s failed: %s", name, e)
+                    status[name] = "failed"
+    return status
+
+
+# ---------------
+# Main flow
+# ---------------
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Bootstrap the local Postgres database from the API, phase by phase.",
+        epilog="Phases: " + ", ".join(PHASES),
+    )
+    parser.add_argument("--phases", help="comma-separated phases to run (default: all enabled by BOOTSTRAP_* flags)")
+    parser.add_argument("--skip", help="comma-separated phases to leave out")
+    parser.add_argument("--with-deps", action="store_true", help="also run the dependencies of --phases")
+    parser.add_argument(
+        "--run-key",
+        default=datetime.now(timezone.utc).date().isoformat(),
+        help="checkpoint namespace; reruns with the same key resume (default: today's UTC date)",
+    )
+    parser.add_argument("--fresh", action="store_true", help="forget checkpoints of the selected phases first")
+    parser.add_argument("--force", action="store_true", help="rerun phases even if checkpointed as done")
+    parser.add_argument("--workers", type=int, default=PHASE_WORKERS, help="phases run concurrently (default: %(default)s)")
+    parser.add_argument("--list", action="store_true", help="print the phase graph and exit")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running: rerun the selected phases every BOOTSTRAP_DAEMON_INTERVAL seconds, "
+        "persisting (and with BOOTSTRAP_COUNTERS_PORT serving) the live counters",
+    )
+    return parser.parse_args(argv)
+
+
+def _csv(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    try:
+        names = select_phases(_csv(args.phases), _csv(args.skip), args.with_deps)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    if args.list:
+        for name, phase in PHASES.items():
+            mark = "*" if name in names else " "
+            print(f"{mark} {name:<22} <- {', '.join(phase.deps) or '-'}")
+        return
+
+    logger.info("API base: %s", API_BASE)
+    logger.info("JSON codec: %s", JSON_CODEC)
+    if ENGINE == "async":
+        if async_engine_enabled():
+            logger.info("Async engine for %s", ", ".join(EVENT_PHASE_HANDLERS))
+        else:
+            logger.warning("BOOTSTRAP_ENGINE=async needs psycopg>=3 (libpq pipeline support) and aiohttp; using the sync engine")
+    logger.info("Run %s: phases %s", args.run_key, ", ".join(names) or "none")
+    timer = PhaseTimer()
+    if LOW_MEMORY:
+        logger.info(
+            "Low-memory mode: response memo %s, id sets spill past %d keys, RSS ceiling %s",
+            "on" if DEDUPE_REQUESTS else "off",
+            SPILL_THRESHOLD,
+            f"{RSS_LIMIT_MB} MB" if RSS_LIMIT_MB else "none",
+        )
+        if ijson is None or not STREAM_JSON:
+            logger.warning("ijson unavailable or streaming disabled; large list payloads are decoded whole")
+    ensure_database_exists()
+
+    pool = ConnectionPool(DB_NAME)
+    status: Dict[str, str] = {}
+    server: Optional[ThreadingHTTPServer] = None
+    persister: Optional[CountersPersister] = None
+    try:
+        with timer.phase("schema"), pool.connection() as conn:
+            run_schema(conn)
+            feed_start = change_feed_position(conn)
+            # Seed reference
+            seed_sports(conn)
+
+        if LIVE_COUNTS_SOURCE == "local":
+            with pool.connection() as conn:
+                LIVE_COUNTERS.load(conn)
+            if COUNTERS_PORT:
+                server = serve_counters()
+            if args.daemon or COUNTERS_PORT:
+                persister = CountersPersister(pool)
+
+        checkpoints = Checkpoints(args.run_key)
+        if args.fresh:
+            with pool.connection() as conn:
+                checkpoints.reset(conn, names)
+        ctx = PhaseContext(pool, checkpoints, timer)
+        status = run_phases(ctx, names, workers=args.workers, force=args.force)
+        cycle = 1
+        while args.daemon:
+            time.sleep(DAEMON_INTERVAL)
+            # Each cycle gets its own timings/report and fresh API responses
+            timer.finish({"run_key": args.run_key, "phase_status": status, "cycle": cycle})
+            ctx.timer = timer = PhaseTimer()
+            clear_api_memo()
+            cycle += 1
+            status = run_phases(ctx, names, workers=args.workers, force=True)
+
+        with timer.phase("refresh_backlog"), pool.connection() as conn:
+            backlog = refresh_backlog(conn)
+            changes = summarize_change_feed(conn, feed_start)
+            pruned = prune_change_feed(conn)
+            lag_gauges = live_lag_gauges(conn)
+        logger.info("Refresh backlog (stale items): %s", ", ".join(f"{k}={v}" for k, v in backlog.items()))
+        logger.info(
+            "Live events with data older than: %s (SLA %.0fs)",
+            ", ".join(f"{g}s={n}" for g, n in lag_gauges.items()) or "no gauges",
+            LIVE_LAG_SLA_SECONDS,
+        )
+        logger.info(
+            "Change feed: %s (pruned %d expired)",
+            ", ".join(f"{k}={v}" for k, v in sorted(changes.items())) or "no changes",
+            pruned,
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+        if persister is not None:
+            persister.stop()
+        pool.close()
+        timer.finish({"run_key": args.run_key, "phase_status": status})
+
+    logger.info(
+        "API requests: %d fetched, %d served from run memo, %d coalesced with in-flight",
+        API_STATS["fetched"],
+        API_STATS["cache_hits"],
+        API_STATS["coalesced"],
+    )
+    logger.info("Unchanged rows skipped (skipped/total upserts): %s", write_stats_summary(WRITE_STATS))
+    logger.info("Payload validation: %s", payload_stats_summary(PAYLOAD_STATS))
+    lag = EVENT_LAG.snapshot()
+    logger.info(
+        "Event fetch-to-commit lag over %d writes: p50 %.0f ms, p90 %.0f ms, p99 %.0f ms, max %.0f ms",
+        lag["samples"], lag["lag_ms"]["p50"], lag["lag_ms"]["p90"], lag["lag_ms"]["p99"], lag["lag_ms"]["max"],
+    )
+    unusable = sorted(
+        ep for ep, s in PAYLOAD_STATS.items() if s["records"] == s["rejected"] and s["bad_payloads"] + s["rejected"]
+    )
+    if unusable:
+        logger.warning("No usable records from %s; the upstream payload shape may have changed", ", ".join(unusable))
+    unfinished = sorted(name for name, st in status.items() if st not in ("done", "skipped"))
+    if unfinished:
+        logger.warning("Bootstrap finished with unfinished phases: %s (rerun to resume)", ", ".join(unfinished))
+    else:
+        logger.info("Bootstrap completed successfully")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JSON codecs used by bootstrap_sofascore_db.py.
+
+What this script does
+- Builds a corpus of representative JSONB rows from a saved API snapshot (scheduled events,
+  tournament catalog entities, lineup blocks and trending player payloads).
+- Times JSONB parameter adaptation (psycopg2.extras.Json serialization plus quoting for a UTF8
+  connection, i.e. what every upsert pays per row) with the stdlib json module and with orjson.
+- Times decoding of the snapshot's response bodies with both codecs.
+- Prints CPU milliseconds per 10k rows / per body and the CPU saved by orjson.
+
+Configuration via environment variables
+- SNAPSHOT_DIR (default: newest folder under data/api_snapshots/)
+- BENCH_ROWS (default: 10000)
+- BENCH_REPEAT (default: 5) — best-of-N timing
+
+Usage
+  pip install orjson
+  python scripts/bench_json_codec.py
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import pathlib
+from typing import Any, Callable, Dict, List
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import psycopg2.extras  # noqa: E402
+from psycopg2.extensions import QuotedString  # noqa: E402
+
+import bootstrap_sofascore_db as bootstrap  # noqa: E402
+
+BENCH_ROWS = int(os.environ.get("BENCH_ROWS", "10000"))
+BENCH_REPEAT = int(os.environ.get("BENCH_REPEAT", "5"))
+
+
+def _snapshot_dir() -> pathlib.Path:
+    env = os.environ.get("SNAPSHOT_DIR")
+    if env:
+        return pathlib.Path(env)
+    runs = sorted(p for p in (ROOT / "data" / "api_snapshots").iterdir() if p.is_dir())
+    if not runs:
+        raise SystemExit("No snapshots found under data/api_snapshots")
+    return runs[-1]
+
+
+def _load(path: pathlib.Path) -> Any:
+    with path.open("rb") as f:
+        return json.loads(f.read())
+
+
+def _collect_rows(snap: pathlib.Path) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    for sched in sorted(snap.glob("events/scheduled_*.json")):
+        rows.extend((_load(sched).get("data") or {}).get("events") or [])
+    catalog = snap / "tournaments.json"
+    if catalog.exists():
+        rows.extend(r.get("entity") or {} for r in (_load(catalog).get("data") or {}).get("results") or [])
+    for lineups in sorted(snap.glob("events/*/lineups.json")):
+        data = _load(lineups).get("data") or {}
+        rows.extend(data.get(k) or {} for k in ("home_team", "away_team"))
+    trending = snap / "trending" / "players.json"
+    if trending.exists():
+        rows.extend((_load(trending).get("data") or {}).get("topPlayers") or [])
+    rows = [r for r in rows if r]
+    if not rows:
+        raise SystemExit(f"No rows found in snapshot {snap}")
+    # Cycle the corpus up to the requested row count
+    return [rows[i % len(rows)] for i in range(BENCH_ROWS)]
+
+
+def _best_cpu_ms(fn: Callable[[], None]) -> float:
+    best = float("inf")
+    for _ in range(BENCH_REPEAT):
+        t0 = time.process_time()
+        fn()
+        best = min(best, time.process_time() - t0)
+    return best * 1000.0
+
+
+def _codecs() -> Dict[str, Any]:
+    codecs = {"json": bootstrap._select_json_codec("json")}
+    if bootstrap.orjson is not None:
+        codecs["orjson"] = bootstrap._select_json_codec("orjson")
+    return codecs
+
+
+def main() -> None:
+    snap = _snapshot_dir()
+    rows = _collect_rows(snap)
+    bodies = [p.read_bytes() for p in sorted(snap.rglob("*.json")) if p.parent.name != "_meta"]
+    body_mb = sum(len(b) for b in bodies) / 1e6
+    codecs = _codecs()
+    print(f"Snapshot: {snap}")
+    print(f"Rows: {len(rows)}  Bodies: {len(bodies)} ({body_mb:.1f} MB)  Best of {BENCH_REPEAT}")
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, (_, dumps, loads) in codecs.items():
+        def encode() -> None:
+            for r in rows:
+                # Same work as Json.getquoted() once prepared against a UTF8 connection
+                qs = QuotedString(psycopg2.extras.Json(r, dumps=dumps).dumps(r))
+                qs.encoding = "utf8"
+                qs.getquoted()
+
+        def decode() -> None:
+            for b in bodies:
+                loads(b)
+
+        results[name] = {"encode": _best_cpu_ms(encode), "decode": _best_cpu_ms(decode)}
+
+    per_10k = 10000.0 / len(rows)
+    print(f"{'codec':<8} {'JSONB encode ms/10k rows':>26} {'decode ms/snapshot':>20}")
+    for name, r in results.items():
+        print(f"{name:<8} {r['encode'] * per_10k:>26.1f} {r['decode']:>20.1f}")
+    if "orjson" in results:
+        base, fast = results["json"], results["orjson"]
+        saved = (base["encode"] - fast["encode"]) * per_10k
+        print(
+            f"orjson saves {saved:.1f} ms CPU per 10k JSONB rows "
+            f"({base['encode'] / fast['encode']:.1f}x) and "
+            f"{base['decode'] - fast['decode']:.1f} ms per snapshot decode "
+            f"({base['decode'] / fast['decode']:.1f}x)"
+        )
+    else:
+        print("orjson not installed; only the stdlib codec was measured")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Compare two API snapshots taken by scripts/snapshot_api_responses.py.
+
+What this script does
+- Reads both snapshots' _meta/index.json and pairs saved responses by endpoint and request
+  parameters (the index "note", e.g. event_id=14348669).
+- Skips identical responses by size and sha256. Digests come from the index when the snapshot
+  recorded them, and otherwise from streaming the file; bodies are never parsed for this step.
+- Runs a structural JSON diff only on pairs whose digests differ. List elements that carry an
+  "id" are matched by id and other list elements by position. Each change is reported as a path
+  (e.g. data.events[id=123].status.type), and paths are capped per file.
+- Separates value changes from schema drift. Drift is a field path that appears or disappears, or
+  changes JSON type, across the responses of one endpoint. Drift is what breaks ingestion.
+- Prints a per-endpoint summary (unchanged / changed / added / removed) and the entities to
+  refetch (parameters of changed or added responses); --json emits the same as one JSON document
+  for the incremental sync to consume.
+
+Configuration via arguments
+- OLD NEW snapshot folders (default: the two newest folders under data/api_snapshots/)
+- --max-changes (default: 20) — value changes listed per file
+- --json — machine-readable output
+
+Usage
+  python scripts/diff_snapshots.py
+  python scripts/diff_snapshots.py data/api_snapshots/20250820T184917Z data/api_snapshots/20250821T060000Z --json
+"""
+from __future__ import annotations
+
+import sys
+import json
+import hashlib
+import pathlib
+import argparse
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+SNAPSHOTS = ROOT / "data" / "api_snapshots"
+
+# (endpoint, note) -> index entry
+Key = Tuple[str, Optional[str]]
+
+
+def _default_pair() -> Tuple[pathlib.Path, pathlib.Path]:
+    runs = sorted(p for p in SNAPSHOTS.iterdir() if p.is_dir()) if SNAPSHOTS.exists() else []
+    if len(runs) < 2:
+        raise SystemExit(f"Need two snapshots under {SNAPSHOTS} (found {len(runs)}); pass OLD NEW explicitly")
+    return runs[-2], runs[-1]
+
+
+def _load_index(snap: pathlib.Path) -> Dict[Key, Dict[str, Any]]:
+    path = snap / "_meta" / "index.json"
+    if not path.exists():
+        raise SystemExit(f"No index at {path}")
+    with path.open(encoding="utf-8") as f:
+        index = json.load(f)
+    entries: Dict[Key, Dict[str, Any]] = {}
+    for endpoint, files in (index.get("endpoints") or {}).items():
+        for entry in files:
+            entries[(endpoint, entry.get("note"))] = entry
+    return entries
+
+
+def _digest(snap: pathlib.Path, entry: Dict[str, Any]) -> Tuple[int, str]:
+    if entry.get("sha256") and entry.get("bytes") is not None:
+        return entry["bytes"], entry["sha256"]
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with (snap / entry["file"]).open("rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                h.update(chunk)
+                size += len(chunk)
+    except OSError:
+        return -1, ""
+    return size, h.hexdigest()
+
+
+def _load(snap: pathlib.Path, entry: Dict[str, Any]) -> Any:
+    try:
+        with (snap / entry["file"]).open("rb") as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+def _ids(items: List[Any]) -> Optional[List[Any]]:
+    """Element ids when every element is an object with a distinct "id", else None."""
+    ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+    if not ids or None in ids or len(set(map(str, ids))) != len(ids):
+        return None
+    return ids
+
+
+def _walk(old: Any, new: Any, path: str) -> Iterator[Tuple[str, str, Any, Any]]:
+    """Yield (kind, path, old, new) with kind in added/removed/type/value."""
+    if _type(old) != _type(new):
+        yield "type", path, _type(old), _type(new)
+        return
+    if isinstance(old, dict):
+        for key in sorted(old.keys() | new.keys()):
+            sub = f"{path}.{key}" if path else key
+            if key not in new:
+                yield "removed", sub, old[key], None
+            elif key not in old:
+                yield "added", sub, None, new[key]
+            else:
+                yield from _walk(old[key], new[key], sub)
+    elif isinstance(old, list):
+        old_ids, new_ids = _ids(old), _ids(new)
+        if old_ids is not None and new_ids is not None:
+            old_by_id = dict(zip(map(str, old_ids), old))
+            new_by_id = dict(zip(map(str, new_ids), new))
+            for item_id in sorted(old_by_id.keys() | new_by_id.keys()):
+                sub = f"{path}[id={item_id}]"
+                if item_id not in new_by_id:
+                    yield "removed", sub, old_by_id[item_id], None
+                elif item_id not in old_by_id:
+                    yield "added", sub, None, new_by_id[item_id]
+                else:
+                    yield from _walk(old_by_id[item_id], new_by_id[item_id], sub)
+        else:
+            for i in range(max(len(old), len(new))):
+                sub = f"{path}[{i}]"
+                if i >= len(new):
+                    yield "removed", sub, old[i], None
+                elif i >= len(old):
+                    yield "added", sub, None, new[i]
+                else:
+                    yield from _walk(old[i], new[i], sub)
+    elif old != new:
+        yield "value", path, old, new
+
+
+def _schema(value: Any, path: str = "", out: Optional[Dict[str, Set[str]]] = None) -> Dict[str, Set[str]]:
+    """Field path (list positions collapsed to []) -> JSON types seen there."""
+    out = {} if out is None else out
+    out.setdefault(path or "$", set()).add(_type(value))
+    if isinstance(value, dict):
+        for key, sub in value.items():
+            _schema(sub, f"{path}.{key}" if path else key, out)
+    elif isinstance(value, list):
+        for sub in value:
+            _schema(sub, f"{path}[]", out)
+    return out
+
+
+def _params(note: Optional[str]) -> Dict[str, str]:
+    params: Dict[str, str] = {}
+    for part in (note or "").split(","):
+        if "=" in part:
+            k, v = part.split("=", 1)
+            params[k.strip()] = v.strip()
+    return params
+
+
+def _short(value: Any, limit: int = 60) -> str:
+    text = json.dumps(value, ensure_ascii=False, default=str)
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def diff_snapshots(old_snap: pathlib.Path, new_snap: pathlib.Path, max_changes: int = 20) -> Dict[str, Any]:
+    old_index, new_index = _load_index(old_snap), _load_index(new_snap)
+    endpoints: Dict[str, Dict[str, Any]] = {}
+    refetch: Dict[str, Set[str]] = {}
+    old_schema: Dict[str, Dict[str, Set[str]]] = {}
+    new_schema: Dict[str, Dict[str, Set[str]]] = {}
+    files: List[Dict[str, Any]] = []
+
+    for key in sorted(old_index.keys() | new_index.keys(), key=lambda k: (k[0], k[1] or "")):
+        endpoint, note = key
+        summary = endpoints.setdefault(endpoint, {"unchanged": 0, "changed": 0, "added": 0, "removed": 0})
+        old_entry, new_entry = old_index.get(key), new_index.get(key)
+        if old_entry is None or new_entry is None:
+            summary["added" if old_entry is None else "removed"] += 1
+            if old_entry is None:
+                for k, v in _params(note).items():
+                    refetch.setdefault(k, set()).add(v)
+            continue
+        if _digest(old_snap, old_entry) == _digest(new_snap, new_entry):
+            summary["unchanged"] += 1
+            continue
+        old_body, new_body = _load(old_snap, old_entry), _load(new_snap, new_entry)
+        # Schema drift is judged per endpoint, and only from responses that
+        # succeeded on both sides (an error body has its own shape)
+        if isinstance(old_body, dict) and isinstance(new_body, dict) and old_body.get("success") and new_body.get("success"):
+            _schema(old_body, out=old_schema.setdefault(endpoint, {}))
+            _schema(new_body, out=new_schema.setdefault(endpoint, {}))
+        changes = list(_walk(old_body, new_body, ""))
+        if not changes:
+            # Same JSON, different bytes (formatting only)
+            summary["unchanged"] += 1
+            continue
+        summary["changed"] += 1
+        params = _params(note)
+        for k, v in params.items():
+            refetch.setdefault(k, set()).add(v)
+        if not params:
+            refetch.setdefault("endpoint", set()).add(endpoint)
+        files.append(
+            {
+                "endpoint": endpoint,
+                "note": note,
+                "file": new_entry["file"],
+                "changes": len(changes),
+                "sample": [
+                    {"kind": kind, "path": path or "$", "old": _short(old), "new": _short(new)}
+                    for kind, path, old, new in changes[:max_changes]
+                ],
+            }
+        )
+
+    drift: Dict[str, Dict[str, Any]] = {}
+    for endpoint in sorted(old_schema.keys() & new_schema.keys()):
+        before, after = old_schema[endpoint], new_schema[endpoint]
+        entry = {
+            "added": sorted(after.keys() - before.keys()),
+            "removed": sorted(before.keys() - after.keys()),
+            "retyped": {
+                path: {"old": sorted(before[path]), "new": sorted(after[path])}
+                for path in sorted(before.keys() & after.keys())
+                if before[path] != after[path]
+            },
+        }
+        if any(entry.values()):
+            drift[endpoint] = entry
+
+    return {
+        "old": str(old_snap),
+        "new": str(new_snap),
+        "endpoints": endpoints,
+        "files": files,
+        "schema_drift": drift,
+        "refetch": {k: sorted(v) for k, v in sorted(refetch.items())},
+    }
+
+
+def _print_report(report: Dict[str, Any]) -> None:
+    print(f"Old: {report['old']}\nNew: {report['new']}")
+    print(f"{'endpoint':<42} {'same':>6} {'changed':>8} {'added':>6} {'removed':>8}")
+    for endpoint, s in sorted(report["endpoints"].items()):
+        print(f"{endpoint:<42} {s['unchanged']:>6} {s['changed']:>8} {s['added']:>6} {s['removed']:>8}")
+    for f in report["files"]:
+        print(f"\n{f['endpoint']} {f['note'] or ''} ({f['file']}): {f['changes']} change(s)")
+        for c in f["sample"]:
+            print(f"  {c['kind']:<7} {c['path']}: {c['old']} -> {c['new']}")
+        if f["changes"] > len(f["sample"]):
+            print(f"  ... {f['changes'] - len(f['sample'])} more")
+    if report["schema_drift"]:
+        print("\nSchema drift:")
+        for endpoint, d in sorted(report["schema_drift"].items()):
+            print(f"  {endpoint}")
+            for path in d["added"]:
+                print(f"    + {path}")
+            for path in d["removed"]:
+                print(f"    - {path}")
+            for path, types in d["retyped"].items():
+                print(f"    ~ {path}: {'|'.join(types['old'])} -> {'|'.join(types['new'])}")
+    else:
+        print("\nNo schema drift")
+    refetch = report["refetch"]
+    print("\nRefetch: " + ("; ".join(f"{k} {', '.join(v)}" for k, v in refetch.items()) or "nothing"))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Diff two API snapshots taken by snapshot_api_responses.py.")
+    parser.add_argument("old", nargs="?", type=pathlib.Path, help="older snapshot folder")
+    parser.add_argument("new", nargs="?", type=pathlib.Path, help="newer snapshot folder")
+    parser.add_argument("--max-changes", type=int, default=20, help="value changes listed per file (default: 20)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if (args.old is None) != (args.new is None):
+        parser.error("pass both OLD and NEW, or neither")
+    old_snap, new_snap = (args.old, args.new) if args.old else _default_pair()
+    report = diff_snapshots(old_snap, new_snap, args.max_changes)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        _print_report(report)
+    # Non-zero when ingestion may need attention, for use in CI/cron
+    return 2 if report["schema_drift"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Learn the payload schemas that bootstrap_sofascore_db.py validates API records against.
+
+What this script does
+- Reads every snapshot under data/api_snapshots/ (or the folders given), using each
+  snapshot's _meta/index.json to find the saved responses of the endpoints in
+  bootstrap.PAYLOAD_CONTRACTS.
+- Walks the records of each successful response (e.g. data.topPlayers) and collects, per
+  dotted field path up to LEARN_DEPTH levels deep, the JSON types seen there. Arrays are
+  recorded as "array" and not descended into.
+- Marks the fields present in every sampled record as "always". The bootstrap counts a record
+  that lacks one of those fields, or carries a type never seen there, as partial.
+- Writes data/payload_schemas.json (or --out). Endpoints without any successful sample are
+  left out, so only their contract's key fields are checked.
+
+Configuration via arguments/environment
+- SNAPSHOT folders (default: all folders under data/api_snapshots/)
+- --out (default: data/payload_schemas.json)
+- LEARN_DEPTH (default: 2)
+
+Usage
+  python scripts/learn_payload_schemas.py
+  python scripts/learn_payload_schemas.py data/api_snapshots/20250820T184917Z --out /tmp/schemas.json
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import pathlib
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import bootstrap_sofascore_db as bootstrap  # noqa: E402
+
+LEARN_DEPTH = int(os.environ.get("LEARN_DEPTH", "2"))
+
+
+def _type(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+def _fields(record: Dict[str, Any], prefix: str = "", depth: int = 1) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for key, value in record.items():
+        path = f"{prefix}{key}"
+        out[path] = _type(value)
+        if isinstance(value, dict) and depth < LEARN_DEPTH:
+            out.update(_fields(value, f"{path}.", depth + 1))
+    return out
+
+
+def _records(body: Any, records_path: str) -> Optional[List[Any]]:
+    if not (isinstance(body, dict) and body.get("success")):
+        return None
+    node: Any = body
+    for part in records_path.split("."):
+        node = node.get(part) if isinstance(node, dict) else None
+    return node if isinstance(node, list) else None
+
+
+def learn(snapshots: List[pathlib.Path]) -> Dict[str, Any]:
+    types: Dict[str, Dict[str, Set[str]]] = {}
+    always: Dict[str, Set[str]] = {}
+    samples: Dict[str, int] = {}
+    for snap in snapshots:
+        index_path = snap / "_meta" / "index.json"
+        if not index_path.exists():
+            print(f"Skipping {snap}: no _meta/index.json", file=sys.stderr)
+            continue
+        index = json.loads(index_path.read_bytes())
+        for endpoint, contract in bootstrap.PAYLOAD_CONTRACTS.items():
+            files = sorted({e["file"] for e in (index.get("endpoints") or {}).get(endpoint) or []})
+            for rel in files:
+                try:
+                    body = json.loads((snap / rel).read_bytes())
+                except (OSError, ValueError):
+                    continue
+                for record in _records(body, contract.records) or []:
+                    if not isinstance(record, dict):
+                        continue
+                    fields = _fields(record)
+                    for path, t in fields.items():
+                        types.setdefault(endpoint, {}).setdefault(path, set()).add(t)
+                    seen = set(fields)
+                    always[endpoint] = always[endpoint] & seen if endpoint in always else seen
+                    samples[endpoint] = samples.get(endpoint, 0) + 1
+    return {
+        endpoint: {
+            "records": bootstrap.PAYLOAD_CONTRACTS[endpoint].records,
+            "samples": samples[endpoint],
+            "fields": {path: sorted(t) for path, t in sorted(types[endpoint].items())},
+            "always": sorted(always[endpoint]),
+        }
+        for endpoint in sorted(samples)
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Learn payload schemas from API snapshots.")
+    parser.add_argument("snapshots", nargs="*", type=pathlib.Path, help="snapshot folders (default: all)")
+    parser.add_argument("--out", type=pathlib.Path, default=ROOT / "data" / "payload_schemas.json")
+    args = parser.parse_args(argv)
+    snapshots = args.snapshots or sorted(p for p in (ROOT / "data" / "api_snapshots").iterdir() if p.is_dir())
+    if not snapshots:
+        raise SystemExit("No snapshots found under data/api_snapshots")
+    endpoints = learn(snapshots)
+    schemas = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "snapshots": [p.name for p in snapshots],
+        "depth": LEARN_DEPTH,
+        "endpoints": endpoints,
+    }
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(schemas, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    for endpoint in bootstrap.PAYLOAD_CONTRACTS:
+        learned = endpoints.get(endpoint)
+        if learned:
+            print(f"{endpoint}: {learned['samples']} records, {len(learned['fields'])} fields, {len(learned['always'])} always present")
+        else:
+            print(f"{endpoint}: no successful samples; key fields only")
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
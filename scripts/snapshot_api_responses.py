@@ -9,7 +9,10 @@ What this script does
   live category counts, and count by sport).
 - Traverses relationships to collect representative IDs (event, team, tournament, season, player).
 - Writes pretty-printed JSON responses under data/api_snapshots/<timestamp>/.
-- Produces an index file mapping endpoint -> saved files and entity IDs used.
+- Produces an index file mapping endpoint -> saved files (with size and sha256, so
+  scripts/diff_snapshots.py can skip identical responses without reading them) and entity IDs used.
+- Keeps memory flat: response bodies are dropped once saved (only the IDs needed for traversal are
+  kept) and index entries are appended to _meta/endpoints.jsonl, then streamed into index.json.
 
 Configuration via environment variables
 - API_BASE (default: http://69.197.168.221:8004)
@@ -27,6 +30,7 @@ import os
 import sys
 import time
 import json
+import hashlib
 import pathlib
 import traceback
 from datetime import datetime, timezone
@@ -48,24 +52,28 @@ RUN_TS = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
 OUT_ROOT = pathlib.Path(__file__).resolve().parents[1] / "data" / "api_snapshots" / RUN_TS
 META_DIR = OUT_ROOT / "_meta"
 
-# Track where we saved what
-INDEX: Dict[str, Any] = {
-    "api_base": API_BASE,
-    "run_ts": RUN_TS,
-    "endpoints": {},
-    "entities": {
-        "events": [],
-        "players": [],
-        "tournaments": [],
-        "seasons": [],
-    },
+# Entity IDs used, deduplicated in first-seen order (dicts as ordered sets)
+ENTITIES: Dict[str, Dict[int, None]] = {
+    "events": {},
+    "players": {},
+    "tournaments": {},
+    "seasons": {},
 }
+# Endpoint -> saved file entries are spilled here as they are recorded
+ENDPOINTS_LOG = META_DIR / "endpoints.jsonl"
 
 
 def _ensure_dirs() -> None:
     META_DIR.mkdir(parents=True, exist_ok=True)
 
 
+def _add_entity(kind: str, value: Any) -> None:
+    try:
+        ENTITIES[kind][int(value)] = None
+    except (TypeError, ValueError):
+        pass
+
+
 def _save_json(rel_path: str, payload: Any) -> str:
     """Save JSON under OUT_ROOT and return the absolute path as string."""
     path = OUT_ROOT / rel_path
@@ -75,11 +83,64 @@ def _save_json(rel_path: str, payload: Any) -> str:
     return str(path)
 
 
+def _file_digest(path: str) -> Tuple[int, str]:
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+            size += len(chunk)
+    return size, h.hexdigest()
+
+
 def _record(endpoint: str, saved_file: str, note: Optional[str] = None) -> None:
-    endpoints = INDEX.setdefault("endpoints", {})
-    arr = endpoints.setdefault(endpoint, [])
-    entry = {"file": os.path.relpath(saved_file, OUT_ROOT), "note": note}
-    arr.append(entry)
+    size, sha256 = _file_digest(saved_file)
+    entry = {
+        "endpoint": endpoint,
+        "file": os.path.relpath(saved_file, OUT_ROOT),
+        "note": note,
+        "bytes": size,
+        "sha256": sha256,
+    }
+    with ENDPOINTS_LOG.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def _write_index() -> str:
+    """Write _meta/index.json from the spilled endpoint log without loading it whole.
+
+    One pass over the log per endpoint keeps memory bounded by the number of
+    distinct endpoints rather than the number of saved files.
+    """
+    endpoints: List[str] = []
+    if ENDPOINTS_LOG.exists():
+        seen: Set[str] = set()
+        with ENDPOINTS_LOG.open(encoding="utf-8") as log:
+            for line in log:
+                ep = json.loads(line)["endpoint"]
+                if ep not in seen:
+                    seen.add(ep)
+                    endpoints.append(ep)
+    path = META_DIR / "index.json"
+    with path.open("w", encoding="utf-8") as f:
+        f.write("{\n")
+        f.write(f'  "api_base": {json.dumps(API_BASE)},\n  "run_ts": {json.dumps(RUN_TS)},\n  "endpoints": {{')
+        for i, ep in enumerate(endpoints):
+            f.write(("," if i else "") + f"\n    {json.dumps(ep, ensure_ascii=False)}: [")
+            first = True
+            with ENDPOINTS_LOG.open(encoding="utf-8") as log:
+                for line in log:
+                    entry = json.loads(line)
+                    if entry.pop("endpoint") != ep:
+                        continue
+                    f.write(("" if first else ",") + "\n      " + json.dumps(entry, ensure_ascii=False))
+                    first = False
+            f.write("\n    ]")
+        f.write("\n  },\n  \"entities\": ")
+        json.dump({k: list(v) for k, v in ENTITIES.items()}, f)
+        f.write("\n}\n")
+    ENDPOINTS_LOG.unlink(missing_ok=True)
+    return str(path)
 
 
 def _get(path: str, params: Optional[Dict[str, Any]] = None) -> Any:
@@ -114,38 +175,52 @@ def fetch_tournaments() -> None:
     _record("/football/tournaments", p)
 
 
-def fetch_scheduled_events(date_iso: Optional[str] = None) -> List[Dict[str, Any]]:
+def fetch_scheduled_events(date_iso: Optional[str] = None, limit: int = MAX_EVENTS) -> List[int]:
+    """Save the day's schedule and return the first ``limit`` event IDs."""
     if not date_iso:
         date_iso = datetime.now(timezone.utc).date().isoformat()
     data = _get("/football/events/scheduled", params={"date": date_iso})
     p = _save_json(f"events/scheduled_{date_iso}.json", data)
     _record("/football/events/scheduled", p, note=f"date={date_iso}")
-    events = []
+    event_ids: List[int] = []
     try:
         if data.get("success"):
-            events = (data.get("data") or {}).get("events", []) or []
+            for e in (data.get("data") or {}).get("events", []) or []:
+                try:
+                    event_ids.append(int(e.get("id")))
+                except Exception:
+                    continue
+                if len(event_ids) >= limit:
+                    break
     except Exception:
         pass
-    return events
+    return event_ids
 
 
 def fetch_event_bundle(event_id: int) -> Dict[str, Any]:
-    bundle: Dict[str, Any] = {}
+    """Save an event's details/lineups/statistics and return only the IDs needed to traverse further."""
+    bundle: Dict[str, Any] = {"tournament_id": None, "season_id": None, "players": []}
 
     details = _get("/football/event/details", params={"event_id": event_id})
     p = _save_json(f"events/{event_id}/details.json", details)
     _record("/football/event/details", p, note=f"event_id={event_id}")
-    bundle["details"] = details
+    try:
+        event = (details.get("data") or {}).get("event", {})
+        bundle["tournament_id"] = event.get("tournament", {}).get("id")
+        bundle["season_id"] = event.get("season", {}).get("id")
+    except Exception:
+        pass
+    del details
 
     lineups = _get("/football/event/lineups", params={"event_id": event_id})
     p = _save_json(f"events/{event_id}/lineups.json", lineups)
     _record("/football/event/lineups", p, note=f"event_id={event_id}")
-    bundle["lineups"] = lineups
+    bundle["players"] = _extract_players_from_lineups(lineups if isinstance(lineups, dict) else {})
+    del lineups
 
     statistics = _get("/football/event/statistics", params={"event_id": event_id})
     p = _save_json(f"events/{event_id}/statistics.json", statistics)
     _record("/football/event/statistics", p, note=f"event_id={event_id}")
-    bundle["statistics"] = statistics
 
     return bundle
 
@@ -234,72 +309,42 @@ def main() -> None:
     fetch_categories()
     fetch_tournaments()
 
-    # Events of today
+    # Events of today, limited to a small cohort to explore deeply
     today = datetime.now(timezone.utc).date().isoformat()
-    events = fetch_scheduled_events(today)
-
-    # Select a small cohort to explore deeply
-    selected = []
-    for e in events:
-        try:
-            eid = int(e.get("id"))
-        except Exception:
-            continue
-        selected.append(e)
-        if len(selected) >= MAX_EVENTS:
-            break
+    selected = fetch_scheduled_events(today)
 
     # Traverse events
-    for e in selected:
-        eid = int(e.get("id"))
-        INDEX["entities"]["events"].append(eid)
+    tournament_bundles: Set[Tuple[int, Optional[int]]] = set()
+    for eid in selected:
+        _add_entity("events", eid)
 
         bundle = fetch_event_bundle(eid)
         # derive ids for tournament and season
-        t_id = None
-        s_id = None
-        try:
-            t_id = ((bundle.get("details") or {}).get("data") or {}).get("event", {}).get("tournament", {}).get("id")
-            s_id = ((bundle.get("details") or {}).get("data") or {}).get("event", {}).get("season", {}).get("id")
-        except Exception:
-            pass
+        t_id = bundle.get("tournament_id")
+        s_id = bundle.get("season_id")
         if t_id:
-            try:
-                INDEX["entities"]["tournaments"].append(int(t_id))
-            except Exception:
-                pass
+            _add_entity("tournaments", t_id)
         if s_id:
-            try:
-                INDEX["entities"]["seasons"].append(int(s_id))
-            except Exception:
-                pass
+            _add_entity("seasons", s_id)
 
         # Players from lineups
-        players = _extract_players_from_lineups(bundle.get("lineups") or {})
-        for pid in players:
-            INDEX["entities"]["players"].append(pid)
+        for pid in bundle["players"]:
+            _add_entity("players", pid)
             fetch_player_event_bundle(eid, pid)
 
-        # Tournament-level
+        # Tournament-level, once per tournament season
         if t_id:
-            fetch_tournament_bundle(int(t_id), int(s_id) if s_id else None)
+            key = (int(t_id), int(s_id) if s_id else None)
+            if key not in tournament_bundles:
+                tournament_bundles.add(key)
+                fetch_tournament_bundle(*key)
 
     # Other aggregates
     fetch_trending_and_suggestions()
     fetch_counts()
 
-    # Deduplicate entity lists
-    for key in ("events", "players", "tournaments", "seasons"):
-        seen: Set[int] = set()
-        uniq: List[int] = []
-        for v in INDEX["entities"][key]:
-            if v not in seen:
-                seen.add(v)
-                uniq.append(v)
-        INDEX["entities"][key] = uniq
-
     # Save index
-    idx_path = _save_json("_meta/index.json", INDEX)
+    idx_path = _write_index()
     print(f"Snapshot complete. Root: {OUT_ROOT}\nIndex: {idx_path}")
 
 